@@ -0,0 +1,355 @@
+"""Headless JSON API for the mobile app and LMS integration.
+
+Serves tasks, group tasks and burnout risk from tasks.py, groups.py and
+burnout.py over the same db.py pool, without Streamlit's per-rerun cost.
+Requests run on a tornado event loop; database calls run in a thread pool
+sized to the connection pool.
+
+Clients log in once for a bearer token (POST /api/login). Reads carry an
+ETag built from the user's or group's workload_version, so a client that
+sends If-None-Match gets 304 after a single primary-key lookup, and the
+payload for an unchanged version is served from an in-process cache.
+
+    python api.py        # listens on API_HOST:API_PORT, default 127.0.0.1:8503
+
+    POST   /api/login                     {"username", "password"} -> {"token", "user_id"}
+    GET    /api/workload                  individual and group tasks
+    GET    /api/tasks?page=1&page_size=50
+    POST   /api/tasks                     {"title", "deadline", "estimated_hours"}
+    PATCH  /api/tasks/<id>                any of title, deadline, estimated_hours, status
+    DELETE /api/tasks/<id>
+    GET    /api/groups
+    GET    /api/groups/<id>/tasks?page=1
+    PATCH  /api/groups/<id>/tasks/<task_id>   {"status"}
+    GET    /api/burnout
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import tornado.ioloop
+import tornado.web
+
+from auth import login_user
+from burnout import burnout_risk_from_tasks, get_burnout_recommendations
+from cache import TTLCache
+from db import DB_POOL_SIZE, watch_reads
+from groups import get_group_tasks, get_group_version, get_user_groups, update_group_task_status
+from session_store import record_activity
+from tasks import (
+    add_task, complete_tasks, delete_task, get_all_user_group_tasks, get_user_tasks,
+    get_workload_version, reopen_tasks, update_task
+)
+from tokens import sign, verify
+from utils import paginate
+
+API_HOST = os.environ.get('API_HOST', '127.0.0.1')
+API_PORT = int(os.environ.get('API_PORT', 8503))
+TOKEN_TTL_SECONDS = 24 * 3600
+TOKEN_TYPE = 'api'
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+TASK_STATUSES = ['Pending', 'In Progress', 'Completed']
+
+_db_executor = ThreadPoolExecutor(DB_POOL_SIZE, thread_name_prefix='api-db')
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# Keyed by (user_id, workload_version), so a write never serves stale data
+_workload_cache = TTLCache('api_workload', 300)
+_groups_cache = TTLCache('api_groups', 300)
+_group_tasks_cache = TTLCache('api_group_tasks', 300)
+
+
+def _cached(cache, key, loader, what):
+    """cache.get(key, loader), except that a load with a failed read is neither cached nor served"""
+    def load():
+        with watch_reads() as reads:
+            value = loader()
+        return None if reads['failed'] else value
+
+    value = cache.get(key, load)
+    if value is None:
+        raise ApiError(500, f"could not load the {what}")
+    return value
+
+
+def load_workload(user_id, version):
+    return _cached(
+        _workload_cache, (user_id, version),
+        lambda: {'tasks': get_user_tasks(user_id), 'group_tasks': get_all_user_group_tasks(user_id)},
+        'tasks'
+    )
+
+
+def load_groups(user_id, version):
+    return _cached(_groups_cache, (user_id, version), lambda: get_user_groups(user_id), 'groups')
+
+
+def load_group_tasks(group_id, version):
+    return _cached(_group_tasks_cache, (group_id, version), lambda: get_group_tasks(group_id), 'group tasks')
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    requires_login = True
+
+    def prepare(self):
+        self.user_id = None
+        if self.requires_login:
+            header = self.request.headers.get('Authorization', '')
+            payload = verify(header[len('Bearer '):], TOKEN_TYPE) if header.startswith('Bearer ') else None
+            if payload is None:
+                raise ApiError(401, "missing or invalid token")
+            self.user_id = payload['user_id']
+            record_activity(self.user_id)
+
+    async def db(self, func, *args):
+        return await tornado.ioloop.IOLoop.current().run_in_executor(_db_executor, func, *args)
+
+    def body(self):
+        try:
+            data = json.loads(self.request.body or b'{}')
+        except ValueError:
+            raise ApiError(400, "request body is not valid JSON")
+        if not isinstance(data, dict):
+            raise ApiError(400, "request body must be a JSON object")
+        return data
+
+    def page_params(self):
+        try:
+            page = int(self.get_query_argument('page', '1'))
+            page_size = int(self.get_query_argument('page_size', str(DEFAULT_PAGE_SIZE)))
+        except ValueError:
+            raise ApiError(400, "page and page_size must be integers")
+        return page, min(max(page_size, 1), MAX_PAGE_SIZE)
+
+    def paginated(self, items):
+        page, page_size = self.page_params()
+        page_items, num_pages = paginate(items, page, page_size)
+        return {'items': page_items, 'page': page, 'page_size': page_size,
+                'pages': num_pages, 'total': len(items)}
+
+    def not_modified(self, etag):
+        """Set the ETag; return True (after sending 304) if the client has it"""
+        self.set_header('ETag', etag)
+        if etag in self.request.headers.get('If-None-Match', ''):
+            self.set_status(304)
+            self.finish()
+            return True
+        return False
+
+    def send_json(self, data, status=200):
+        self.set_status(status)
+        self.set_header('Content-Type', 'application/json')
+        self.finish(json.dumps(data, default=str))
+
+    def write_error(self, status_code, **kwargs):
+        error = kwargs.get('exc_info', (None, None))[1]
+        message = error.message if isinstance(error, ApiError) else self._reason
+        self.send_json({'error': message}, status_code)
+
+    def _handle_request_exception(self, e):
+        if isinstance(e, ApiError):
+            self.send_error(e.status, exc_info=(type(e), e, e.__traceback__))
+        else:
+            super()._handle_request_exception(e)
+
+    async def user_version(self):
+        version = await self.db(get_workload_version, self.user_id)
+        if version is None:
+            raise ApiError(404, "user not found")
+        return version
+
+    def user_etag(self, version, kind):
+        # Burnout and due-this-week figures depend on the date as well
+        return f'"{kind}-u{self.user_id}-v{version}-{date.today()}"'
+
+
+def parse_task_fields(data, partial=False):
+    fields = {}
+    if 'title' in data or not partial:
+        title = str(data.get('title', '')).strip()
+        if not title or len(title) > 255:
+            raise ApiError(400, "title must be 1-255 characters")
+        fields['title'] = title
+    if 'deadline' in data or not partial:
+        try:
+            fields['deadline'] = datetime.strptime(str(data.get('deadline')), '%Y-%m-%d').date()
+        except ValueError:
+            raise ApiError(400, "deadline must be YYYY-MM-DD")
+    if 'estimated_hours' in data or not partial:
+        hours = data.get('estimated_hours')
+        if not isinstance(hours, int) or not 1 <= hours <= 100:
+            raise ApiError(400, "estimated_hours must be an integer from 1 to 100")
+        fields['estimated_hours'] = hours
+    if partial and 'status' in data:
+        if data['status'] not in ('Pending', 'Completed'):
+            raise ApiError(400, "status must be Pending or Completed")
+        fields['status'] = data['status']
+    return fields
+
+
+class LoginHandler(BaseHandler):
+    requires_login = False
+
+    async def post(self):
+        data = self.body()
+        success, user = await self.db(login_user, str(data.get('username', '')), str(data.get('password', '')))
+        if not success:
+            raise ApiError(401, "invalid username or password")
+        token = sign({'user_id': user['user_id']}, TOKEN_TTL_SECONDS, TOKEN_TYPE)
+        self.send_json({'token': token, 'user_id': user['user_id'], 'expires_in': TOKEN_TTL_SECONDS})
+
+
+class WorkloadHandler(BaseHandler):
+    async def get(self):
+        version = await self.user_version()
+        if self.not_modified(self.user_etag(version, 'workload')):
+            return
+        workload = await self.db(load_workload, self.user_id, version)
+        self.send_json({'version': version, **workload})
+
+
+class TasksHandler(BaseHandler):
+    async def get(self):
+        version = await self.user_version()
+        if self.not_modified(self.user_etag(version, 'tasks')):
+            return
+        workload = await self.db(load_workload, self.user_id, version)
+        self.send_json({'version': version, **self.paginated(workload['tasks'])})
+
+    async def post(self):
+        fields = parse_task_fields(self.body())
+        task_id = await self.db(add_task, self.user_id, fields['title'], fields['deadline'], fields['estimated_hours'])
+        if not task_id:
+            raise ApiError(500, "could not add the task")
+        self.send_json({'task_id': task_id}, 201)
+
+
+class TaskHandler(BaseHandler):
+    async def owned_task(self, task_id):
+        version = await self.user_version()
+        workload = await self.db(load_workload, self.user_id, version)
+        for task in workload['tasks']:
+            if task['task_id'] == task_id:
+                return task
+        raise ApiError(404, "task not found")
+
+    async def patch(self, task_id):
+        task_id = int(task_id)
+        fields = parse_task_fields(self.body(), partial=True)
+        task = await self.owned_task(task_id)
+        if fields.keys() & {'title', 'deadline', 'estimated_hours'}:
+            result = await self.db(
+                update_task, self.user_id, task_id,
+                fields.get('title', task['title']),
+                fields.get('deadline', task['deadline']),
+                fields.get('estimated_hours', task['estimated_hours'])
+            )
+            if result is None:
+                raise ApiError(500, "could not update the task")
+        if fields.get('status') in ('Completed', 'Pending'):
+            change = complete_tasks if fields['status'] == 'Completed' else reopen_tasks
+            if await self.db(change, self.user_id, [task_id]) is None:
+                raise ApiError(500, "could not update the task status")
+        self.send_json({'task_id': task_id})
+
+    async def delete(self, task_id):
+        task_id = int(task_id)
+        await self.owned_task(task_id)
+        if await self.db(delete_task, self.user_id, task_id) is None:
+            raise ApiError(500, "could not delete the task")
+        self.set_status(204)
+        self.finish()
+
+
+class GroupsHandler(BaseHandler):
+    async def get(self):
+        version = await self.user_version()
+        if self.not_modified(self.user_etag(version, 'groups')):
+            return
+        groups = await self.db(load_groups, self.user_id, version)
+        self.send_json({'version': version, 'groups': groups})
+
+
+class GroupTasksHandler(BaseHandler):
+    async def check_member(self, group_id):
+        version = await self.user_version()
+        groups = await self.db(load_groups, self.user_id, version)
+        if not any(group['group_id'] == group_id for group in groups):
+            raise ApiError(404, "group not found")
+
+    async def get(self, group_id):
+        group_id = int(group_id)
+        await self.check_member(group_id)
+        version = await self.db(get_group_version, group_id)
+        if self.not_modified(f'"group-{group_id}-v{version}-{date.today()}"'):
+            return
+        tasks = await self.db(load_group_tasks, group_id, version)
+        self.send_json({'version': version, **self.paginated(tasks)})
+
+
+class GroupTaskHandler(GroupTasksHandler):
+    async def patch(self, group_id, task_id):
+        group_id, task_id = int(group_id), int(task_id)
+        status = self.body().get('status')
+        if status not in TASK_STATUSES:
+            raise ApiError(400, f"status must be one of {', '.join(TASK_STATUSES)}")
+        await self.check_member(group_id)
+        version = await self.db(get_group_version, group_id)
+        tasks = await self.db(load_group_tasks, group_id, version)
+        if not any(task['group_task_id'] == task_id for task in tasks):
+            raise ApiError(404, "group task not found")
+        if await self.db(update_group_task_status, group_id, task_id, status) is None:
+            raise ApiError(500, "could not update the group task")
+        self.send_json({'group_task_id': task_id, 'status': status})
+
+
+class BurnoutHandler(BaseHandler):
+    async def get(self):
+        version = await self.user_version()
+        if self.not_modified(self.user_etag(version, 'burnout')):
+            return
+        workload = await self.db(load_workload, self.user_id, version)
+        risk_level, score, total_tasks, due_this_week, hours_this_week = burnout_risk_from_tasks(
+            workload['tasks'] + workload['group_tasks']
+        )
+        self.send_json({
+            'risk_level': risk_level,
+            'score': score,
+            'total_tasks': total_tasks,
+            'tasks_due_this_week': due_this_week,
+            'hours_this_week': hours_this_week,
+            'recommendations': get_burnout_recommendations(risk_level),
+        })
+
+
+def make_app():
+    return tornado.web.Application([
+        (r'/api/login', LoginHandler),
+        (r'/api/workload', WorkloadHandler),
+        (r'/api/tasks', TasksHandler),
+        (r'/api/tasks/(\d+)', TaskHandler),
+        (r'/api/groups', GroupsHandler),
+        (r'/api/groups/(\d+)/tasks', GroupTasksHandler),
+        (r'/api/groups/(\d+)/tasks/(\d+)', GroupTaskHandler),
+        (r'/api/burnout', BurnoutHandler),
+    ])
+
+
+def main():
+    make_app().listen(API_PORT, API_HOST)
+    print(f"API listening on http://{API_HOST}:{API_PORT}")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == '__main__':
+    main()
@@ -5,23 +5,35 @@ import calendar as cal_module
 from auth import register_user, login_user, logout_user, request_password_reset, reset_password
 from tasks import (
     add_task, get_user_tasks, delete_task, update_task,
-    detect_deadline_collisions, get_all_user_group_tasks, get_tasks_needing_reminder,
-    mark_task_completed  # ADD THIS
+    find_deadline_collisions, get_all_user_group_tasks, get_tasks_needing_reminder,
+    mark_task_completed, complete_tasks, reopen_tasks, delete_tasks, reschedule_tasks,
+    get_workload_version
 )
 from groups import (
     create_group, get_user_groups, join_group, get_all_groups,
     add_group_task, get_group_tasks, update_group_task_status,
     delete_group_task, get_group_members, join_group_by_code,
-    is_group_head, update_group_task, get_group_analytics
+    is_group_head, update_group_task, summarize_group_tasks,
+    update_group_tasks_status, delete_group_tasks, reschedule_group_tasks
 )
-from burnout import calculate_burnout_risk, get_burnout_recommendations
+from burnout import calculate_burnout_risk, burnout_risk_from_tasks, get_burnout_recommendations
 from calendar_sync import sync_task_to_calendar
 from utils import (
     apply_custom_css, show_logo, create_progress_bar,
     create_task_completion_chart, create_priority_distribution_chart,
     create_workload_timeline, export_tasks_to_excel, export_report_to_pdf,
-    show_notification, create_calendar_view
+    show_notification, create_calendar_view, paginate, render_task_list,
+    TASK_LIST_PAGE_SIZE
 )
+from warmup import warm_start
+from db import record_queries, replica_reads, time_budget, watch_reads
+from session_trace import trace_run
+from tracing import span
+from metrics import LOGINS, PAGE_SECONDS, REMINDER_SWEEPS, RERUNS
+from profiling import is_admin, profile_page, show_profile
+from memory import start_memory_accounting
+from pubsub import publish, subscribe, unsubscribe_session
+from session_store import end_session, record_activity, restore_session, save_session, start_session
 
 st.set_page_config(
     page_title="Academic Burnout Detector",
@@ -30,9 +42,16 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# No-op after the first run in this process (or when started via serve.py)
+warm_start()
+start_memory_accounting()
+
 # Apply custom styling
 apply_custom_css()
 
+# Pick up a login made on any app server, then fill in the defaults
+restore_session()
+
 # Initialize session state
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
@@ -48,11 +67,51 @@ if 'show_reminders' not in st.session_state:
 def navigate_to(page):
     st.session_state.page = page
 
+def load_workload(user_id):
+    """Return (tasks, group_tasks) for a user, reusing the session's copy
+    until the user's workload_version changes"""
+    version = get_workload_version(user_id)
+    key = (user_id, version, datetime.now().date())
+    cached = st.session_state.get('workload_cache')
+    if version is not None and cached and cached['key'] == key:
+        return cached['tasks'], cached['group_tasks']
+    
+    with watch_reads() as reads:
+        tasks = get_user_tasks(user_id)
+        group_tasks = get_all_user_group_tasks(user_id)
+    # A failed read, or one cut short by the page's time budget, comes back
+    # empty or partial; don't keep it
+    if not reads['failed']:
+        st.session_state.workload_cache = {'key': key, 'tasks': tasks, 'group_tasks': group_tasks}
+    return tasks, group_tasks
+
+def task_label(task):
+    """Label used for a task in bulk-selection widgets"""
+    return f"{task['title']} (Due: {task['deadline']})"
+
+def show_task_list(tasks, key):
+    """Render tasks as one HTML block, one page at a time; return the page's tasks"""
+    num_pages = max(1, -(-len(tasks) // TASK_LIST_PAGE_SIZE))
+    page = 1
+    if num_pages > 1:
+        page_key = f"{key}_page"
+        if st.session_state.get(page_key, 1) > num_pages:
+            st.session_state[page_key] = num_pages
+        page = st.number_input(f"Page (1-{num_pages})", min_value=1, max_value=num_pages, key=page_key)
+    
+    page_tasks, _ = paginate(tasks, page)
+    if num_pages > 1:
+        first = (page - 1) * TASK_LIST_PAGE_SIZE + 1
+        st.caption(f"Showing {first}-{first + len(page_tasks) - 1} of {len(tasks)} tasks")
+    st.markdown(render_task_list(page_tasks), unsafe_allow_html=True)
+    return page_tasks
+
 def check_and_show_reminders():
     """Check for upcoming deadlines and show reminders"""
     if not st.session_state.show_reminders:
         return
     
+    REMINDER_SWEEPS.inc()
     reminders = get_tasks_needing_reminder(st.session_state.user_id)
     
     if reminders:
@@ -200,12 +259,14 @@ def login_page():
                 st.error("❌ Username and password are required")
             else:
                 success, user = login_user(username, password)
+                LOGINS.inc('success' if success else 'failure')
                 if success:
                     st.session_state.logged_in = True
                     st.session_state.user_id = user['user_id']
                     st.session_state.username = user['username']
                     st.session_state.email = user['email']
                     st.session_state.page = 'dashboard'
+                    start_session()
                     st.success(f"✅ Welcome back, {user['username']}!")
                     st.rerun()
                 else:
@@ -301,8 +362,7 @@ def dashboard_page():
     """, unsafe_allow_html=True)
     
     # Metrics
-    tasks = get_user_tasks(st.session_state.user_id)
-    group_tasks = get_all_user_group_tasks(st.session_state.user_id)
+    tasks, group_tasks = load_workload(st.session_state.user_id)
     groups = get_user_groups(st.session_state.user_id)
     
     col1, col2, col3, col4 = st.columns(4)
@@ -324,7 +384,7 @@ def dashboard_page():
     
     with col1:
         st.markdown("### 🚨 Deadline Collisions")
-        collisions = detect_deadline_collisions(st.session_state.user_id)
+        collisions = find_deadline_collisions(tasks + group_tasks)
         
         if collisions:
             for deadline, tasks_list in collisions.items():
@@ -337,7 +397,7 @@ def dashboard_page():
     
     with col2:
         st.markdown("### 🔥 Burnout Risk")
-        risk_level, score, total, due_week, hours = calculate_burnout_risk(st.session_state.user_id)
+        risk_level, score, total, due_week, hours = burnout_risk_from_tasks(tasks + group_tasks)
         
         risk_colors = {"Low": "#10b981", "Medium": "#f59e0b", "High": "#ef4444"}
         risk_icons = {"Low": "🟢", "Medium": "🟡", "High": "🔴"}
@@ -451,13 +511,11 @@ def individual_tasks_page():
             st.subheader(f"Active Tasks: {len(pending_tasks)}")
             
             # Filter options
-            col1, col2, col3 = st.columns(3)
+            col1, col2 = st.columns(2)
             with col1:
                 filter_priority = st.selectbox("Filter by Priority", ["All", "Low", "Medium", "High"], key="filter_active")
             with col2:
                 sort_by = st.selectbox("Sort by", ["Deadline", "Priority", "Hours"], key="sort_active")
-            with col3:
-                view_mode = st.selectbox("View", ["Detailed", "Compact"], key="view_active")
             
             # Apply filters
             filtered_tasks = pending_tasks
@@ -473,97 +531,80 @@ def individual_tasks_page():
             elif sort_by == "Hours":
                 filtered_tasks = sorted(filtered_tasks, key=lambda x: x['estimated_hours'], reverse=True)
             
+            # Bulk actions
+            with st.expander("☑️ Bulk Actions"):
+                task_by_id = {t['task_id']: t for t in filtered_tasks}
+                selected_ids = st.multiselect(
+                    "Select tasks",
+                    list(task_by_id.keys()),
+                    format_func=lambda task_id: task_label(task_by_id[task_id]),
+                    key="bulk_active"
+                )
+                
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    if st.button("✅ Complete Selected", key="bulk_complete", use_container_width=True, disabled=not selected_ids):
+                        complete_tasks(st.session_state.user_id, selected_ids)
+                        st.rerun()
+                with col2:
+                    if st.button("🗑️ Delete Selected", key="bulk_delete_active", use_container_width=True, disabled=not selected_ids):
+                        delete_tasks(st.session_state.user_id, selected_ids)
+                        st.rerun()
+                with col3:
+                    shift_days = st.number_input("Shift by days", min_value=-365, max_value=365, value=1, key="bulk_shift_days", label_visibility="collapsed")
+                with col4:
+                    if st.button("📅 Reschedule", key="bulk_reschedule", use_container_width=True, disabled=not selected_ids or shift_days == 0):
+                        reschedule_tasks(st.session_state.user_id, selected_ids, shift_days)
+                        st.rerun()
+            
             st.markdown("<br>", unsafe_allow_html=True)
             
-            for task in filtered_tasks:
-                priority_colors = {"Low": "#10b981", "Medium": "#f59e0b", "High": "#ef4444"}
-                priority_icons = {"Low": "🟢", "Medium": "🟡", "High": "🔴"}
+            show_task_list(filtered_tasks, "active_list")
+            
+            # Edit a single task
+            with st.expander("✏️ Edit Task"):
+                edit_by_id = {t['task_id']: t for t in filtered_tasks}
+                edit_id = st.selectbox(
+                    "Task to edit",
+                    list(edit_by_id.keys()),
+                    format_func=lambda task_id: task_label(edit_by_id[task_id]),
+                    key="edit_active_select"
+                )
                 
-                if view_mode == "Compact":
-                    # Compact view
-                    col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
+                if edit_id is not None:
+                    task = edit_by_id[edit_id]
                     
-                    with col1:
-                        st.markdown(f"**{priority_icons[task['priority']]} {task['title']}**")
-                    with col2:
-                        st.write(f"📅 {task['deadline']}")
-                    with col3:
-                        st.write(f"⏱️ {task['estimated_hours']}h")
-                    with col4:
-                        if st.button("✅ Complete", key=f"complete_compact_{task['task_id']}", use_container_width=True):
-                            from tasks import mark_task_completed
-                            mark_task_completed(task['task_id'])
-                            st.success(f"✅ Task '{task['title']}' marked as completed!")
-                            st.rerun()
-                    
-                    st.markdown("---")
-                
-                else:
-                    # Detailed view
-                    with st.expander(f"{priority_icons[task['priority']]} {task['title']} - Due: {task['deadline']}"):
-                        col1, col2 = st.columns([2, 1])
+                    with st.form(f"edit_form_{task['task_id']}", clear_on_submit=False):
+                        new_title = st.text_input("Title", value=task['title'], key=f"title_{task['task_id']}")
                         
+                        col1, col2 = st.columns(2)
                         with col1:
-                            st.markdown(f"""
-                            <div style='background: white; padding: 15px; border-radius: 10px;'>
-                                <p><strong>📅 Deadline:</strong> {task['deadline']}</p>
-                                <p><strong>⏱️ Estimated Hours:</strong> {task['estimated_hours']} hours</p>
-                                <p><strong>🎯 Priority:</strong> <span style='color: {priority_colors[task['priority']]}'>{task['priority']}</span></p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
+                            new_deadline = st.date_input("Deadline", value=task['deadline'], key=f"deadline_{task['task_id']}")
                         with col2:
-                            days_left = (task['deadline'] - datetime.now().date()).days
-                            if days_left < 0:
-                                st.error(f"⚠️ Overdue by {abs(days_left)} days")
-                            elif days_left == 0:
-                                st.warning("⏰ Due TODAY!")
-                            elif days_left <= 3:
-                                st.info(f"📌 {days_left} days left")
-                            else:
-                                st.success(f"✅ {days_left} days left")
-                        
-                        st.markdown("---")
+                            new_hours = st.number_input("Hours", value=task['estimated_hours'], min_value=1, key=f"hours_{task['task_id']}")
                         
-                        # Quick Complete Button
-                        col1, col2 = st.columns(2)
+                        col1, col2, col3 = st.columns(3)
                         with col1:
-                            if st.button(f"✅ Mark as Completed", key=f"complete_{task['task_id']}", use_container_width=True):
-                                from tasks import mark_task_completed
-                                mark_task_completed(task['task_id'])
-                                st.success(f"✅ Task '{task['title']}' completed!")
-                                st.rerun()
-                        
+                            update_btn = st.form_submit_button("💾 Update", use_container_width=True)
                         with col2:
-                            pass
-                        
-                        st.markdown("---")
-                        st.subheader("Edit Task")
-                        
-                        with st.form(f"edit_form_{task['task_id']}", clear_on_submit=False):
-                            new_title = st.text_input("Title", value=task['title'], key=f"title_{task['task_id']}")
-                            
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                new_deadline = st.date_input("Deadline", value=task['deadline'], key=f"deadline_{task['task_id']}")
-                            with col2:
-                                new_hours = st.number_input("Hours", value=task['estimated_hours'], min_value=1, key=f"hours_{task['task_id']}")
-                            
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                update_btn = st.form_submit_button("💾 Update", use_container_width=True)
-                            with col2:
-                                delete_btn = st.form_submit_button("🗑️ Delete", use_container_width=True)
-                        
-                        if update_btn:
-                            update_task(task['task_id'], new_title, new_deadline, new_hours)
-                            st.success("✅ Task updated successfully!")
-                            st.rerun()
-                        
-                        if delete_btn:
-                            delete_task(task['task_id'])
-                            st.success("✅ Task deleted successfully!")
-                            st.rerun()
+                            complete_btn = st.form_submit_button("✅ Mark as Completed", use_container_width=True)
+                        with col3:
+                            delete_btn = st.form_submit_button("🗑️ Delete", use_container_width=True)
+                    
+                    if update_btn:
+                        update_task(st.session_state.user_id, task['task_id'], new_title, new_deadline, new_hours)
+                        st.success("✅ Task updated successfully!")
+                        st.rerun()
+                    
+                    if complete_btn:
+                        mark_task_completed(st.session_state.user_id, task['task_id'])
+                        st.success(f"✅ Task '{task['title']}' completed!")
+                        st.rerun()
+                    
+                    if delete_btn:
+                        delete_task(st.session_state.user_id, task['task_id'])
+                        st.success("✅ Task deleted successfully!")
+                        st.rerun()
     
     with tab3:
         if not completed_tasks:
@@ -586,40 +627,29 @@ def individual_tasks_page():
             
             st.markdown("---")
             
+            # Bulk actions
+            completed_by_id = {t['task_id']: t for t in completed_tasks}
+            selected_ids = st.multiselect(
+                "Select completed tasks",
+                list(completed_by_id.keys()),
+                format_func=lambda task_id: task_label(completed_by_id[task_id]),
+                key="bulk_completed"
+            )
+            
+            col1, col2, col3 = st.columns([2, 1, 1])
+            with col2:
+                if st.button("↩️ Reopen Selected", key="bulk_reopen", use_container_width=True, disabled=not selected_ids):
+                    reopen_tasks(st.session_state.user_id, selected_ids)
+                    st.rerun()
+            with col3:
+                if st.button("🗑️ Delete Selected", key="bulk_delete_completed", use_container_width=True, disabled=not selected_ids):
+                    delete_tasks(st.session_state.user_id, selected_ids)
+                    st.rerun()
+            
+            st.markdown("---")
+            
             # Show completed tasks
-            for task in sorted(completed_tasks, key=lambda x: x['deadline'], reverse=True):
-                priority_icons = {"Low": "🟢", "Medium": "🟡", "High": "🔴"}
-                
-                col1, col2, col3 = st.columns([3, 1, 1])
-                
-                with col1:
-                    st.markdown(f"""
-                    <div style='background: #f0fdf4; padding: 15px; border-radius: 10px; border-left: 4px solid #10b981;'>
-                        <h4 style='margin: 0; color: #065f46;'>✅ {task['title']}</h4>
-                        <p style='margin: 5px 0 0 0; color: #059669;'>
-                            {priority_icons[task['priority']]} {task['priority']} Priority | 
-                            📅 Completed by: {task['deadline']} | 
-                            ⏱️ {task['estimated_hours']}h
-                        </p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col2:
-                    if st.button("↩️ Reopen", key=f"reopen_{task['task_id']}", use_container_width=True):
-                        execute_query(
-                            "UPDATE tasks SET task_status = 'Pending' WHERE task_id = %s",
-                            (task['task_id'],)
-                        )
-                        st.success("Task reopened!")
-                        st.rerun()
-                
-                with col3:
-                    if st.button("🗑️ Delete", key=f"del_completed_{task['task_id']}", use_container_width=True):
-                        delete_task(task['task_id'])
-                        st.success("Task deleted!")
-                        st.rerun()
-                
-                st.markdown("<br>", unsafe_allow_html=True)
+            show_task_list(sorted(completed_tasks, key=lambda x: x['deadline'], reverse=True), "completed_list")
 
 def group_tasks_page():
     show_logo()
@@ -725,204 +755,269 @@ def group_tasks_page():
         if not groups:
             st.info("📭 You haven't joined any groups yet")
         else:
+            st.caption("Open a group to load its members, analytics and tasks")
+            
             for group in groups:
                 is_head = group['member_role'] == 'Head'
                 role_badge = "👑 Head" if is_head else "👤 Member"
-                role_color = "#f59e0b" if is_head else "#3b82f6"
                 
-                with st.expander(f"📁 {group['group_name']} - {role_badge}"):
-                    # Group Header
-                    col1, col2 = st.columns(2)
+                with st.container(border=True):
+                    is_open = st.toggle(
+                        f"📁 {group['group_name']} - {role_badge}",
+                        key=f"group_open_{group['group_id']}"
+                    )
                     
-                    with col1:
-                        st.markdown(f"""
-                        <div style='background: white; padding: 15px; border-radius: 10px;'>
-                            <p><strong>👤 Created by:</strong> {group['creator_name']}</p>
-                            <p><strong>🎯 Your Role:</strong> <span style='color: {role_color}; font-weight: bold;'>{role_badge}</span></p>
-                        </div>
-                        """, unsafe_allow_html=True)
+                    # Only opened groups are queried and rendered
+                    if is_open:
+                        group_details_fragment(group)
+
+@st.fragment
+def group_details_fragment(group):
+    """Render one group's details.
+
+    Runs as a fragment, so actions inside it rerun only this group
+    instead of the whole page. It is subscribed to the group's live
+    updates, so other members' changes rerun it without a refresh.
+    """
+    # A section of the page's QueryLog, so per-group queries aren't
+    # mistaken for an N+1 across groups
+    record_activity(st.session_state.user_id)
+    with record_queries(f"group {group['group_id']}"):
+        render_group_details(group)
+
+def render_group_details(group):
+    subscribe(group['group_id'])
+    
+    is_head = group['member_role'] == 'Head'
+    role_badge = "👑 Head" if is_head else "👤 Member"
+    role_color = "#f59e0b" if is_head else "#3b82f6"
+    
+    # Group Header
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown(f"""
+        <div style='background: white; padding: 15px; border-radius: 10px;'>
+            <p><strong>👤 Created by:</strong> {group['creator_name']}</p>
+            <p><strong>🎯 Your Role:</strong> <span style='color: {role_color}; font-weight: bold;'>{role_badge}</span></p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown(f"""
+        <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                    padding: 15px; border-radius: 10px; color: white; text-align: center;'>
+            <p style='margin: 0; font-size: 12px;'>Invite Code</p>
+            <h3 style='color: white; margin: 5px 0; letter-spacing: 3px; border: none;'>{group['invite_code']}</h3>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    # Members
+    members = get_group_members(group['group_id'])
+    st.markdown("---")
+    st.subheader(f"👥 Members ({len(members)})")
+    
+    cols = st.columns(min(len(members), 4))
+    for idx, member in enumerate(members):
+        with cols[idx % 4]:
+            role_emoji = "👑" if member['member_role'] == 'Head' else "👤"
+            st.markdown(f"""
+            <div style='background: #f8f9fa; padding: 10px; border-radius: 8px; text-align: center; margin: 5px 0;'>
+                <div style='font-size: 24px;'>{role_emoji}</div>
+                <div style='font-weight: bold; color: #1e3a8a;'>{member['username']}</div>
+                <div style='font-size: 12px; color: #64748b;'>{member['member_role']}</div>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    # Group Analytics
+    st.markdown("---")
+    st.subheader("📊 Group Analytics")
+    
+    # Loaded once for both the analytics and the task list below
+    group_tasks = get_group_tasks(group['group_id'])
+    analytics = summarize_group_tasks(group_tasks)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Tasks", analytics['total_tasks'])
+    with col2:
+        st.metric("Completed", analytics['completed_tasks'])
+    with col3:
+        st.metric("In Progress", analytics['in_progress_tasks'])
+    with col4:
+        st.metric("Pending", analytics['pending_tasks'])
+    
+    # Progress bar
+    if analytics['total_tasks'] > 0:
+        st.markdown(create_progress_bar(analytics['completed_tasks'], analytics['total_tasks']), unsafe_allow_html=True)
+    
+    # Add Task (Head Only)
+    st.markdown("---")
+    
+    if is_head:
+        st.subheader("➕ Add Group Task (Head Only)")
+        
+        with st.form(f"add_group_task_{group['group_id']}", clear_on_submit=True):
+            task_title = st.text_input("📝 Task Title", key=f"gtask_title_{group['group_id']}")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                task_deadline = st.date_input("📅 Deadline", min_value=datetime.now().date(), key=f"gtask_deadline_{group['group_id']}")
+            with col2:
+                task_hours = st.number_input("⏱️ Estimated Hours", min_value=1, value=2, key=f"gtask_hours_{group['group_id']}")
+            
+            member_options = {f"{m['username']} ({m['member_role']})": m['user_id'] for m in members}
+            member_options = {"Unassigned": None, **member_options}
+            
+            assigned_member = st.selectbox("👤 Assign To", list(member_options.keys()), key=f"gtask_assign_{group['group_id']}")
+            
+            add_btn = st.form_submit_button("➕ Add Task", use_container_width=True)
+        
+        if add_btn:
+            if not task_title:
+                st.error("❌ Task title is required")
+            else:
+                assigned_id = member_options[assigned_member]
+                
+                task_id = add_group_task(
+                    group['group_id'],
+                    task_title,
+                    task_deadline,
+                    task_hours,
+                    assigned_id
+                )
+                
+                if task_id:
+                    publish(group['group_id'])
+                    st.success("✅ Group task added successfully!")
+                    st.rerun(scope="fragment")
+    else:
+        st.info("ℹ️ Only the Group Head can add tasks")
+    
+    # Group Tasks List
+    st.markdown("---")
+    st.subheader("📋 Group Tasks")
+    
+    if not group_tasks:
+        st.info("📭 No tasks in this group yet")
+    else:
+        page_tasks = show_task_list(group_tasks, f"group_list_{group['group_id']}")
+        
+        # Status of each task on the shown page, so any member can update
+        # one task without the bulk controls
+        statuses = ["Pending", "In Progress", "Completed"]
+        with st.expander("🔄 Update Status"):
+            for task in page_tasks:
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    new_status = st.selectbox(
+                        task_label(task),
+                        statuses,
+                        index=statuses.index(task['task_status']),
+                        key=f"status_{task['group_task_id']}"
+                    )
+                with col2:
+                    st.markdown("<br>", unsafe_allow_html=True)
+                    if st.button("💾 Save", key=f"save_status_{task['group_task_id']}", use_container_width=True,
+                                 disabled=new_status == task['task_status']):
+                        update_group_task_status(group['group_id'], task['group_task_id'], new_status)
+                        publish(group['group_id'])
+                        st.success("✅ Status updated!")
+                        st.rerun(scope="fragment")
+        
+        # Bulk actions
+        group_task_by_id = {t['group_task_id']: t for t in group_tasks}
+        selected_ids = st.multiselect(
+            "Select tasks",
+            list(group_task_by_id.keys()),
+            format_func=lambda task_id: task_label(group_task_by_id[task_id]),
+            key=f"bulk_group_{group['group_id']}"
+        )
+        
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            bulk_status = st.selectbox(
+                "Set status",
+                ["Pending", "In Progress", "Completed"],
+                key=f"bulk_status_{group['group_id']}"
+            )
+        with col2:
+            st.markdown("<br>", unsafe_allow_html=True)
+            if st.button("💾 Apply", key=f"bulk_apply_{group['group_id']}", use_container_width=True, disabled=not selected_ids):
+                update_group_tasks_status(group['group_id'], selected_ids, bulk_status)
+                publish(group['group_id'])
+                st.rerun(scope="fragment")
+        
+        if is_head:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                if st.button("🗑️ Delete Selected", key=f"bulk_delete_{group['group_id']}", use_container_width=True, disabled=not selected_ids):
+                    delete_group_tasks(group['group_id'], selected_ids)
+                    publish(group['group_id'])
+                    st.rerun(scope="fragment")
+            with col2:
+                group_shift_days = st.number_input("Shift by days", min_value=-365, max_value=365, value=1, key=f"bulk_shift_{group['group_id']}", label_visibility="collapsed")
+            with col3:
+                if st.button("📅 Reschedule", key=f"bulk_reschedule_{group['group_id']}", use_container_width=True, disabled=not selected_ids or group_shift_days == 0):
+                    reschedule_group_tasks(group['group_id'], selected_ids, group_shift_days)
+                    publish(group['group_id'])
+                    st.rerun(scope="fragment")
+        
+        # Head Actions
+        if is_head:
+            with st.expander("⚙️ Head Actions"):
+                edit_id = st.selectbox(
+                    "Task to edit",
+                    list(group_task_by_id.keys()),
+                    format_func=lambda task_id: task_label(group_task_by_id[task_id]),
+                    key=f"edit_group_select_{group['group_id']}"
+                )
+                task = group_task_by_id[edit_id]
+                
+                with st.form(f"edit_task_{task['group_task_id']}", clear_on_submit=False):
+                    edit_title = st.text_input("Title", value=task['title'], key=f"edit_title_{task['group_task_id']}")
                     
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        edit_deadline = st.date_input("Deadline", value=task['deadline'], key=f"edit_deadline_{task['group_task_id']}")
                     with col2:
-                        st.markdown(f"""
-                        <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                                    padding: 15px; border-radius: 10px; color: white; text-align: center;'>
-                            <p style='margin: 0; font-size: 12px;'>Invite Code</p>
-                            <h3 style='color: white; margin: 5px 0; letter-spacing: 3px; border: none;'>{group['invite_code']}</h3>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-                    # Members
-                    members = get_group_members(group['group_id'])
-                    st.markdown("---")
-                    st.subheader(f"👥 Members ({len(members)})")
+                        edit_hours = st.number_input("Hours", value=task['estimated_hours'], min_value=1, key=f"edit_hours_{task['group_task_id']}")
                     
-                    cols = st.columns(min(len(members), 4))
-                    for idx, member in enumerate(members):
-                        with cols[idx % 4]:
-                            role_emoji = "👑" if member['member_role'] == 'Head' else "👤"
-                            st.markdown(f"""
-                            <div style='background: #f8f9fa; padding: 10px; border-radius: 8px; text-align: center; margin: 5px 0;'>
-                                <div style='font-size: 24px;'>{role_emoji}</div>
-                                <div style='font-weight: bold; color: #1e3a8a;'>{member['username']}</div>
-                                <div style='font-size: 12px; color: #64748b;'>{member['member_role']}</div>
-                            </div>
-                            """, unsafe_allow_html=True)
+                    member_options = {f"{m['username']} ({m['member_role']})": m['user_id'] for m in members}
+                    member_options = {"Unassigned": None, **member_options}
                     
-                    # Group Analytics
-                    st.markdown("---")
-                    st.subheader("📊 Group Analytics")
+                    current_assigned = "Unassigned"
+                    if task['assigned_to']:
+                        for key, val in member_options.items():
+                            if val == task['assigned_to']:
+                                current_assigned = key
+                                break
                     
-                    analytics = get_group_analytics(group['group_id'])
+                    edit_assigned = st.selectbox(
+                        "Reassign To",
+                        list(member_options.keys()),
+                        index=list(member_options.keys()).index(current_assigned),
+                        key=f"edit_assign_{task['group_task_id']}"
+                    )
                     
-                    col1, col2, col3, col4 = st.columns(4)
+                    col1, col2 = st.columns(2)
                     with col1:
-                        st.metric("Total Tasks", analytics['total_tasks'])
+                        update_btn = st.form_submit_button("💾 Update", use_container_width=True)
                     with col2:
-                        st.metric("Completed", analytics['completed_tasks'])
-                    with col3:
-                        st.metric("In Progress", analytics['in_progress_tasks'])
-                    with col4:
-                        st.metric("Pending", analytics['pending_tasks'])
-                    
-                    # Progress bar
-                    if analytics['total_tasks'] > 0:
-                        st.markdown(create_progress_bar(analytics['completed_tasks'], analytics['total_tasks']), unsafe_allow_html=True)
-                    
-                    # Add Task (Head Only)
-                    st.markdown("---")
-                    
-                    if is_head:
-                        st.subheader("➕ Add Group Task (Head Only)")
-                        
-                        with st.form(f"add_group_task_{group['group_id']}", clear_on_submit=True):
-                            task_title = st.text_input("📝 Task Title", key=f"gtask_title_{group['group_id']}")
-                            
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                task_deadline = st.date_input("📅 Deadline", min_value=datetime.now().date(), key=f"gtask_deadline_{group['group_id']}")
-                            with col2:
-                                task_hours = st.number_input("⏱️ Estimated Hours", min_value=1, value=2, key=f"gtask_hours_{group['group_id']}")
-                            
-                            member_options = {f"{m['username']} ({m['member_role']})": m['user_id'] for m in members}
-                            member_options = {"Unassigned": None, **member_options}
-                            
-                            assigned_member = st.selectbox("👤 Assign To", list(member_options.keys()), key=f"gtask_assign_{group['group_id']}")
-                            
-                            add_btn = st.form_submit_button("➕ Add Task", use_container_width=True)
-                        
-                        if add_btn:
-                            if not task_title:
-                                st.error("❌ Task title is required")
-                            else:
-                                assigned_id = member_options[assigned_member]
-                                
-                                task_id = add_group_task(
-                                    group['group_id'],
-                                    task_title,
-                                    task_deadline,
-                                    task_hours,
-                                    assigned_id
-                                )
-                                
-                                if task_id:
-                                    st.success("✅ Group task added successfully!")
-                                    st.rerun()
-                    else:
-                        st.info("ℹ️ Only the Group Head can add tasks")
-                    
-                    # Group Tasks List
-                    st.markdown("---")
-                    st.subheader("📋 Group Tasks")
-                    
-                    group_tasks = get_group_tasks(group['group_id'])
-                    
-                    if not group_tasks:
-                        st.info("📭 No tasks in this group yet")
-                    else:
-                        for idx, task in enumerate(group_tasks):
-                            status_colors = {"Pending": "#64748b", "In Progress": "#f59e0b", "Completed": "#10b981"}
-                            status_icons = {"Pending": "⏳", "In Progress": "🔄", "Completed": "✅"}
-                            
-                            st.markdown(f"""
-                            <div style='background: white; padding: 20px; border-radius: 12px; margin: 10px 0; 
-                                        border-left: 5px solid {status_colors[task['task_status']]}; box-shadow: 0 2px 8px rgba(0,0,0,0.1);'>
-                                <h4 style='margin: 0; color: #1e3a8a;'>{status_icons[task['task_status']]} {task['title']}</h4>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            col1, col2 = st.columns([2, 1])
-                            
-                            with col1:
-                                st.markdown(f"""
-                                <div style='padding: 10px;'>
-                                    <p><strong>📅 Due:</strong> {task['deadline']}</p>
-                                    <p><strong>⏱️ Hours:</strong> {task['estimated_hours']}h</p>
-                                    <p><strong>🎯 Priority:</strong> {task['priority']}</p>
-                                    <p><strong>👤 Assigned to:</strong> {task['assigned_name'] if task['assigned_name'] else 'Unassigned'}</p>
-                                </div>
-                                """, unsafe_allow_html=True)
-                            
-                            with col2:
-                                new_status = st.selectbox(
-                                    "Update Status",
-                                    ["Pending", "In Progress", "Completed"],
-                                    index=["Pending", "In Progress", "Completed"].index(task['task_status']),
-                                    key=f"status_{task['group_task_id']}"
-                                )
-                                
-                                if new_status != task['task_status']:
-                                    if st.button(f"💾 Save", key=f"save_status_{task['group_task_id']}", use_container_width=True):
-                                        update_group_task_status(task['group_task_id'], new_status)
-                                        st.success("✅ Status updated!")
-                                        st.rerun()
-                            
-                            # Head Actions
-                            if is_head:
-                                with st.expander("⚙️ Head Actions"):
-                                    with st.form(f"edit_task_{task['group_task_id']}", clear_on_submit=False):
-                                        edit_title = st.text_input("Title", value=task['title'], key=f"edit_title_{task['group_task_id']}")
-                                        
-                                        col1, col2 = st.columns(2)
-                                        with col1:
-                                            edit_deadline = st.date_input("Deadline", value=task['deadline'], key=f"edit_deadline_{task['group_task_id']}")
-                                        with col2:
-                                            edit_hours = st.number_input("Hours", value=task['estimated_hours'], min_value=1, key=f"edit_hours_{task['group_task_id']}")
-                                        
-                                        member_options = {f"{m['username']} ({m['member_role']})": m['user_id'] for m in members}
-                                        member_options = {"Unassigned": None, **member_options}
-                                        
-                                        current_assigned = "Unassigned"
-                                        if task['assigned_to']:
-                                            for key, val in member_options.items():
-                                                if val == task['assigned_to']:
-                                                    current_assigned = key
-                                                    break
-                                        
-                                        edit_assigned = st.selectbox(
-                                            "Reassign To",
-                                            list(member_options.keys()),
-                                            index=list(member_options.keys()).index(current_assigned),
-                                            key=f"edit_assign_{task['group_task_id']}"
-                                        )
-                                        
-                                        col1, col2 = st.columns(2)
-                                        with col1:
-                                            update_btn = st.form_submit_button("💾 Update", use_container_width=True)
-                                        with col2:
-                                            delete_btn = st.form_submit_button("🗑️ Delete", use_container_width=True)
-                                    
-                                    if update_btn:
-                                        assigned_id = member_options[edit_assigned]
-                                        update_group_task(task['group_task_id'], edit_title, edit_deadline, edit_hours, assigned_id)
-                                        st.success("✅ Task updated!")
-                                        st.rerun()
-                                    
-                                    if delete_btn:
-                                        delete_group_task(task['group_task_id'])
-                                        st.success("✅ Task deleted!")
-                                        st.rerun()
-                            
-                            st.markdown("<br>", unsafe_allow_html=True)
+                        delete_btn = st.form_submit_button("🗑️ Delete", use_container_width=True)
+                
+                if update_btn:
+                    assigned_id = member_options[edit_assigned]
+                    update_group_task(group['group_id'], task['group_task_id'], edit_title, edit_deadline, edit_hours, assigned_id)
+                    publish(group['group_id'])
+                    st.success("✅ Task updated!")
+                    st.rerun(scope="fragment")
+                
+                if delete_btn:
+                    delete_group_task(group['group_id'], task['group_task_id'])
+                    publish(group['group_id'])
+                    st.success("✅ Task deleted!")
+                    st.rerun(scope="fragment")
 
 def calendar_page():
     show_logo()
@@ -930,8 +1025,7 @@ def calendar_page():
     st.title("📅 Calendar View")
     st.markdown("---")
     
-    tasks = get_user_tasks(st.session_state.user_id)
-    group_tasks = get_all_user_group_tasks(st.session_state.user_id)
+    tasks, group_tasks = load_workload(st.session_state.user_id)
     all_tasks = tasks + group_tasks
     
     if not all_tasks:
@@ -995,36 +1089,7 @@ def calendar_page():
         
         # Sort by deadline
         sorted_tasks = sorted(all_tasks, key=lambda x: x['deadline'])
-        
-        for task in sorted_tasks:
-            task_type = "Group" if 'group_name' in task else "Individual"
-            days_left = (task['deadline'] - datetime.now().date()).days
-            
-            if days_left < 0:
-                urgency = "🔴 Overdue"
-                bg_color = "#fee2e2"
-            elif days_left == 0:
-                urgency = "🟠 Due Today"
-                bg_color = "#fef3c7"
-            elif days_left <= 3:
-                urgency = f"🟡 {days_left} days left"
-                bg_color = "#fef3c7"
-            else:
-                urgency = f"🟢 {days_left} days left"
-                bg_color = "white"
-            
-            st.markdown(f"""
-            <div style='background: {bg_color}; padding: 15px; border-radius: 10px; margin: 10px 0; border-left: 4px solid #3b82f6;'>
-                <h4 style='margin: 0; color: #1e3a8a;'>{task['title']}</h4>
-                <p style='margin: 5px 0;'>
-                    <strong>Type:</strong> {task_type} | 
-                    <strong>Due:</strong> {task['deadline']} | 
-                    <strong>Priority:</strong> {task['priority']} | 
-                    <strong>Hours:</strong> {task['estimated_hours']}h
-                </p>
-                <p style='margin: 0; font-weight: bold;'>{urgency}</p>
-            </div>
-            """, unsafe_allow_html=True)
+        show_task_list(sorted_tasks, "calendar_list")
 
 def reports_page():
     show_logo()
@@ -1032,8 +1097,14 @@ def reports_page():
     st.title("📊 Reports & Analytics")
     st.markdown("---")
     
-    tasks = get_user_tasks(st.session_state.user_id)
-    group_tasks = get_all_user_group_tasks(st.session_state.user_id)
+    include_archived = st.checkbox("🗄️ Include archived tasks", value=False,
+                                   help="Also report on completed tasks from past terms")
+    
+    if include_archived:
+        tasks = get_user_tasks(st.session_state.user_id, include_archived=True)
+        group_tasks = get_all_user_group_tasks(st.session_state.user_id, include_archived=True)
+    else:
+        tasks, group_tasks = load_workload(st.session_state.user_id)
     all_tasks = tasks + group_tasks
     
     # Export buttons
@@ -1155,19 +1226,7 @@ def reports_page():
         
         st.markdown("<br>", unsafe_allow_html=True)
         
-        for task in sorted(period_tasks, key=lambda x: x['deadline']):
-            task_type = "Group" if 'group_name' in task else "Individual"
-            status = task.get('task_status', 'Pending')
-            status_color = {"Pending": "#64748b", "In Progress": "#f59e0b", "Completed": "#10b981"}
-            
-            st.markdown(f"""
-            <div style='background: white; padding: 15px; border-radius: 10px; margin: 10px 0; border-left: 4px solid {status_color[status]};'>
-                <h4 style='margin: 0; color: #1e3a8a;'>{task['title']}</h4>
-                <p style='margin: 5px 0; color: #64748b;'>
-                    {task_type} | Due: {task['deadline']} | {task['priority']} Priority | {task['estimated_hours']}h | Status: {status}
-                </p>
-            </div>
-            """, unsafe_allow_html=True)
+        show_task_list(sorted(period_tasks, key=lambda x: x['deadline']), "period_list")
     else:
         st.info("📭 No tasks in selected period")
 
@@ -1177,7 +1236,8 @@ def burnout_page():
     st.title("🔥 Burnout Risk Analysis")
     st.markdown("---")
     
-    risk_level, score, total_tasks, tasks_due, total_hours = calculate_burnout_risk(st.session_state.user_id)
+    tasks, group_tasks = load_workload(st.session_state.user_id)
+    risk_level, score, total_tasks, tasks_due, total_hours = burnout_risk_from_tasks(tasks + group_tasks)
     
     risk_colors = {"Low": "#10b981", "Medium": "#f59e0b", "High": "#ef4444"}
     risk_icons = {"Low": "🟢", "Medium": "🟡", "High": "🔴"}
@@ -1219,9 +1279,6 @@ def burnout_page():
     # Task Distribution
     st.subheader("📊 Workload Distribution")
     
-    tasks = get_user_tasks(st.session_state.user_id)
-    group_tasks = get_all_user_group_tasks(st.session_state.user_id)
-    
     col1, col2 = st.columns(2)
     
     with col1:
@@ -1270,17 +1327,59 @@ def burnout_page():
             </div>
             """, unsafe_allow_html=True)
 
+PUBLIC_PAGES = {
+    'welcome': welcome_page,
+    'register': register_page,
+    'login': login_page,
+    'reset_password': reset_password_page,
+}
+
+APP_PAGES = {
+    'dashboard': dashboard_page,
+    'individual_tasks': individual_tasks_page,
+    'group_tasks': group_tasks_page,
+    'calendar': calendar_page,
+    'reports': reports_page,
+    'burnout': burnout_page,
+}
+
+# Read-mostly pages whose reads may be served by a replica (see DB_REPLICAS)
+REPLICA_PAGES = {'calendar', 'reports', 'burnout'}
+
+# Seconds a page's reads may take in total before the rest are cancelled
+# and the page renders what it has (see db.time_budget)
+PAGE_TIME_BUDGETS = {
+    'reports': 15,
+    'group_tasks': 10,
+}
+DEFAULT_PAGE_TIME_BUDGET = 8
+
+def render_page(name, page):
+    """Render one page, recording the queries it runs"""
+    profiling = st.session_state.get('profile_pages', False) and is_admin(st.session_state.username)
+    notice = st.empty()
+    with record_queries(name) as log, span(f"page {name}", page=name), PAGE_SECONDS.time(name):
+        with time_budget(PAGE_TIME_BUDGETS.get(name, DEFAULT_PAGE_TIME_BUDGET)) as budget:
+            with replica_reads(name in REPLICA_PAGES), profile_page(name, log, profiling) as profile:
+                page()
+    if budget['exceeded']:
+        notice.warning("⏳ Some data took too long to load, so this page may be incomplete. Refresh to try again.")
+    st.session_state.last_query_log = log
+    if profile:
+        show_profile(profile)
+
 def main():
+    RERUNS.inc()
+    trace_run()
+    # Group fragments still on the page subscribe again as they render
+    unsubscribe_session()
+    
     if not st.session_state.logged_in:
-        if st.session_state.page == 'register':
-            register_page()
-        elif st.session_state.page == 'login':
-            login_page()
-        elif st.session_state.page == 'reset_password':
-            reset_password_page()
-        else:
-            welcome_page()
+        name = st.session_state.page if st.session_state.page in PUBLIC_PAGES else 'welcome'
+        render_page(name, PUBLIC_PAGES[name])
     else:
+        record_activity(st.session_state.user_id)
+        
         # Sidebar
         with st.sidebar:
             st.markdown(f"""
@@ -1317,10 +1416,13 @@ def main():
             st.markdown("### ⚙️ Settings")
             
             st.session_state.show_reminders = st.checkbox("🔔 Show Reminders", value=st.session_state.show_reminders)
+            if is_admin(st.session_state.username):
+                st.checkbox("🧪 Profile pages", key='profile_pages')
             
             st.markdown("---")
             
             if st.button("🚪 Logout", use_container_width=True):
+                end_session()
                 logout_user()
                 st.rerun()
             
@@ -1333,20 +1435,10 @@ def main():
             """, unsafe_allow_html=True)
         
         # Main content
-        if st.session_state.page == 'dashboard':
-            dashboard_page()
-        elif st.session_state.page == 'individual_tasks':
-            individual_tasks_page()
-        elif st.session_state.page == 'group_tasks':
-            group_tasks_page()
-        elif st.session_state.page == 'calendar':
-            calendar_page()
-        elif st.session_state.page == 'reports':
-            reports_page()
-        elif st.session_state.page == 'burnout':
-            burnout_page()
-        else:
-            dashboard_page()
+        name = st.session_state.page if st.session_state.page in APP_PAGES else 'dashboard'
+        render_page(name, APP_PAGES[name])
+    
+    save_session()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,164 @@
+"""Move completed tasks older than a cutoff into the archive tables.
+
+Keeps tasks and group_tasks proportional to the current workload. Rows are
+moved in batches, shard by shard; each batch is copied and deleted in one
+transaction so a task is never in both tiers or in neither. Every column
+is kept. If a batch fails the run stops and exits non-zero.
+
+It also removes task rows left behind by deleted users and groups. The task
+tables lost their cascading foreign keys when they were partitioned
+(migration 004), and rows on other shards could never have had them.
+
+    python archive.py              # archive tasks completed before 180 days ago
+    python archive.py --days 365
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from db import SHARDS, execute_query, execute_transaction, placeholders
+from tasks import group_version_bumps, users_version_bump
+
+ARCHIVE_AFTER_DAYS = 180
+BATCH_SIZE = 1000
+
+
+def _archive_batches(shard, select_rows, copy_rows, delete_rows, version_bumps, cutoff, batch_size):
+    """Move batches of (id, owner id) rows on one shard; bump the owners on the global shard"""
+    moved = 0
+    while True:
+        rows = execute_query(select_rows, (cutoff, batch_size), fetch=True, shard=shard)
+        if rows is None:
+            raise RuntimeError(f"reading completed tasks on shard {shard} failed after {moved} rows")
+        if not rows:
+            return moved
+        ids = [row['id'] for row in rows]
+        in_list = placeholders(ids)
+        # Copy and delete re-check the filter, so a task reopened since the
+        # SELECT stays where it is
+        params = tuple(ids) + (cutoff,)
+        result = execute_transaction([
+            (copy_rows.format(ids=in_list), params),
+            (delete_rows.format(ids=in_list), params),
+        ], shard=shard)
+        if result is None:
+            raise RuntimeError(f"archiving a batch on shard {shard} failed after {moved} rows")
+        moved += result[-1]
+        if execute_transaction(version_bumps(sorted({row['owner_id'] for row in rows}))) is None:
+            raise RuntimeError(f"bumping workload versions after archiving on shard {shard} failed")
+
+
+def archive_tasks(cutoff, batch_size=BATCH_SIZE):
+    """Archive completed individual tasks with a deadline before cutoff, on every shard"""
+    return sum(_archive_batches(
+        shard,
+        "SELECT task_id AS id, user_id AS owner_id FROM tasks WHERE task_status = 'Completed' AND deadline < %s ORDER BY task_id LIMIT %s",
+        """
+            INSERT INTO tasks_archive (task_id, user_id, title, deadline, estimated_hours, priority, task_status,
+                                       reminder_sent, google_event_id, created_at)
+            SELECT task_id, user_id, title, deadline, estimated_hours, priority, task_status,
+                   reminder_sent, google_event_id, created_at
+            FROM tasks WHERE task_id IN ({ids}) AND task_status = 'Completed' AND deadline < %s
+        """,
+        "DELETE FROM tasks WHERE task_id IN ({ids}) AND task_status = 'Completed' AND deadline < %s",
+        lambda user_ids: [users_version_bump(user_ids)],
+        cutoff,
+        batch_size
+    ) for shard in range(len(SHARDS)))
+
+
+def archive_group_tasks(cutoff, batch_size=BATCH_SIZE):
+    """Archive completed group tasks with a deadline before cutoff, on every shard"""
+    return sum(_archive_batches(
+        shard,
+        "SELECT group_task_id AS id, group_id AS owner_id FROM group_tasks WHERE task_status = 'Completed' AND deadline < %s ORDER BY group_task_id LIMIT %s",
+        """
+            INSERT INTO group_tasks_archive (group_task_id, group_id, title, deadline, estimated_hours, priority, task_status,
+                                             assigned_to, reminder_sent, google_event_id, created_at)
+            SELECT group_task_id, group_id, title, deadline, estimated_hours, priority, task_status,
+                   assigned_to, reminder_sent, google_event_id, created_at
+            FROM group_tasks WHERE group_task_id IN ({ids}) AND task_status = 'Completed' AND deadline < %s
+        """,
+        "DELETE FROM group_tasks WHERE group_task_id IN ({ids}) AND task_status = 'Completed' AND deadline < %s",
+        lambda group_ids: [bump for group_id in group_ids for bump in group_version_bumps(group_id)],
+        cutoff,
+        batch_size
+    ) for shard in range(len(SHARDS)))
+
+
+# (table, column, owning table, action): rows whose owner no longer exists
+# are deleted, or unassigned for a deleted assignee
+ORPHAN_CHECKS = [
+    ('tasks', 'user_id', 'users', 'delete'),
+    ('tasks_archive', 'user_id', 'users', 'delete'),
+    ('group_tasks', 'group_id', 'student_groups', 'delete'),
+    ('group_tasks_archive', 'group_id', 'student_groups', 'delete'),
+    ('group_tasks', 'assigned_to', 'users', 'unassign'),
+    ('group_tasks_archive', 'assigned_to', 'users', 'unassign'),
+]
+
+
+def _missing_owners(owner_table, ids):
+    """The ids with no row in owner_table on the global shard"""
+    key = 'user_id' if owner_table == 'users' else 'group_id'
+    rows = execute_query(
+        f"SELECT {key} FROM {owner_table} WHERE {key} IN ({placeholders(ids)})", tuple(ids), fetch=True
+    )
+    if rows is None:
+        raise RuntimeError(f"could not read {owner_table}")
+    existing = {row[key] for row in rows}
+    return [owner_id for owner_id in ids if owner_id not in existing]
+
+
+def purge_orphans(batch_size=BATCH_SIZE):
+    """Delete or unassign task rows whose user or group is gone, on every shard; return the count"""
+    purged = 0
+    for shard in range(len(SHARDS)):
+        for table, column, owner_table, action in ORPHAN_CHECKS:
+            rows = execute_query(
+                f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL", fetch=True, shard=shard
+            )
+            if rows is None:
+                raise RuntimeError(f"could not read {table} on shard {shard}")
+            ids = [row[column] for row in rows]
+            for start in range(0, len(ids), batch_size):
+                missing = _missing_owners(owner_table, ids[start:start + batch_size])
+                if not missing:
+                    continue
+                if action == 'delete':
+                    statement = f"DELETE FROM {table} WHERE {column} IN ({placeholders(missing)})"
+                else:
+                    statement = f"UPDATE {table} SET {column} = NULL WHERE {column} IN ({placeholders(missing)})"
+                result = execute_transaction([(statement, tuple(missing))], shard=shard)
+                if result is None:
+                    raise RuntimeError(f"cleaning up {table} on shard {shard} failed")
+                purged += result[0]
+    return purged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old completed tasks")
+    parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS,
+                        help="archive completed tasks whose deadline is older than this many days")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    cutoff = datetime.now().date() - timedelta(days=args.days)
+    try:
+        tasks_moved = archive_tasks(cutoff, args.batch_size)
+        group_tasks_moved = archive_group_tasks(cutoff, args.batch_size)
+    except RuntimeError as e:
+        print(f"Archiving failed: {e}", file=sys.stderr)
+        return 1
+    print(f"Archived {tasks_moved} tasks and {group_tasks_moved} group tasks due before {cutoff}")
+    try:
+        orphans = purge_orphans(args.batch_size)
+    except RuntimeError as e:
+        print(f"Orphan cleanup failed: {e}", file=sys.stderr)
+        return 1
+    print(f"Cleaned up {orphans} task rows of deleted users and groups")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
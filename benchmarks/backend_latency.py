@@ -0,0 +1,104 @@
+"""Compare page latency on the MySQL and SQLite storage backends.
+
+Runs once per backend in a child process (db.py picks DB_BACKEND at import).
+Each child seeds a user with tasks and groups the way query_budget.py does,
+renders every logged-in page --repeat times with Streamlit's AppTest, and
+reports the median render time and the median time spent in the database.
+The SQLite run uses a fresh database file unless --sqlite-path is given.
+
+    python benchmarks/backend_latency.py
+    python benchmarks/backend_latency.py --repeat 20 --output backends.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BACKENDS = ['mysql', 'sqlite']
+PAGES = ['dashboard', 'individual_tasks', 'group_tasks', 'calendar', 'reports', 'burnout']
+
+
+def measure(repeat):
+    """Render each page repeat times on this process's backend; return medians in ms"""
+    from query_budget import cleanup, render, seed
+
+    seeded = seed()
+    user_id = seeded['users'][0]
+    results = {}
+    try:
+        for page in PAGES:
+            open_groups = seeded['groups'] if page == 'group_tasks' else ()
+            # The first render pays for imports and cold caches
+            render(page, user_id, open_groups)
+            totals, db_times = [], []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                log = render(page, user_id, open_groups)
+                totals.append((time.perf_counter() - started) * 1000)
+                db_times.append(log.total_seconds * 1000)
+            results[page] = {'total_ms': statistics.median(totals), 'db_ms': statistics.median(db_times),
+                             'queries': log.count}
+    finally:
+        cleanup(seeded)
+    return results
+
+
+def run_backend(backend, repeat, sqlite_path):
+    env = dict(os.environ, DB_BACKEND=backend)
+    if backend == 'sqlite':
+        env['SQLITE_PATH'] = sqlite_path
+    child = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', '--repeat', str(repeat)],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if child.returncode != 0:
+        raise RuntimeError(f"{backend} run failed:\n{child.stderr.strip()}")
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare page latency across storage backends")
+    parser.add_argument('--repeat', type=int, default=10, help="renders per page, after one warm-up render")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS)
+    parser.add_argument('--sqlite-path', help="SQLite file to use instead of a fresh temporary one")
+    parser.add_argument('--output', help="write the results to a JSON file")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.repeat)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_path = args.sqlite_path or os.path.join(tmp, 'benchmark.db')
+        try:
+            results = {backend: run_backend(backend, args.repeat, sqlite_path) for backend in args.backends}
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 1
+
+    header = f"{'page':16}" + ''.join(f"{backend + ' total':>14}{backend + ' db':>12}" for backend in args.backends)
+    print(header)
+    for page in PAGES:
+        row = f"{page:16}"
+        for backend in args.backends:
+            timing = results[backend][page]
+            row += f"{timing['total_ms']:11.1f} ms{timing['db_ms']:9.1f} ms"
+        print(row)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'repeat': args.repeat, 'results': results}, f, indent=2)
+        print(f"Results saved to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Micro-benchmarks for the core computations, chart builders and exports.
+
+Each case runs against synthetic task rows at every size in SIZES. Wall time
+is the best of --repeat runs; peak memory comes from one extra run under
+tracemalloc, kept separate so tracing overhead does not skew the timing.
+Burnout, collisions and group analytics are measured through their
+database-free halves (burnout_risk_from_tasks, find_deadline_collisions,
+summarize_group_tasks), so no MySQL server is needed.
+
+Results can be written with --output and are compared with a saved
+baseline; the script exits non-zero when a case is slower or uses more
+memory than the baseline by more than --max-regression.
+
+    python benchmarks/core.py                          # check against baseline
+    python benchmarks/core.py --sizes 100 10000        # skip the 1M runs
+    python benchmarks/core.py --update-baseline        # record a new baseline
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from burnout import burnout_risk_from_tasks  # noqa: E402
+from groups import summarize_group_tasks  # noqa: E402
+from tasks import find_deadline_collisions  # noqa: E402
+from utils import (  # noqa: E402
+    create_calendar_view, create_workload_timeline,
+    export_report_to_pdf, export_tasks_to_excel
+)
+from synthetic import generate_tasks  # noqa: E402
+
+BASELINE_FILE = os.path.join(ROOT, 'benchmarks', 'core_baseline.json')
+
+SIZES = [100, 10_000, 1_000_000]
+
+# Timings below this are dominated by noise and are not compared
+MIN_COMPARABLE_SECONDS = 0.001
+
+# A single run slower than this is not repeated
+SLOW_RUN_SECONDS = 5.0
+
+
+def _export_pdf(tasks):
+    burnout_data = burnout_risk_from_tasks(tasks)
+    return export_report_to_pdf("benchmark", tasks, [], burnout_data)
+
+
+def _calendar(tasks):
+    month = tasks[0]['deadline']
+    return create_calendar_view(tasks, month.year, month.month)
+
+
+CASES = {
+    'calculate_burnout_risk': burnout_risk_from_tasks,
+    'detect_deadline_collisions': find_deadline_collisions,
+    'get_group_analytics': summarize_group_tasks,
+    'create_calendar_view': _calendar,
+    'create_workload_timeline': create_workload_timeline,
+    'export_tasks_to_excel': export_tasks_to_excel,
+    'export_report_to_pdf': _export_pdf,
+}
+
+
+def measure(func, tasks, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(tasks)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        if elapsed > SLOW_RUN_SECONDS:
+            break
+
+    tracemalloc.start()
+    try:
+        func(tasks)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak}
+
+
+def compare(results, baseline, max_regression):
+    """Return a message for every case that regressed past the threshold"""
+    regressions = []
+    for name, by_size in results.items():
+        for size, current in by_size.items():
+            previous = baseline.get(name, {}).get(size)
+            if not previous:
+                continue
+            limit = 1 + max_regression
+            if previous['seconds'] >= MIN_COMPARABLE_SECONDS and current['seconds'] > previous['seconds'] * limit:
+                regressions.append(
+                    f"{name} @ {size}: {current['seconds'] * 1000:.1f} ms vs {previous['seconds'] * 1000:.1f} ms"
+                )
+            if current['peak_bytes'] > previous['peak_bytes'] * limit:
+                regressions.append(
+                    f"{name} @ {size}: peak {current['peak_bytes'] / 1e6:.1f} MB vs {previous['peak_bytes'] / 1e6:.1f} MB"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark core computations and exports")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--only', nargs='+', choices=sorted(CASES), help="run only these cases")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-regression', type=float, default=0.20,
+                        help="allowed slowdown or memory growth over the baseline, as a fraction")
+    parser.add_argument('--output', help="also write this run's results to a JSON file")
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    names = args.only or list(CASES)
+    results = {name: {} for name in names}
+    for size in args.sizes:
+        tasks = generate_tasks(size, seed=args.seed)
+        for name in names:
+            result = measure(CASES[name], tasks, args.repeat)
+            results[name][str(size)] = result
+            print(f"{name:28} {size:>9} tasks  {result['seconds'] * 1000:10.2f} ms  peak {result['peak_bytes'] / 1e6:8.2f} MB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    failed = False
+    if args.update_baseline or not baseline:
+        # Merge, so a run over some sizes or cases keeps the others
+        for name, by_size in results.items():
+            baseline.setdefault(name, {}).update(by_size)
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline saved to {BASELINE_FILE}")
+    else:
+        for message in compare(results, baseline, args.max_regression):
+            print(f"FAIL: {message}")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Cold-start import benchmark for the modules the Streamlit entry point loads.
+
+Each sample imports the app's own modules that app.py imports at the top
+level (read from app.py, so new ones are picked up) in a fresh interpreter,
+so nothing is cached in sys.modules. The median is compared with a saved
+baseline and the script exits non-zero when it regresses by more than
+--max-regression, or when the app's modules load one of LAZY_MODULES at
+import time.
+
+Streamlit itself imports plotly (streamlit/elements/plotly_chart.py), so
+the probe imports streamlit first and only counts heavy modules that were
+not already loaded by it. plotly is reported as preloaded rather than
+failing the check; keeping it out of utils.py's top level still matters
+if Streamlit stops loading it.
+
+The baseline is a timing of this machine, so it is kept out of git
+(benchmarks/*_baseline.json is ignored). The first run on a machine
+records it; re-record it with --update-baseline after an intended change.
+
+    python benchmarks/import_time.py                    # check against baseline
+    python benchmarks/import_time.py --update-baseline  # record a new baseline
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(ROOT, 'benchmarks', 'import_baseline.json')
+
+APP_SCRIPT = os.path.join(ROOT, 'app.py')
+
+# Heavy modules that must only be loaded when a chart or export is built
+LAZY_MODULES = ['plotly', 'fpdf', 'openpyxl']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import streamlit
+preloaded = [m for m in {lazy!r} if m in sys.modules]
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+loaded = [m for m in {lazy!r} if m in sys.modules and m not in preloaded]
+print(json.dumps({{'seconds': elapsed, 'eager_heavy_modules': loaded, 'preloaded': preloaded}}))
+"""
+
+
+def app_modules():
+    """The repo's modules that app.py imports at the top level, in import order"""
+    with open(APP_SCRIPT, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            top = name.split('.')[0]
+            if top not in modules and os.path.exists(os.path.join(ROOT, f"{top}.py")):
+                modules.append(top)
+    return modules
+
+
+def sample(modules):
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(modules=modules, lazy=LAZY_MODULES)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time")
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--max-regression', type=float, default=0.20,
+                        help="allowed slowdown over the baseline, as a fraction")
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    modules = app_modules()
+    samples = [sample(modules) for _ in range(args.runs)]
+    median = statistics.median(s['seconds'] for s in samples)
+    eager = sorted({m for s in samples for m in s['eager_heavy_modules']})
+    preloaded = sorted({m for s in samples for m in s['preloaded']})
+    print(f"Cold import of {', '.join(modules)}: median {median * 1000:.1f} ms over {args.runs} runs")
+    if preloaded:
+        print(f"Already loaded by streamlit itself, not checked: {', '.join(preloaded)}")
+
+    failed = False
+    if eager:
+        print(f"FAIL: heavy modules loaded at import time: {', '.join(eager)}")
+        failed = True
+
+    if args.update_baseline or not os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'median_seconds': median}, f, indent=2)
+        print(f"Baseline saved to {BASELINE_FILE}")
+    else:
+        with open(BASELINE_FILE, encoding='utf-8') as f:
+            baseline = json.load(f)['median_seconds']
+        limit = baseline * (1 + args.max_regression)
+        print(f"Baseline {baseline * 1000:.1f} ms, limit {limit * 1000:.1f} ms")
+        if median > limit:
+            print(f"FAIL: cold start regressed by {(median / baseline - 1) * 100:.0f}%")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,353 @@
+"""Concurrent-session load test against a running app server.
+
+Each simulated student opens Streamlit's websocket, the same way a browser
+tab does, and drives the app by sending widget states: log in, open the
+dashboard, add a task, change a group task's status, open reports and
+download both exports. Page latency is the time from sending an action to
+the server reporting the script run finished, including st.rerun() hops.
+
+Concurrency ramps through --levels; every level runs for --duration
+seconds. For each level the script reports p50/p95/p99 latency per step,
+throughput, MySQL connections (Threads_connected) and, with psutil
+installed, the app server's CPU and memory.
+
+Log in as users created by seed_dataset.py. Steps that add or change tasks
+write to the database, so run this against a load-test database.
+
+    python benchmarks/load_test.py --start                   # start serve.py, then ramp
+    python benchmarks/load_test.py --url http://127.0.0.1:8501 --server-pid 1234
+    python benchmarks/load_test.py --start --levels 1 10 50 --duration 60
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import mysql.connector
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+from tornado.websocket import websocket_connect
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from db import DB_CONFIG  # noqa: E402
+
+LEVELS = [1, 5, 10, 25, 50]
+DURATION = 30
+THINK_SECONDS = 1.0
+START_TIMEOUT = 60
+
+SEED_PASSWORD = 'loadtest'
+
+# Steps in the order the student flow runs them
+STEPS = ['welcome', 'login', 'dashboard', 'add_task', 'group_status', 'reports', 'export']
+
+FINISHED = {ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,
+            ForwardMsg.FINISHED_WITH_COMPILE_ERROR}
+
+
+class Session:
+    """One browser tab: a websocket plus the widget state the tab would send"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.ws = None
+        self.elements = []
+        self.widget_states = {}
+
+    async def connect(self):
+        ws_url = self.base_url.replace('http', 'ws', 1) + '/_stcore/stream'
+        self.ws = await websocket_connect(ws_url, subprotocols=['streamlit'])
+        return await self.rerun()
+
+    async def close(self):
+        if self.ws:
+            self.ws.close()
+
+    async def rerun(self, fragment_id='', triggers=()):
+        """Send a rerun and wait for it (and any st.rerun it causes) to finish"""
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.fragment_id = fragment_id
+        for widget in self.widget_states.values():
+            state.widget_states.widgets.append(widget)
+        for widget_id in triggers:
+            trigger = state.widget_states.widgets.add()
+            trigger.id = widget_id
+            trigger.trigger_value = True
+        if fragment_id:
+            # A fragment run re-sends only that fragment's elements
+            self.elements = [e for e in self.elements if e[2] != fragment_id]
+
+        started = time.perf_counter()
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            data = await self.ws.read_message()
+            if data is None:
+                raise ConnectionError("websocket closed by the server")
+            fwd = ForwardMsg.FromString(data)
+            kind = fwd.WhichOneof('type')
+            if kind == 'new_session' and not fragment_id:
+                # Every full script run re-sends the whole page
+                self.elements = []
+            elif kind == 'delta' and fwd.delta.WhichOneof('type') == 'new_element':
+                element = fwd.delta.new_element
+                element_type = element.WhichOneof('type')
+                self.elements.append((element_type, getattr(element, element_type), fwd.delta.fragment_id))
+            elif kind == 'script_finished' and fwd.script_finished in FINISHED:
+                return time.perf_counter() - started
+
+    def find(self, label, element_types=None, startswith=False):
+        for element_type, element, fragment_id in self.elements:
+            if element_types and element_type not in element_types:
+                continue
+            element_label = getattr(element, 'label', '')
+            if element_label == label or (startswith and element_label.startswith(label)):
+                return element_type, element, fragment_id
+        raise LookupError(f"no widget labelled {label!r} on this page")
+
+    def fill(self, label, value, element_types=None, startswith=False):
+        """Set a widget's value for the next rerun"""
+        element_type, element, _ = self.find(label, element_types, startswith)
+        widget = WidgetState(id=element.id)
+        if element_type in ('text_input', 'text_area'):
+            widget.string_value = value
+        elif element_type == 'checkbox':
+            widget.bool_value = value
+        elif element_type == 'multiselect':
+            if 'raw_values' in element.DESCRIPTOR.fields_by_name:
+                widget.string_array_value.data.extend(element.options[i] for i in value)
+            else:
+                widget.int_array_value.data.extend(value)
+        else:
+            raise ValueError(f"filling {element_type} widgets is not supported")
+        self.widget_states[element.id] = widget
+        return element
+
+    def find_toggle(self, index):
+        """The index-th toggle on the page, counting from 0"""
+        toggles = [(t, e, f) for t, e, f in self.elements if t == 'checkbox' and e.type == e.TOGGLE]
+        if index >= len(toggles):
+            raise LookupError(f"no toggle #{index} on this page")
+        return toggles[index]
+
+    async def set_toggle(self, index, value):
+        """Flip a toggle and wait for the rerun it triggers"""
+        _, element, fragment_id = self.find_toggle(index)
+        self.widget_states[element.id] = WidgetState(id=element.id, bool_value=value)
+        return await self.rerun(fragment_id)
+
+    async def change(self, label, value, element_types=None):
+        """Change a widget's value and wait for the rerun it triggers"""
+        self.fill(label, value, element_types)
+        _, _, fragment_id = self.find(label, element_types)
+        return await self.rerun(fragment_id)
+
+    async def click(self, label, startswith=False):
+        """Press a button or form submit button and wait for the result"""
+        _, element, fragment_id = self.find(label, ('button',), startswith)
+        return await self.rerun(fragment_id, triggers=[element.id])
+
+    async def download_all(self):
+        """Fetch every download button's file, as a browser download would"""
+        client = AsyncHTTPClient()
+        started = time.perf_counter()
+        for element_type, element, _ in list(self.elements):
+            if element_type == 'download_button' and element.url:
+                await client.fetch(self.base_url + element.url)
+        return time.perf_counter() - started
+
+
+async def student_flow(base_url, username, record):
+    session = Session(base_url)
+    try:
+        record('welcome', await session.connect())
+        await session.click('🔐 Login')
+        session.fill('👤 Username', username)
+        session.fill('🔒 Password', SEED_PASSWORD)
+        record('login', await session.click('Login'))
+        record('dashboard', await session.click('🏠 Dashboard'))
+
+        await session.click('📋 Individual Tasks')
+        session.fill('📝 Task Title', f"Load test {random.randrange(1_000_000)}")
+        record('add_task', await session.click('➕ Add Task'))
+
+        await session.click('👥 Group Tasks')
+        try:
+            session.fill('📁', True, ('checkbox',), startswith=True)
+            await session.rerun()
+            session.fill('Select tasks', [0], ('multiselect',))
+            record('group_status', await session.click('💾 Apply'))
+        except LookupError:
+            pass  # this student has no groups, or an empty one
+
+        record('reports', await session.click('📊 Reports & Analytics'))
+        record('export', await session.download_all())
+    finally:
+        await session.close()
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ServerSampler:
+    """Samples app-server CPU/RSS and MySQL connections once a second"""
+
+    def __init__(self, server_pid):
+        self.process = None
+        if server_pid:
+            try:
+                import psutil
+                self.process = psutil.Process(server_pid)
+                self.process.cpu_percent()
+            except ImportError:
+                print("psutil is not installed; server CPU and memory will not be reported")
+        self.cpu = []
+        self.rss = []
+        self.connections = []
+        self.conn = mysql.connector.connect(**DB_CONFIG)
+
+    def sample(self):
+        if self.process:
+            self.cpu.append(self.process.cpu_percent())
+            self.rss.append(self.process.memory_info().rss)
+        cursor = self.conn.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Threads_connected'")
+        self.connections.append(int(cursor.fetchone()[1]))
+        cursor.close()
+
+    async def run(self, stop):
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            await loop.run_in_executor(None, self.sample)
+            try:
+                await asyncio.wait_for(stop.wait(), 1.0)
+            except asyncio.TimeoutError:
+                pass
+
+    def reset(self):
+        self.cpu, self.rss, self.connections = [], [], []
+
+
+async def run_level(base_url, usernames, concurrency, duration, sampler):
+    latencies = {step: [] for step in STEPS}
+    errors = []
+    accounts = itertools.cycle(usernames)
+    deadline = time.monotonic() + duration
+
+    def record(step, seconds):
+        latencies[step].append(seconds)
+
+    async def worker():
+        while time.monotonic() < deadline:
+            try:
+                await student_flow(base_url, next(accounts), record)
+            except (ConnectionError, LookupError, HTTPClientError, OSError) as e:
+                errors.append(e)
+            await asyncio.sleep(random.uniform(0, 2 * THINK_SECONDS))
+
+    sampler.reset()
+    stop = asyncio.Event()
+    sampling = asyncio.create_task(sampler.run(stop))
+    started = time.monotonic()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.monotonic() - started
+    stop.set()
+    await sampling
+
+    actions = sum(len(values) for values in latencies.values())
+    print(f"\n== {concurrency} concurrent sessions, {elapsed:.0f}s: "
+          f"{actions / elapsed:.1f} actions/s, {len(errors)} failed flows")
+    print(f"   {'step':14} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for step in STEPS:
+        values = sorted(latencies[step])
+        if values:
+            print(f"   {step:14} {len(values):6} {percentile(values, 0.50) * 1000:9.1f} "
+                  f"{percentile(values, 0.95) * 1000:9.1f} {percentile(values, 0.99) * 1000:9.1f}")
+    if sampler.connections:
+        print(f"   MySQL connections: mean {statistics.mean(sampler.connections):.0f}, max {max(sampler.connections)}")
+    if sampler.cpu:
+        print(f"   Server CPU: mean {statistics.mean(sampler.cpu):.0f}%, max {max(sampler.cpu):.0f}%; "
+              f"RSS max {max(sampler.rss) / 1e6:.0f} MB")
+    if errors:
+        print(f"   First error: {errors[0]!r}")
+
+
+def seeded_usernames(limit):
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT username FROM users WHERE username LIKE %s ORDER BY user_id LIMIT %s",
+        ('seed\\_user\\_%', limit)
+    )
+    usernames = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+    return usernames
+
+
+def start_server(port):
+    env = dict(os.environ, STREAMLIT_SERVER_PORT=str(port), STREAMLIT_SERVER_HEADLESS='true')
+    return subprocess.Popen([sys.executable, os.path.join(ROOT, 'serve.py')], cwd=ROOT, env=env)
+
+
+async def wait_until_healthy(base_url, timeout):
+    client = AsyncHTTPClient()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.fetch(base_url + '/_stcore/health')
+            return
+        except (HTTPClientError, OSError):
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f"app at {base_url} did not become healthy within {timeout}s")
+
+
+async def ramp(args, server_pid):
+    await wait_until_healthy(args.url, START_TIMEOUT)
+    usernames = seeded_usernames(max(args.levels) * 4)
+    if not usernames:
+        print("No seed_user_* accounts found; run benchmarks/seed_dataset.py first")
+        return 1
+    sampler = ServerSampler(server_pid)
+    for concurrency in args.levels:
+        await run_level(args.url, usernames, concurrency, args.duration, sampler)
+    sampler.conn.close()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp concurrent sessions against the app")
+    parser.add_argument('--url', default='http://127.0.0.1:8501')
+    parser.add_argument('--start', action='store_true', help="start serve.py on the --url port first")
+    parser.add_argument('--server-pid', type=int, help="app server process, for CPU and memory")
+    parser.add_argument('--levels', type=int, nargs='+', default=LEVELS)
+    parser.add_argument('--duration', type=int, default=DURATION, help="seconds per concurrency level")
+    args = parser.parse_args()
+
+    server = None
+    server_pid = args.server_pid
+    if args.start:
+        server = start_server(int(args.url.rsplit(':', 1)[1]))
+        server_pid = server.pid
+    try:
+        return asyncio.run(ramp(args, server_pid))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Replay recorded session traces against a test instance.
+
+Reads the JSON-lines traces written by session_trace.py (TRACE_SESSIONS=1)
+and plays every recorded session back over Streamlit's websocket, logged in
+as a seeded user. Sessions start at their recorded offsets and actions keep
+their recorded spacing, divided by --speed, so the replay has the same
+traffic shape as the real one: a rush on reports the night before a
+deadline stays a rush.
+
+Prints p50/p95/p99 latency per page and action. --output saves the summary
+as JSON so replays of the same trace can be compared across changes.
+
+    python benchmarks/replay.py traces/trace-20261018.jsonl
+    python benchmarks/replay.py traces/*.jsonl --speed 10 --output replay.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+
+from tornado.httpclient import HTTPClientError
+
+from load_test import SEED_PASSWORD, Session, percentile, seeded_usernames, wait_until_healthy
+
+START_TIMEOUT = 60
+
+
+def load_traces(paths):
+    """Return {session_id: [event, ...]} with each session's events in order"""
+    sessions = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    event = json.loads(line)
+                    sessions.setdefault(event['session'], []).append(event)
+    for events in sessions.values():
+        events.sort(key=lambda e: e['ts'])
+    return sessions
+
+
+def field_value(field, username):
+    if field['secret']:
+        return SEED_PASSWORD
+    if 'Username' in field['label']:
+        return username
+    if 'Email' in field['label'] or 'email' in field['label']:
+        return f"{username}@example.edu"
+    return 'x' * field['length']
+
+
+async def perform(session, event, username):
+    action = event['action']
+    if action == 'start':
+        return await session.connect()
+    if action == 'click':
+        return await session.click(event['label'])
+    if action == 'submit':
+        for field in event['fields']:
+            session.fill(field['label'], field_value(field, username), ('text_input', 'text_area'))
+        return await session.click(event['label'])
+    if action == 'toggle':
+        return await session.set_toggle(event['index'], event['value'])
+    if action == 'select':
+        _, element, _ = session.find(event['label'], ('multiselect',))
+        count = min(event['count'], len(element.options))
+        return await session.change(event['label'], list(range(count)), ('multiselect',))
+    raise ValueError(f"unknown action {action!r}")
+
+
+async def replay_session(base_url, events, username, delay, speed, record, errors):
+    await asyncio.sleep(delay)
+    session = Session(base_url)
+    started = time.monotonic()
+    first_ts = events[0]['ts']
+    if events[0]['action'] != 'start':
+        # Trace began mid-session (e.g. sampling started late); open the tab first
+        await session.connect()
+    try:
+        for event in events:
+            wait = (event['ts'] - first_ts) / speed - (time.monotonic() - started)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                seconds = await perform(session, event, username)
+            except LookupError as e:
+                # The test data differs from production, e.g. fewer groups
+                errors.append(e)
+                continue
+            record(event, seconds)
+    except (ConnectionError, HTTPClientError, OSError) as e:
+        errors.append(e)
+    finally:
+        await session.close()
+
+
+def summarize(latencies):
+    summary = {}
+    for key, values in sorted(latencies.items()):
+        values = sorted(values)
+        summary[key] = {
+            'count': len(values),
+            'p50': percentile(values, 0.50),
+            'p95': percentile(values, 0.95),
+            'p99': percentile(values, 0.99),
+        }
+    return summary
+
+
+async def replay(args):
+    await wait_until_healthy(args.url, START_TIMEOUT)
+    sessions = load_traces(args.traces)
+    if not sessions:
+        print("No sessions found in the traces")
+        return 1
+    usernames = seeded_usernames(len(sessions))
+    if not usernames:
+        print("No seed_user_* accounts found; run benchmarks/seed_dataset.py first")
+        return 1
+    accounts = itertools.cycle(usernames)
+
+    latencies = {}
+    errors = []
+
+    def record(event, seconds):
+        key = f"{event['page']}:{event['action']}"
+        latencies.setdefault(key, []).append(seconds)
+
+    trace_start = min(events[0]['ts'] for events in sessions.values())
+    print(f"Replaying {len(sessions)} sessions at {args.speed}x")
+    started = time.monotonic()
+    await asyncio.gather(*(
+        replay_session(args.url, events, next(accounts), (events[0]['ts'] - trace_start) / args.speed,
+                       args.speed, record, errors)
+        for events in sessions.values()
+    ))
+    elapsed = time.monotonic() - started
+
+    summary = summarize(latencies)
+    actions = sum(s['count'] for s in summary.values())
+    print(f"{actions} actions in {elapsed:.0f}s ({actions / elapsed:.1f}/s), {len(errors)} errors")
+    print(f"{'page:action':32} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for key, s in summary.items():
+        print(f"{key:32} {s['count']:6} {s['p50'] * 1000:9.1f} {s['p95'] * 1000:9.1f} {s['p99'] * 1000:9.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'speed': args.speed, 'sessions': len(sessions), 'seconds': elapsed,
+                       'errors': len(errors), 'latency': summary}, f, indent=2)
+        print(f"Summary saved to {args.output}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded session traces")
+    parser.add_argument('traces', nargs='+', help="trace-*.jsonl files written by session_trace.py")
+    parser.add_argument('--url', default='http://127.0.0.1:8501')
+    parser.add_argument('--speed', type=float, default=1.0, help="replay this many times faster than recorded")
+    parser.add_argument('--output', help="write the latency summary to a JSON file")
+    args = parser.parse_args()
+    return asyncio.run(replay(args))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""Seed an institution-sized synthetic dataset for load testing.
+
+Generates users, groups, memberships, individual tasks and group tasks that
+match the schema built by migrate.py, and writes them with bulk-load paths
+instead of add_task: LOAD DATA LOCAL INFILE from temporary tab-separated
+files (the default), or multi-row INSERTs with --method insert for servers
+that have local_infile disabled.
+
+The secondary indexes on tasks and group_tasks are dropped before their
+rows are loaded and rebuilt with one ALTER TABLE per table afterwards, which
+is much faster than maintaining them row by row. The smaller tables keep
+their indexes because their foreign keys depend on them.
+
+Activity is skewed: a minority of users own most tasks and memberships,
+group sizes follow a long tail, and deadlines cluster around exam weeks.
+Seeded users can log in with SEED_PASSWORD.
+
+Everything is loaded into the global shard. With DB_SHARDS set, the seeded
+users and groups are pinned there in the shard directory and the task id
+blocks are moved past the loaded ids; spread them out with reshard.py.
+Seed before starting app servers, which reserve id blocks as they run.
+
+    python benchmarks/seed_dataset.py                 # 200k users, 20k groups, 10M tasks
+    python benchmarks/seed_dataset.py --scale 0.01    # 1% of that
+    python benchmarks/seed_dataset.py --method insert
+"""
+import argparse
+import hashlib
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+from synthetic import STATUSES, TERM_DAYS, priority_for, random_deadline, random_hours
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from db import DB_CONFIG, is_sharded  # noqa: E402
+
+USERS = 200_000
+GROUPS = 20_000
+TASKS = 10_000_000
+GROUP_TASK_SHARE = 0.2
+
+MAX_GROUP_SIZE = 300
+UNASSIGNED_SHARE = 0.2
+PAST_COMPLETED_SHARE = 0.8
+
+SEED_PASSWORD = 'loadtest'
+
+CHUNK_ROWS = 500_000
+INSERT_BATCH = 5_000
+
+# Tables whose secondary indexes are rebuilt after the load
+DEFERRED_INDEX_TABLES = ['tasks', 'group_tasks']
+
+
+def password_hash(password):
+    """Same unsalted SHA-256 the login form checks against"""
+    return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+
+def activity_weights(rng, count, alpha):
+    """Cumulative Pareto weights, for skewed rng.choices over count items"""
+    return list(itertools.accumulate(rng.paretovariate(alpha) for _ in range(count)))
+
+
+def next_id(cursor, table, column):
+    cursor.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 AS next_id FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def user_rows(first_id, count):
+    hashed = password_hash(SEED_PASSWORD)
+    for user_id in range(first_id, first_id + count):
+        yield (user_id, f"seed_user_{user_id}", f"seed_user_{user_id}@example.edu", hashed)
+
+
+def build_groups(rng, first_group_id, count, user_ids, user_weights):
+    """Return {group_id: (created_by, [member ids])} with long-tailed sizes"""
+    groups = {}
+    for group_id in range(first_group_id, first_group_id + count):
+        size = min(MAX_GROUP_SIZE, len(user_ids), int(rng.paretovariate(1.3)) + 2)
+        members = []
+        seen = set()
+        while len(members) < size:
+            for user_id in rng.choices(user_ids, cum_weights=user_weights, k=size - len(members)):
+                if user_id not in seen:
+                    seen.add(user_id)
+                    members.append(user_id)
+        groups[group_id] = (members[0], members)
+    return groups
+
+
+def group_rows(groups):
+    for group_id, (created_by, _) in groups.items():
+        yield (group_id, f"Study group {group_id}", created_by, f"S{group_id:07d}")
+
+
+def member_rows(groups):
+    for group_id, (created_by, members) in groups.items():
+        for user_id in members:
+            yield (group_id, user_id, 'Head' if user_id == created_by else 'Member')
+
+
+def task_fields(rng, term_start, today):
+    deadline = random_deadline(rng, term_start)
+    hours = random_hours(rng)
+    if deadline < today and rng.random() < PAST_COMPLETED_SHARE:
+        status = 'Completed'
+    else:
+        status = rng.choice(STATUSES)
+    return deadline, hours, priority_for(hours), status
+
+
+def task_rows(rng, count, user_ids, user_weights, term_start, today):
+    for n in range(count):
+        user_id = rng.choices(user_ids, cum_weights=user_weights)[0]
+        deadline, hours, priority, status = task_fields(rng, term_start, today)
+        yield (user_id, f"Task {n + 1}", deadline, hours, priority, status)
+
+
+def group_task_rows(rng, count, groups, term_start, today):
+    group_ids = list(groups)
+    # Bigger groups get proportionally more tasks
+    weights = list(itertools.accumulate(len(groups[g][1]) for g in group_ids))
+    for n in range(count):
+        group_id = rng.choices(group_ids, cum_weights=weights)[0]
+        members = groups[group_id][1]
+        assigned_to = None if rng.random() < UNASSIGNED_SHARE else rng.choice(members)
+        deadline, hours, priority, status = task_fields(rng, term_start, today)
+        yield (group_id, f"Group task {n + 1}", deadline, hours, priority, status, assigned_to)
+
+
+def _tsv_value(value):
+    return r'\N' if value is None else str(value)
+
+
+def load_chunk(conn, table, columns, rows, method):
+    cursor = conn.cursor()
+    if method == 'infile':
+        with tempfile.NamedTemporaryFile('w', suffix='.tsv', delete=False, encoding='utf-8') as f:
+            for row in rows:
+                f.write('\t'.join(_tsv_value(v) for v in row))
+                f.write('\n')
+            path = f.name
+        try:
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} "
+                f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(columns)})",
+                (path,)
+            )
+        finally:
+            os.unlink(path)
+    else:
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        for start in range(0, len(rows), INSERT_BATCH):
+            # executemany sends each batch as a single multi-row INSERT
+            cursor.executemany(query, rows[start:start + INSERT_BATCH])
+    conn.commit()
+    cursor.close()
+
+
+def bulk_load(conn, table, columns, rows, method, total):
+    started = time.perf_counter()
+    loaded = 0
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, CHUNK_ROWS))
+        if not chunk:
+            break
+        load_chunk(conn, table, columns, chunk, method)
+        loaded += len(chunk)
+        print(f"  {table}: {loaded:,}/{total:,}", end='\r', flush=True)
+    elapsed = time.perf_counter() - started
+    print(f"  {table}: {loaded:,} rows in {elapsed:.1f}s ({loaded / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+def secondary_indexes(cursor, table):
+    """Return {index_name: (non_unique, [columns])} for every non-primary index"""
+    cursor.execute(
+        """
+        SELECT index_name, non_unique, column_name
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name <> 'PRIMARY'
+        ORDER BY index_name, seq_in_index
+        """,
+        (table,)
+    )
+    indexes = {}
+    for name, non_unique, column in cursor.fetchall():
+        indexes.setdefault(name, (non_unique, []))[1].append(column)
+    return indexes
+
+
+def drop_indexes(cursor, table, indexes):
+    if indexes:
+        cursor.execute(f"ALTER TABLE {table} " + ', '.join(f"DROP INDEX {name}" for name in indexes))
+
+
+def rebuild_indexes(cursor, table, indexes):
+    if not indexes:
+        return
+    started = time.perf_counter()
+    clauses = []
+    for name, (non_unique, columns) in indexes.items():
+        kind = 'INDEX' if non_unique else 'UNIQUE INDEX'
+        clauses.append(f"ADD {kind} {name} ({', '.join(columns)})")
+    cursor.execute(f"ALTER TABLE {table} " + ', '.join(clauses))
+    cursor.execute(f"ANALYZE TABLE {table}")
+    cursor.fetchall()
+    print(f"  {table}: rebuilt {len(indexes)} index(es) in {time.perf_counter() - started:.1f}s")
+
+
+def pin_to_global_shard(cursor, user_ids, group_ids):
+    """Record shard 0 for the seeded users and groups and skip id blocks past their tasks"""
+    for entity, table, column, ids in (('user', 'users', 'user_id', user_ids),
+                                       ('group', 'student_groups', 'group_id', group_ids)):
+        cursor.execute(
+            f"INSERT IGNORE INTO shard_directory (entity, entity_id, shard) "
+            f"SELECT %s, {column}, 0 FROM {table} WHERE {column} BETWEEN %s AND %s",
+            (entity, ids[0], ids[-1])
+        )
+    for table, column in (('tasks', 'task_id'), ('group_tasks', 'group_task_id')):
+        cursor.execute(
+            f"UPDATE id_blocks SET next_id = GREATEST(next_id, (SELECT COALESCE(MAX({column}), 0) + 1 FROM {table})) "
+            f"WHERE table_name = %s",
+            (table,)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load a synthetic dataset")
+    parser.add_argument('--users', type=int, default=USERS)
+    parser.add_argument('--groups', type=int, default=GROUPS)
+    parser.add_argument('--tasks', type=int, default=TASKS, help="individual plus group tasks")
+    parser.add_argument('--group-task-share', type=float, default=GROUP_TASK_SHARE)
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply every count by this")
+    parser.add_argument('--method', choices=['infile', 'insert'], default='infile')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    users = max(2, int(args.users * args.scale))
+    group_count = max(1, int(args.groups * args.scale))
+    total_tasks = int(args.tasks * args.scale)
+    group_task_count = int(total_tasks * args.group_task_share)
+    task_count = total_tasks - group_task_count
+
+    rng = random.Random(args.seed)
+    today = datetime.now().date()
+    term_start = today - timedelta(days=TERM_DAYS // 2)
+
+    conn = mysql.connector.connect(**DB_CONFIG, allow_local_infile=args.method == 'infile')
+    cursor = conn.cursor()
+    cursor.execute("SET SESSION unique_checks = 0")
+    cursor.execute("SET SESSION foreign_key_checks = 0")
+
+    started = time.perf_counter()
+    print(f"Seeding {users:,} users, {group_count:,} groups, {task_count:,} tasks, {group_task_count:,} group tasks")
+
+    first_user = next_id(cursor, 'users', 'user_id')
+    user_ids = list(range(first_user, first_user + users))
+    user_weights = activity_weights(rng, users, 1.5)
+    bulk_load(conn, 'users', ['user_id', 'username', 'email', 'password_hash'],
+              user_rows(first_user, users), args.method, users)
+
+    groups = build_groups(rng, next_id(cursor, 'student_groups', 'group_id'), group_count, user_ids, user_weights)
+    bulk_load(conn, 'student_groups', ['group_id', 'group_name', 'created_by', 'invite_code'],
+              group_rows(groups), args.method, group_count)
+    memberships = sum(len(members) for _, members in groups.values())
+    bulk_load(conn, 'group_members', ['group_id', 'user_id', 'member_role'],
+              member_rows(groups), args.method, memberships)
+
+    deferred = {table: secondary_indexes(cursor, table) for table in DEFERRED_INDEX_TABLES}
+    for table, indexes in deferred.items():
+        drop_indexes(cursor, table, indexes)
+    try:
+        bulk_load(conn, 'tasks', ['user_id', 'title', 'deadline', 'estimated_hours', 'priority', 'task_status'],
+                  task_rows(rng, task_count, user_ids, user_weights, term_start, today), args.method, task_count)
+        bulk_load(conn, 'group_tasks',
+                  ['group_id', 'title', 'deadline', 'estimated_hours', 'priority', 'task_status', 'assigned_to'],
+                  group_task_rows(rng, group_task_count, groups, term_start, today), args.method, group_task_count)
+    finally:
+        # Rebuild even after a failed load so the app is never left without its indexes
+        for table, indexes in deferred.items():
+            rebuild_indexes(cursor, table, indexes)
+
+    if is_sharded():
+        pin_to_global_shard(cursor, user_ids, sorted(groups))
+        conn.commit()
+
+    cursor.close()
+    conn.close()
+    print(f"Done in {time.perf_counter() - started:.1f}s. Seeded users log in as seed_user_<id> / {SEED_PASSWORD}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
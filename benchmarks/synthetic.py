@@ -0,0 +1,57 @@
+"""Deterministic synthetic task rows shaped like the tasks/group_tasks tables.
+
+Deadlines cluster around EXAM_WEEKS, the way real workloads pile up before
+midterms and finals, with the rest spread over the term.
+"""
+import random
+from datetime import datetime, timedelta
+
+STATUSES = ['Pending', 'Pending', 'Pending', 'In Progress', 'Completed']
+
+# Days from the start of the term on which exam weeks begin
+EXAM_WEEKS = [49, 105]
+EXAM_SHARE = 0.4
+TERM_DAYS = 120
+
+
+def priority_for(hours):
+    """Same thresholds as tasks.calculate_priority, without importing streamlit"""
+    if hours >= 5:
+        return "High"
+    elif hours >= 3:
+        return "Medium"
+    return "Low"
+
+
+def random_deadline(rng, term_start):
+    if rng.random() < EXAM_SHARE:
+        offset = rng.choice(EXAM_WEEKS) + rng.randrange(7)
+    else:
+        offset = rng.randrange(TERM_DAYS)
+    return term_start + timedelta(days=offset)
+
+
+def random_hours(rng):
+    # Mostly small tasks with a long tail of big assignments
+    return min(40, max(1, int(rng.expovariate(1 / 3)) + 1))
+
+
+def generate_tasks(count, seed=0, term_start=None):
+    """Return count task dicts with the columns the app reads from a task row"""
+    rng = random.Random(seed)
+    term_start = term_start or datetime.now().date() - timedelta(days=TERM_DAYS // 2)
+    tasks = []
+    for task_id in range(1, count + 1):
+        hours = random_hours(rng)
+        tasks.append({
+            'task_id': task_id,
+            'user_id': 1,
+            'group_id': None,
+            'title': f"Task {task_id}",
+            'deadline': random_deadline(rng, term_start),
+            'estimated_hours': hours,
+            'priority': priority_for(hours),
+            'task_status': rng.choice(STATUSES),
+            'assigned_to': None,
+        })
+    return tasks
@@ -5,11 +5,13 @@ def calculate_burnout_risk(user_id):
     individual_tasks = get_user_tasks(user_id)
     group_tasks = get_all_user_group_tasks(user_id)
     
-    all_tasks = individual_tasks + group_tasks
-    
+    return burnout_risk_from_tasks(individual_tasks + group_tasks)
+
+def burnout_risk_from_tasks(all_tasks, today=None):
+    """Score a list of task rows; the database-free part of calculate_burnout_risk"""
     total_tasks = len(all_tasks)
     
-    today = datetime.now().date()
+    today = today or datetime.now().date()
     next_week = today + timedelta(days=7)
     
     tasks_next_week = [t for t in all_tasks if today <= t['deadline'] <= next_week]
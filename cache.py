@@ -0,0 +1,59 @@
+"""Process-wide read caches shared by every session on an app server."""
+import threading
+import time
+
+# name -> TTLCache, for warm-up and monitoring
+CACHES = {}
+
+
+class TTLCache:
+    """A small thread-safe cache whose entries expire after ttl seconds.
+
+    Expired entries are swept out at most once per ttl, on insert, so
+    caches keyed by a version don't keep every old version around.
+    """
+
+    def __init__(self, name, ttl):
+        self.name = name
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._next_sweep = time.monotonic() + ttl
+        self._lock = threading.Lock()
+        CACHES[name] = self
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss.
+
+        Empty results are not cached, so a failed query is retried on the
+        next call instead of being served until the entry expires.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = loader()
+        if value:
+            with self._lock:
+                if now >= self._next_sweep:
+                    self._entries = {k: entry for k, entry in self._entries.items() if entry[0] > now}
+                    self._next_sweep = now + self.ttl
+                self._entries[key] = (now + self.ttl, value)
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -1,6 +1,20 @@
+import contextvars
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import contextmanager
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from cache import TTLCache
+from tracing import span
 
 DB_CONFIG = {
     'host': 'localhost',
@@ -9,54 +23,667 @@ DB_CONFIG = {
     'database': 'academic_burnout_db'
 }
 
-def get_connection():
+# Shards. DB_SHARDS is a JSON list with one entry per MySQL instance or
+# database, each overriding keys of DB_CONFIG, e.g.
+#   DB_SHARDS='[{}, {"database": "academic_burnout_db_1"}]'
+# Shard 0 is the global shard: users, groups, memberships, sessions and the
+# shard directory live there. tasks and tasks_archive are spread by user_id,
+# group_tasks and group_tasks_archive by group_id (see shard_for_user).
+SHARDS = [dict(DB_CONFIG, **override) for override in json.loads(os.environ.get('DB_SHARDS', '[{}]'))]
+GLOBAL_SHARD = 0
+
+# Storage backend: 'mysql', or 'sqlite' for a single-node deployment on one
+# embedded database file (see sqlite_backend.py)
+DB_BACKEND = os.environ.get('DB_BACKEND', 'mysql')
+DB_ERRORS = (Error,)
+if DB_BACKEND == 'sqlite':
+    import sqlite_backend
+    DB_ERRORS = (Error, sqlite_backend.Error)
+    if len(SHARDS) > 1 or os.environ.get('DB_REPLICAS'):
+        raise RuntimeError("DB_SHARDS and DB_REPLICAS need DB_BACKEND=mysql")
+elif DB_BACKEND != 'mysql':
+    raise RuntimeError(f"Unknown DB_BACKEND: {DB_BACKEND}")
+
+# Read replicas. DB_REPLICAS is a JSON list of DB_CONFIG overrides, one per
+# replica, each naming the shard it replicates with "shard" (default 0), e.g.
+#   DB_REPLICAS='[{"host": "replica1"}, {"host": "replica2"}]'
+# Only reads inside replica_reads() use them; see below.
+def _load_replicas():
+    replicas = {}
+    for override in json.loads(os.environ.get('DB_REPLICAS', '[]')):
+        override = dict(override)
+        shard = override.pop('shard', GLOBAL_SHARD)
+        replicas.setdefault(shard, []).append(dict(SHARDS[shard], **override))
+    return replicas
+
+REPLICAS = _load_replicas()
+# Replicas further behind than this are skipped until they catch up
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get('DB_REPLICA_MAX_LAG_SECONDS', 10))
+REPLICA_CHECK_SECONDS = 5
+# A session that wrote reads from the primary for this long afterwards. A
+# replica in use may be REPLICA_MAX_LAG_SECONDS behind, plus however far it
+# fell behind since it was last checked, so a shorter window could hide the
+# session's own write.
+REPLICA_STICKY_SECONDS = float(os.environ.get(
+    'DB_REPLICA_STICKY_SECONDS', REPLICA_MAX_LAG_SECONDS + REPLICA_CHECK_SECONDS
+))
+if REPLICA_STICKY_SECONDS < REPLICA_MAX_LAG_SECONDS + REPLICA_CHECK_SECONDS:
+    raise RuntimeError("DB_REPLICA_STICKY_SECONDS must be at least DB_REPLICA_MAX_LAG_SECONDS + 5")
+
+# Connections are pooled per process and shard; conn.close() returns them to the pool.
+DB_POOL_SIZE = min(int(os.environ.get('DB_POOL_SIZE', 8)), pooling.CNX_POOL_MAXSIZE)
+
+# An exhausted pool is waited on, not bypassed, so DB_POOL_SIZE stays the
+# real bound on connections per process and shard
+DB_POOL_WAIT_SECONDS = float(os.environ.get('DB_POOL_WAIT_SECONDS', 5))
+POOL_WAIT_INTERVAL = 0.02
+
+_pools = {}
+_pool_lock = threading.Lock()
+_pool_waits = 0
+_LOGGER = logging.getLogger(__name__)
+
+def _show_error(message):
+    """Show message on the page that ran the query, or log it outside a script run"""
+    if get_script_run_ctx(suppress_warning=True) is None:
+        _LOGGER.error(message)
+    else:
+        st.error(message)
+
+def get_pool(shard=GLOBAL_SHARD, replica=None):
+    """Return the process-wide connection pool of a shard, or of one of its
+    replicas, creating it on first use"""
+    key = shard if replica is None else (shard, replica)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                name = 'academic_burnout' if shard == GLOBAL_SHARD else f'academic_burnout_{shard}'
+                if replica is not None:
+                    name += f'_r{replica}'
+                pool = _pools[key] = pooling.MySQLConnectionPool(
+                    pool_name=name,
+                    pool_size=DB_POOL_SIZE,
+                    pool_reset_session=True,
+                    **_app_config(SHARDS[shard] if replica is None else REPLICAS[shard][replica])
+                )
+    return pool
+
+def pool_stats():
+    """Pool size, idle and in-use connections over all shards and replicas, and waits on an exhausted pool so far.
+
+    idle and in_use are None if the connector no longer exposes its queue.
+    """
+    pools = list(_pools.values())
+    size = sum(pool.pool_size for pool in pools)
+    # mysql-connector keeps idle connections in the pool's private queue
+    queues = [getattr(pool, '_cnx_queue', None) for pool in pools]
+    if any(queue is None for queue in queues):
+        return {'size': size, 'idle': None, 'in_use': None, 'waits_total': _pool_waits}
+    idle = sum(queue.qsize() for queue in queues)
+    return {'size': size, 'idle': idle, 'in_use': size - idle, 'waits_total': _pool_waits}
+
+def get_connection(shard=GLOBAL_SHARD, read=False):
+    """A connection to a shard; reads may be served by one of its replicas"""
+    global _pool_waits
+    if shard is None:
+        # The shard lookup failed and has already reported why
+        return None
+    if DB_BACKEND == 'sqlite':
+        try:
+            return sqlite_backend.get_connection()
+        except sqlite_backend.Error as e:
+            _show_error(f"Database connection error: {e}")
+            return None
+    if read:
+        replica = _read_replica(shard)
+        if replica is not None:
+            try:
+                return get_pool(shard, replica).get_connection()
+            except pooling.PoolError:
+                pass
+            except Error:
+                # Unreachable: skip it until the monitor sees it healthy again
+                _replica_healthy[(shard, replica)] = False
+    deadline = None
+    while True:
+        try:
+            return get_pool(shard).get_connection()
+        except pooling.PoolError:
+            # Pool exhausted: wait for a connection to be returned
+            now = time.monotonic()
+            if deadline is None:
+                _pool_waits += 1
+                deadline = now + DB_POOL_WAIT_SECONDS
+            elif now >= deadline:
+                _show_error("The database is busy right now. Please try again.")
+                return None
+            time.sleep(POOL_WAIT_INTERVAL)
+        except Error as e:
+            _show_error(f"Database connection error: {e}")
+            return None
+
+# Replica routing. Reads run inside replica_reads() go to a replica of
+# their shard, unless this session wrote within REPLICA_STICKY_SECONDS, so a
+# user always sees their own changes. One replica is picked per shard for
+# the whole context, in turn, so a page never mixes a newer version stamp
+# with older rows from a replica further behind. A monitor thread checks
+# each replica's lag every REPLICA_CHECK_SECONDS and skips replicas that
+# are too far behind or not replicating.
+
+_replica_choice = contextvars.ContextVar('replica_choice', default=None)
+_replica_turns = {shard: itertools.count() for shard in REPLICAS}
+_replica_healthy = {}
+_replica_lag = {}
+_last_writes = {}
+_monitor_lock = threading.Lock()
+_monitor_started = False
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Let reads in this context use replicas, e.g. one read-mostly page render"""
+    token = _replica_choice.set({} if enabled and REPLICAS else None)
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except Error as e:
-        st.error(f"Database connection error: {e}")
+        yield
+    finally:
+        _replica_choice.reset(token)
+
+def _session_id():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else None
+
+def note_write():
+    """Record that this session wrote, so its reads stay on the primary for a while"""
+    session_id = _session_id()
+    if session_id is None or not REPLICAS:
+        return
+    now = time.monotonic()
+    _last_writes[session_id] = now
+    if len(_last_writes) > 1000:
+        for key, written in list(_last_writes.items()):
+            if now - written > REPLICA_STICKY_SECONDS:
+                _last_writes.pop(key, None)
+
+def _wrote_recently():
+    written = _last_writes.get(_session_id())
+    return written is not None and time.monotonic() - written < REPLICA_STICKY_SECONDS
+
+def _read_replica(shard):
+    """Index of the replica to read shard from, or None for the primary"""
+    choice = _replica_choice.get()
+    if choice is None or shard not in REPLICAS or _wrote_recently():
+        return None
+    _start_replica_monitor()
+    if shard not in choice:
+        healthy = [i for i in range(len(REPLICAS[shard])) if _replica_healthy.get((shard, i))]
+        choice[shard] = healthy[next(_replica_turns[shard]) % len(healthy)] if healthy else None
+    replica = choice[shard]
+    if replica is None or not _replica_healthy.get((shard, replica)):
+        return None
+    return replica
+
+def _check_replica(shard, replica):
+    """Seconds the replica is behind its source, or None if it is not replicating"""
+    conn = mysql.connector.connect(**dict(REPLICAS[shard][replica], connection_timeout=REPLICA_CHECK_SECONDS))
+    try:
+        cursor = conn.cursor(dictionary=True)
+        # MySQL 8.0.22+; one row per replication channel
+        cursor.execute("SHOW REPLICA STATUS")
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+    lags = [row['Seconds_Behind_Source'] for row in rows]
+    if not lags or None in lags:
         return None
+    return max(lags)
+
+def _monitor_replicas():
+    while True:
+        for shard, configs in REPLICAS.items():
+            for replica in range(len(configs)):
+                try:
+                    lag = _check_replica(shard, replica)
+                except Error:
+                    lag = None
+                _replica_lag[(shard, replica)] = lag
+                _replica_healthy[(shard, replica)] = lag is not None and lag <= REPLICA_MAX_LAG_SECONDS
+        time.sleep(REPLICA_CHECK_SECONDS)
+
+def _start_replica_monitor():
+    global _monitor_started
+    if _monitor_started:
+        return
+    with _monitor_lock:
+        if not _monitor_started:
+            _monitor_started = True
+            threading.Thread(target=_monitor_replicas, name='db-replica-monitor', daemon=True).start()
+
+def replica_stats():
+    """[(shard, replica, lag seconds or None, healthy)] as last seen by the monitor"""
+    return [
+        (shard, replica, _replica_lag.get((shard, replica)), bool(_replica_healthy.get((shard, replica))))
+        for shard, configs in sorted(REPLICAS.items())
+        for replica in range(len(configs))
+    ]
+
+# Query deadlines. Reads run under a deadline: the per-call timeout, the
+# remaining time of the enclosing time_budget() (e.g. one page render), and
+# DB_QUERY_TIMEOUT, whichever is soonest. A SELECT carries it to MySQL as
+# MAX_EXECUTION_TIME, so the server cancels it, lock waits included, and a
+# read due after the budget has run out is not started. Either way the
+# call returns None like any failed read and budget_exceeded() turns true,
+# so the page can show what it has with a notice. Writes get no deadline:
+# dropping a user's change is worse than a slow page.
+#
+# mysql-connector has no separate read timeout: connection_timeout bounds
+# connecting and, in the C extension, every socket read and write too. So
+# it is only a backstop against a dead server, DB_SOCKET_TIMEOUT, kept well
+# above every read deadline; the read deadlines themselves are enforced by
+# MySQL. migrate.py opens its own connections without it.
+
+DB_QUERY_TIMEOUT = float(os.environ.get('DB_QUERY_TIMEOUT', 30))
+DB_SOCKET_TIMEOUT = int(os.environ.get('DB_SOCKET_TIMEOUT', 120))
+ER_QUERY_TIMEOUT = 3024
+
+if DB_SOCKET_TIMEOUT <= DB_QUERY_TIMEOUT:
+    raise RuntimeError("DB_SOCKET_TIMEOUT must be longer than DB_QUERY_TIMEOUT")
+
+def _app_config(config):
+    """config with the socket backstop, unless it sets connection_timeout itself"""
+    return {'connection_timeout': DB_SOCKET_TIMEOUT, **config}
+
+_budget = contextvars.ContextVar('time_budget', default=None)
+_LEADING_SELECT = re.compile(r'^\s*SELECT\b', re.IGNORECASE)
+
+@contextmanager
+def time_budget(seconds):
+    """Give the reads in this context seconds in total, within any enclosing budget"""
+    parent = _budget.get()
+    deadline = time.monotonic() + seconds
+    if parent is not None:
+        deadline = min(deadline, parent['deadline'])
+    budget = {'deadline': deadline, 'exceeded': False}
+    token = _budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _budget.reset(token)
+        if parent is not None and budget['exceeded']:
+            parent['exceeded'] = True
+
+@contextmanager
+def without_time_budget():
+    """Suspend the enclosing time_budget, e.g. for a read a write depends on"""
+    token = _budget.set(None)
+    try:
+        yield
+    finally:
+        _budget.reset(token)
+
+def budget_exceeded():
+    """Whether a read in the current time_budget was cancelled or skipped"""
+    budget = _budget.get()
+    return bool(budget and budget['exceeded'])
+
+def _budget_remaining():
+    budget = _budget.get()
+    return None if budget is None else budget['deadline'] - time.monotonic()
+
+def _mark_exceeded():
+    _mark_read_failed()
+    budget = _budget.get()
+    if budget is not None:
+        budget['exceeded'] = True
+
+# Failed reads. A read that fails, times out or is skipped returns None,
+# which most loaders turn into an empty list. Code that caches what it read
+# runs the reads under watch_reads() and doesn't cache if any of them failed.
+
+_read_watch = contextvars.ContextVar('read_watch', default=None)
+
+@contextmanager
+def watch_reads():
+    """Yield a dict whose 'failed' turns true if a read in this context fails"""
+    parent = _read_watch.get()
+    watch = {'failed': False}
+    token = _read_watch.set(watch)
+    try:
+        yield watch
+    finally:
+        _read_watch.reset(token)
+        if parent is not None and watch['failed']:
+            parent['failed'] = True
+
+def _mark_read_failed():
+    watch = _read_watch.get()
+    if watch is not None:
+        watch['failed'] = True
+
+def _read_deadline(timeout=None):
+    """Seconds the next read may take; marks the budget exceeded if none are left"""
+    limits = [DB_QUERY_TIMEOUT, _budget_remaining(), timeout]
+    seconds = min(limit for limit in limits if limit is not None)
+    if seconds <= 0:
+        _mark_exceeded()
+    return seconds
+
+def _with_time_limit(query, seconds):
+    if seconds is None or DB_BACKEND != 'mysql':
+        return query
+    # Optimizer hints must follow the SELECT keyword
+    hint = f"SELECT /*+ MAX_EXECUTION_TIME({max(1, int(seconds * 1000))}) */"
+    return _LEADING_SELECT.sub(hint, query, count=1)
+
+def _report_error(e):
+    if getattr(e, 'errno', None) == ER_QUERY_TIMEOUT:
+        if _budget.get() is None:
+            # No page to show a notice, e.g. the API or a CLI tool
+            _LOGGER.warning("Query cancelled at its deadline (DB_QUERY_TIMEOUT is %ss): %s", DB_QUERY_TIMEOUT, e)
+        _mark_exceeded()
+    else:
+        _show_error(f"Query execution error: {e}")
+
+# Query instrumentation. Every statement is fingerprinted and timed; the
+# timings go to the active QueryLog (see record_queries) and to any hooks
+# registered with add_query_hook.
+
+_query_hooks = []
+_current_log = contextvars.ContextVar('query_log', default=None)
 
-def execute_query(query, params=None, fetch=False):
-    conn = get_connection()
+_FINGERPRINT_RULES = [
+    (re.compile(r"'(?:[^'\\]|\\.|'')*'"), '?'),
+    (re.compile(r'\b\d+\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?+)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+def fingerprint(query):
+    """Normalize a statement so calls differing only in values compare equal"""
+    for pattern, replacement in _FINGERPRINT_RULES:
+        query = pattern.sub(replacement, query)
+    return query.strip()
+
+def add_query_hook(hook):
+    """Call hook(fingerprint, query, seconds) after every statement"""
+    _query_hooks.append(hook)
+
+class QueryLog:
+    """Fingerprint and duration of each statement run while it is active.
+
+    Statements recorded in a nested log, a section such as one fragment of
+    the page, are counted in the enclosing log too.
+    """
+    
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.queries = []
+        self.sections = []
+    
+    @property
+    def count(self):
+        return len(self.queries)
+    
+    @property
+    def total_seconds(self):
+        return sum(seconds for _, seconds in self.queries)
+    
+    def repeated(self, threshold=2):
+        """Fingerprints run at least threshold times outside any section, with their counts"""
+        counts = {}
+        for fp, _ in self.queries:
+            counts[fp] = counts.get(fp, 0) + 1
+        for section in self.sections:
+            for fp, _ in section.queries:
+                counts[fp] -= 1
+        return {fp: n for fp, n in counts.items() if n >= threshold}
+
+@contextmanager
+def record_queries(name):
+    """Record every statement run in this context, e.g. one page render"""
+    parent = _current_log.get()
+    log = QueryLog(name, parent)
+    if parent is not None:
+        parent.sections.append(log)
+    token = _current_log.set(log)
+    try:
+        yield log
+    finally:
+        _current_log.reset(token)
+
+@contextmanager
+def instrumented(query):
+    fp = fingerprint(query)
+    started = time.perf_counter()
+    try:
+        with span('db.query', fingerprint=fp):
+            yield
+    finally:
+        seconds = time.perf_counter() - started
+        log = _current_log.get()
+        while log is not None:
+            log.queries.append((fp, seconds))
+            log = log.parent
+        for hook in _query_hooks:
+            hook(fp, query, seconds)
+
+def execute_query(query, params=None, fetch=False, shard=GLOBAL_SHARD, timeout=None):
+    """Run one statement; with fetch, return its rows under the read deadline (see time_budget)"""
+    seconds = _read_deadline(timeout) if fetch else None
+    if seconds is not None and seconds <= 0:
+        return None
+    if shard is None and not fetch:
+        _show_error("Could not save the change: its storage location is unavailable. Please try again.")
+        return None
+    conn = get_connection(shard, read=fetch)
     if conn is None:
+        if fetch:
+            _mark_read_failed()
         return None
     
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, params or ())
+        with instrumented(query):
+            cursor.execute(_with_time_limit(query, seconds), params or ())
+            if fetch:
+                result = cursor.fetchall()
         
         if fetch:
-            result = cursor.fetchall()
             cursor.close()
             conn.close()
             return result
         else:
             conn.commit()
+            note_write()
             last_id = cursor.lastrowid
             cursor.close()
             conn.close()
             return last_id
-    except Error as e:
-        st.error(f"Query execution error: {e}")
+    except DB_ERRORS as e:
+        if fetch:
+            _mark_read_failed()
+        _report_error(e)
         if conn:
             conn.close()
         return None
 
-def execute_query_one(query, params=None):
-    conn = get_connection()
+def execute_query_one(query, params=None, shard=GLOBAL_SHARD, timeout=None):
+    seconds = _read_deadline(timeout)
+    if seconds <= 0:
+        return None
+    conn = get_connection(shard, read=True)
     if conn is None:
+        _mark_read_failed()
         return None
     
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, params or ())
-        result = cursor.fetchone()
+        with instrumented(query):
+            cursor.execute(_with_time_limit(query, seconds), params or ())
+            result = cursor.fetchone()
         cursor.close()
         conn.close()
         return result
-    except Error as e:
-        st.error(f"Query execution error: {e}")
+    except DB_ERRORS as e:
+        _mark_read_failed()
+        _report_error(e)
         if conn:
             conn.close()
-        return None
\ No newline at end of file
+        return None
+
+def placeholders(values):
+    """Build the '%s, %s, ...' list for an IN clause over values"""
+    return ', '.join(['%s'] * len(values))
+
+def execute_transaction(queries, return_last_id=False, shard=GLOBAL_SHARD):
+    """Run [(query, params), ...] in one transaction on one shard.
+
+    Returns the affected row count of each statement, or the lastrowid of
+    the final statement if return_last_id is set. Returns None if any
+    statement failed and the transaction was rolled back.
+    """
+    if shard is None:
+        _show_error("Could not save the change: its storage location is unavailable. Please try again.")
+        return None
+    conn = get_connection(shard)
+    if conn is None:
+        return None
+    
+    try:
+        cursor = conn.cursor(dictionary=True)
+        rowcounts = []
+        for query, params in queries:
+            with instrumented(query):
+                cursor.execute(query, params or ())
+            rowcounts.append(cursor.rowcount)
+        conn.commit()
+        note_write()
+        last_id = cursor.lastrowid
+        cursor.close()
+        conn.close()
+        return last_id if return_last_id else rowcounts
+    except DB_ERRORS as e:
+        _show_error(f"Query execution error: {e}")
+        if conn:
+            conn.rollback()
+            conn.close()
+        return None
+
+# Shard routing. The shard directory on the global shard records where each
+# user's and group's rows live. A user or group is placed by hash the first
+# time it is looked up, and the placement is recorded, so adding shards
+# later moves nobody; reshard.py moves them explicitly.
+
+SHARD_DIRECTORY_TTL = 30
+_directory_cache = TTLCache('shard_directory', SHARD_DIRECTORY_TTL)
+_scatter_executor = ThreadPoolExecutor(max(1, len(SHARDS)) * 4, thread_name_prefix='db-scatter')
+
+def _directory_entry(entity, entity_id):
+    select = "SELECT shard FROM shard_directory WHERE entity = %s AND entity_id = %s"
+    # Always from the primary: a lagging replica could hand back a placement
+    # reshard.py has just changed. Never skipped by a page's time budget,
+    # since writes need the shard too.
+    with replica_reads(False), without_time_budget():
+        row = execute_query_one(select, (entity, entity_id))
+        if row is None:
+            execute_query(
+                "INSERT IGNORE INTO shard_directory (entity, entity_id, shard) VALUES (%s, %s, %s)",
+                (entity, entity_id, entity_id % len(SHARDS))
+            )
+            row = execute_query_one(select, (entity, entity_id))
+    # Cached as a tuple: TTLCache does not cache falsy values such as shard 0
+    return (row['shard'],) if row else None
+
+def _shard_for(entity, entity_id):
+    if not is_sharded():
+        return GLOBAL_SHARD
+    entry = _directory_cache.get((entity, entity_id), lambda: _directory_entry(entity, entity_id))
+    return entry[0] if entry else None
+
+def shard_for_user(user_id):
+    """Shard holding a user's tasks, or None if the directory could not be read"""
+    return _shard_for('user', user_id)
+
+def shard_for_group(group_id):
+    """Shard holding a group's tasks, or None if the directory could not be read"""
+    return _shard_for('group', group_id)
+
+def forget_shard(entity, entity_id):
+    """Drop a cached placement, e.g. after reshard.py moved the user or group"""
+    _directory_cache.invalidate((entity, entity_id))
+
+# Task ids. With several shards, new task and group task ids are taken
+# from id_blocks on the global shard instead of each shard's AUTO_INCREMENT,
+# so an id is unique everywhere and survives a move between shards.
+
+ID_BLOCK_SIZE = 100
+_id_blocks = {}
+_id_lock = threading.Lock()
+
+def next_id(table):
+    """A new id for table ('tasks' or 'group_tasks').
+
+    Returns None with a single shard, where AUTO_INCREMENT assigns the id
+    (inserting NULL), and also if no block could be reserved; check
+    is_sharded() to tell the two apart. Each process reserves
+    ID_BLOCK_SIZE ids at a time, so most calls run no query.
+    """
+    if not is_sharded():
+        return None
+    with _id_lock:
+        block = _id_blocks.get(table)
+        if block is None or block[0] >= block[1]:
+            # LAST_INSERT_ID(expr) hands the new value back as the lastrowid
+            end = execute_transaction([(
+                "UPDATE id_blocks SET next_id = LAST_INSERT_ID(next_id + %s) WHERE table_name = %s",
+                (ID_BLOCK_SIZE, table)
+            )], return_last_id=True)
+            if not end:
+                return None
+            block = _id_blocks[table] = [end - ID_BLOCK_SIZE, end]
+        block[0] += 1
+        return block[0] - 1
+
+def is_sharded():
+    return len(SHARDS) > 1
+
+def scatter_gather(keys, shard_of, fetch):
+    """Run fetch(shard, keys_on_shard) on every shard holding some of keys.
+
+    Shards are queried in parallel and their rows concatenated, in no
+    particular order. Inside a time_budget, shards still running when it
+    runs out are left out.
+    """
+    by_shard = {}
+    for key in keys:
+        by_shard.setdefault(shard_of(key), []).append(key)
+    if by_shard.pop(None, None):
+        # Keys whose shard lookup failed are left out
+        _mark_read_failed()
+    if len(by_shard) <= 1:
+        return [row for shard, shard_keys in by_shard.items() for row in fetch(shard, shard_keys) or []]
+    
+    script_ctx = get_script_run_ctx()
+    
+    def run(shard, shard_keys):
+        # Lets st.error in the worker reach the page that asked
+        add_script_run_ctx(threading.current_thread(), script_ctx)
+        return fetch(shard, shard_keys) or []
+    
+    # copy_context keeps the page's QueryLog, tracing span and time budget
+    futures = [
+        _scatter_executor.submit(contextvars.copy_context().run, run, shard, shard_keys)
+        for shard, shard_keys in by_shard.items()
+    ]
+    rows = []
+    for future in futures:
+        remaining = _budget_remaining()
+        try:
+            rows.extend(future.result(timeout=None if remaining is None else max(0, remaining)))
+        except FutureTimeout:
+            # Leave the slow shard out; the page shows the others with a notice
+            _mark_exceeded()
+    return rows
@@ -0,0 +1,135 @@
+"""EXPLAIN every query in tasks.py and groups.py and fail on full scans.
+
+Queries are collected from the source with ast, so new functions are
+checked without registering them anywhere. Each %s placeholder is filled
+with a representative value and the statement is run through EXPLAIN
+against the configured database. Any table accessed with type ALL (full
+table scan) or index (full index scan) fails the check, unless the
+function is listed in ALLOWED_FULL_SCANS.
+
+Run it against a database with realistic data: on empty tables the
+optimizer may pick plans it would never use in production.
+
+    python explain_check.py
+"""
+import ast
+import os
+import re
+import sys
+from datetime import date
+
+import mysql.connector
+
+from db import DB_CONFIG
+
+MODULES = ['tasks.py', 'groups.py']
+
+FULL_SCAN_TYPES = {'ALL', 'index'}
+
+# Functions whose queries are expected to read the whole table
+ALLOWED_FULL_SCANS = {
+    'groups._load_all_groups': "lists every group in the Browse All Groups tab",
+}
+
+SQL_START = re.compile(r'^\s*(SELECT|UPDATE|DELETE)\s')
+
+# The column a placeholder is compared to or assigned to
+PLACEHOLDER_COLUMN = [
+    re.compile(r'(\w+)\s*(?:=|<=|>=|<|>)\s*$'),
+    re.compile(r'(\w+)\s+BETWEEN\s+(?:%s\s+AND\s+)?$', re.IGNORECASE),
+    re.compile(r'(\w+)\s+IN\s*\(\s*$', re.IGNORECASE),
+    re.compile(r'(INTERVAL)\s*$', re.IGNORECASE),
+]
+
+SAMPLE_VALUES = {
+    'deadline': date.today(),
+    'task_status': 'Pending',
+    'invite_code': 'ABCDEFGH',
+    'title': 'Sample task',
+    'priority': 'Low',
+}
+
+
+def _render(node):
+    """Turn a str constant, format template or f-string into SQL, rendering {...} as %s"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        # str.format fields such as {ids} are filled with an IN list later
+        return re.sub(r'\{\w+\}', '%s', node.value)
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(value.value)
+            else:
+                parts.append('%s')
+        return ''.join(parts)
+    return None
+
+
+def collect_queries(path):
+    """Return [(function_name, sql)] for every SQL string in a module"""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    module = os.path.splitext(os.path.basename(path))[0]
+    queries = []
+    for func in ast.walk(tree):
+        if not isinstance(func, ast.FunctionDef):
+            continue
+        nodes = list(ast.walk(func))
+        # The literal pieces of an f-string are visited separately; skip them
+        fstring_parts = {id(part) for node in nodes if isinstance(node, ast.JoinedStr) for part in node.values}
+        for node in nodes:
+            if id(node) in fstring_parts:
+                continue
+            sql = _render(node)
+            if sql and SQL_START.match(sql):
+                queries.append((f"{module}.{func.name}", sql))
+    return queries
+
+
+def sample_params(sql):
+    """Pick a plausible value for each %s based on the column it belongs to"""
+    params = []
+    for match in re.finditer(r'%s', sql):
+        before = sql[:match.start()]
+        column = None
+        for pattern in PLACEHOLDER_COLUMN:
+            found = pattern.search(before)
+            if found:
+                column = found.group(1).lower().split('.')[-1]
+                break
+        params.append(SAMPLE_VALUES.get(column, 1))
+    return tuple(params)
+
+
+def explain(cursor, sql):
+    cursor.execute("EXPLAIN " + sql, sample_params(sql))
+    return cursor.fetchall()
+
+
+def main():
+    base = os.path.dirname(os.path.abspath(__file__))
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor(dictionary=True)
+
+    failures = []
+    checked = 0
+    for module in MODULES:
+        for name, sql in collect_queries(os.path.join(base, module)):
+            checked += 1
+            for row in explain(cursor, sql):
+                if row.get('type') in FULL_SCAN_TYPES and name not in ALLOWED_FULL_SCANS:
+                    failures.append((name, row.get('table'), row.get('type'), ' '.join(sql.split())))
+
+    cursor.close()
+    conn.close()
+
+    for name, table, scan_type, sql in failures:
+        print(f"FULL SCAN ({scan_type}) on {table} in {name}: {sql}")
+    print(f"Checked {checked} queries, {len(failures)} full scan(s)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
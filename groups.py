@@ -1,8 +1,19 @@
 import streamlit as st
 import random
 import string
-from db import execute_query, execute_query_one
-from tasks import calculate_priority
+from cache import TTLCache
+from db import (
+    execute_query, execute_query_one, execute_transaction, is_sharded, next_id, placeholders,
+    shard_for_group, without_time_budget
+)
+from tasks import (
+    calculate_priority, user_version_bump,
+    group_version_bumps, write_with_version_bumps
+)
+
+# Browse-all-groups list, shared by every session in the process
+ALL_GROUPS_CACHE_TTL = 30
+_all_groups_cache = TTLCache('all_groups', ALL_GROUPS_CACHE_TTL)
 
 def generate_invite_code():
     """Generate a random 8-character invite code"""
@@ -11,9 +22,11 @@ def generate_invite_code():
 def create_group(group_name, created_by):
     invite_code = generate_invite_code()
     
-    # Ensure unique invite code
-    while execute_query_one("SELECT group_id FROM student_groups WHERE invite_code = %s", (invite_code,)):
-        invite_code = generate_invite_code()
+    # Ensure unique invite code. The checks below decide what gets written,
+    # so a page's time budget must not skip them.
+    with without_time_budget():
+        while execute_query_one("SELECT group_id FROM student_groups WHERE invite_code = %s", (invite_code,)):
+            invite_code = generate_invite_code()
     
     group_id = execute_query(
         "INSERT INTO student_groups (group_name, created_by, invite_code) VALUES (%s, %s, %s)",
@@ -21,11 +34,16 @@ def create_group(group_name, created_by):
     )
     
     if group_id:
+        _all_groups_cache.invalidate()
+        
         # Add creator as Group Head
-        execute_query(
-            "INSERT INTO group_members (group_id, user_id, member_role) VALUES (%s, %s, %s)",
-            (group_id, created_by, 'Head')
-        )
+        execute_transaction([
+            user_version_bump(created_by),
+            (
+                "INSERT INTO group_members (group_id, user_id, member_role) VALUES (%s, %s, %s)",
+                (group_id, created_by, 'Head')
+            ),
+        ])
     
     return group_id, invite_code
 
@@ -42,86 +60,174 @@ def get_user_groups(user_id):
     return groups or []
 
 def join_group_by_code(invite_code, user_id):
-    # Find group by invite code
-    group = execute_query_one(
-        "SELECT group_id, group_name FROM student_groups WHERE invite_code = %s",
-        (invite_code,)
-    )
-    
-    if not group:
-        return False, "Invalid invite code"
-    
-    # Check if already a member
-    existing = execute_query_one(
-        "SELECT membership_id FROM group_members WHERE group_id = %s AND user_id = %s",
-        (group['group_id'], user_id)
-    )
+    with without_time_budget():
+        # Find group by invite code
+        group = execute_query_one(
+            "SELECT group_id, group_name FROM student_groups WHERE invite_code = %s",
+            (invite_code,)
+        )
+        
+        if not group:
+            return False, "Invalid invite code"
+        
+        # Check if already a member
+        existing = execute_query_one(
+            "SELECT membership_id FROM group_members WHERE group_id = %s AND user_id = %s",
+            (group['group_id'], user_id)
+        )
     
     if existing:
         return False, "Already a member of this group"
     
     # Add as member
-    membership_id = execute_query(
-        "INSERT INTO group_members (group_id, user_id, member_role) VALUES (%s, %s, %s)",
-        (group['group_id'], user_id, 'Member')
-    )
+    membership_id = execute_transaction([
+        *group_version_bumps(group['group_id']),
+        user_version_bump(user_id),
+        (
+            "INSERT INTO group_members (group_id, user_id, member_role) VALUES (%s, %s, %s)",
+            (group['group_id'], user_id, 'Member')
+        ),
+    ], return_last_id=True)
     
     if membership_id:
         return True, f"Successfully joined '{group['group_name']}'"
     return False, "Failed to join group"
 
 def join_group(group_id, user_id):
-    existing = execute_query_one(
-        "SELECT membership_id FROM group_members WHERE group_id = %s AND user_id = %s",
-        (group_id, user_id)
-    )
+    with without_time_budget():
+        existing = execute_query_one(
+            "SELECT membership_id FROM group_members WHERE group_id = %s AND user_id = %s",
+            (group_id, user_id)
+        )
     
     if existing:
         return False, "Already a member"
     
-    membership_id = execute_query(
-        "INSERT INTO group_members (group_id, user_id, member_role) VALUES (%s, %s, %s)",
-        (group_id, user_id, 'Member')
-    )
+    membership_id = execute_transaction([
+        *group_version_bumps(group_id),
+        user_version_bump(user_id),
+        (
+            "INSERT INTO group_members (group_id, user_id, member_role) VALUES (%s, %s, %s)",
+            (group_id, user_id, 'Member')
+        ),
+    ], return_last_id=True)
     
     if membership_id:
         return True, "Joined successfully"
     return False, "Failed to join"
 
 def get_all_groups():
-    groups = execute_query(
+    """All groups, newest first. Served from a short-lived process-wide cache;
+    callers must not modify the returned list."""
+    return _all_groups_cache.get('all', _load_all_groups) or []
+
+def warm_all_groups():
+    """Load the all-groups cache; False if the query failed"""
+    return _all_groups_cache.get('all', _load_all_groups) is not None
+
+def _load_all_groups():
+    # None on failure, which the cache does not keep
+    return execute_query(
         "SELECT sg.*, u.username as creator_name FROM student_groups sg JOIN users u ON sg.created_by = u.user_id ORDER BY sg.created_at DESC",
         fetch=True
     )
-    return groups or []
 
 def add_group_task(group_id, title, deadline, estimated_hours, assigned_to=None):
     priority = calculate_priority(estimated_hours)
-    task_id = execute_query(
-        "INSERT INTO group_tasks (group_id, title, deadline, estimated_hours, priority, assigned_to) VALUES (%s, %s, %s, %s, %s, %s)",
-        (group_id, title, deadline, estimated_hours, priority, assigned_to)
-    )
+    new_id = next_id('group_tasks')
+    if new_id is None and is_sharded():
+        return None
+    task_id = write_with_version_bumps(shard_for_group(group_id), [
+        (
+            "INSERT INTO group_tasks (group_task_id, group_id, title, deadline, estimated_hours, priority, assigned_to) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            (new_id, group_id, title, deadline, estimated_hours, priority, assigned_to)
+        ),
+    ], group_version_bumps(group_id), return_last_id=True)
     return task_id
 
 def get_group_tasks(group_id):
     query = """
-        SELECT gt.*, u.username as assigned_name
-        FROM group_tasks gt
-        LEFT JOIN users u ON gt.assigned_to = u.user_id
-        WHERE gt.group_id = %s
-        ORDER BY gt.deadline ASC
+        SELECT * FROM group_tasks
+        WHERE group_id = %s
+        ORDER BY deadline ASC
     """
-    tasks = execute_query(query, (group_id,), fetch=True)
-    return tasks or []
+    tasks = execute_query(query, (group_id,), fetch=True, shard=shard_for_group(group_id)) or []
+    
+    # users live on the global shard, so assignees are looked up separately
+    assigned_ids = list({t['assigned_to'] for t in tasks if t['assigned_to']})
+    names = {}
+    if assigned_ids:
+        rows = execute_query(
+            f"SELECT user_id, username FROM users WHERE user_id IN ({placeholders(assigned_ids)})",
+            tuple(assigned_ids),
+            fetch=True
+        ) or []
+        names = {row['user_id']: row['username'] for row in rows}
+    for task in tasks:
+        task['assigned_name'] = names.get(task['assigned_to'])
+    return tasks
 
-def update_group_task_status(task_id, status):
-    execute_query(
-        "UPDATE group_tasks SET task_status = %s WHERE group_task_id = %s",
+def write_group_tasks(group_id, query, params):
+    """Run one write on a group's tasks and bump the group's versions.
+
+    query must restrict to the group's rows with "group_id = %s" after the
+    params it is given, so a task id from another group changes nothing.
+    Returns the statement's row counts, or None if the write failed.
+    """
+    return write_with_version_bumps(
+        shard_for_group(group_id),
+        [(query, (*params, group_id))],
+        group_version_bumps(group_id)
+    )
+
+def update_group_task_status(group_id, task_id, status):
+    return write_group_tasks(
+        group_id,
+        "UPDATE group_tasks SET task_status = %s WHERE group_task_id = %s AND group_id = %s",
         (status, task_id)
     )
 
-def delete_group_task(task_id):
-    execute_query("DELETE FROM group_tasks WHERE group_task_id = %s", (task_id,))
+def delete_group_task(group_id, task_id):
+    write_group_tasks(
+        group_id,
+        "DELETE FROM group_tasks WHERE group_task_id = %s AND group_id = %s",
+        (task_id,)
+    )
+
+def update_group_tasks_status(group_id, task_ids, status):
+    """Set the status of several group tasks in one statement"""
+    if not task_ids:
+        return
+    write_group_tasks(
+        group_id,
+        f"UPDATE group_tasks SET task_status = %s WHERE group_task_id IN ({placeholders(task_ids)}) AND group_id = %s",
+        (status, *task_ids)
+    )
+
+def delete_group_tasks(group_id, task_ids):
+    """Delete several group tasks in one statement"""
+    if not task_ids:
+        return
+    write_group_tasks(
+        group_id,
+        f"DELETE FROM group_tasks WHERE group_task_id IN ({placeholders(task_ids)}) AND group_id = %s",
+        task_ids
+    )
+
+def reschedule_group_tasks(group_id, task_ids, delta_days):
+    """Shift the deadline of several group tasks by delta_days"""
+    if not task_ids:
+        return
+    write_group_tasks(
+        group_id,
+        f"UPDATE group_tasks SET deadline = DATE_ADD(deadline, INTERVAL %s DAY), reminder_sent = FALSE WHERE group_task_id IN ({placeholders(task_ids)}) AND group_id = %s",
+        (delta_days, *task_ids)
+    )
+
+def get_group_version(group_id):
+    """Current workload version of a group, or None if it could not be read"""
+    row = execute_query_one("SELECT workload_version FROM student_groups WHERE group_id = %s", (group_id,))
+    return row['workload_version'] if row else None
 
 def get_group_members(group_id):
     query = """
@@ -152,23 +258,27 @@ def get_group_by_id(group_id):
         (group_id,)
     )
 
-def assign_task_to_member(task_id, user_id):
-    execute_query(
-        "UPDATE group_tasks SET assigned_to = %s WHERE group_task_id = %s",
+def assign_task_to_member(group_id, task_id, user_id):
+    write_group_tasks(
+        group_id,
+        "UPDATE group_tasks SET assigned_to = %s WHERE group_task_id = %s AND group_id = %s",
         (user_id, task_id)
     )
 
-def update_group_task(task_id, title, deadline, estimated_hours, assigned_to):
+def update_group_task(group_id, task_id, title, deadline, estimated_hours, assigned_to):
     priority = calculate_priority(estimated_hours)
-    execute_query(
-        "UPDATE group_tasks SET title = %s, deadline = %s, estimated_hours = %s, priority = %s, assigned_to = %s WHERE group_task_id = %s",
+    write_group_tasks(
+        group_id,
+        "UPDATE group_tasks SET title = %s, deadline = %s, estimated_hours = %s, priority = %s, assigned_to = %s WHERE group_task_id = %s AND group_id = %s",
         (title, deadline, estimated_hours, priority, assigned_to, task_id)
     )
 
 def get_group_analytics(group_id):
     """Get analytics for a specific group"""
-    tasks = get_group_tasks(group_id)
-    
+    return summarize_group_tasks(get_group_tasks(group_id))
+
+def summarize_group_tasks(tasks):
+    """Status counts and hour totals for a list of group task rows"""
     total_tasks = len(tasks)
     completed_tasks = len([t for t in tasks if t['task_status'] == 'Completed'])
     in_progress_tasks = len([t for t in tasks if t['task_status'] == 'In Progress'])
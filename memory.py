@@ -0,0 +1,249 @@
+"""Per-session memory accounting for sizing app servers.
+
+Two views, served as JSON at /memory on the ops listener and summarized
+in /metrics:
+
+- Per session: the retained size of each live session's st.session_state
+  (walked object by object) plus the export files Streamlit keeps in memory
+  for its download buttons. This is what a session costs between reruns.
+  /metrics reuses a sample up to MEMORY_SESSION_SAMPLE_SECONDS old, so
+  scrapes don't walk every session's state each time.
+- Per consumer: with MEMORY_TRACEMALLOC=1, a tracemalloc snapshot of the
+  whole process grouped into task lists (get_user_tasks and friends),
+  export buffers, Plotly figures, session state and other, by the frames
+  that allocated each block. tracemalloc slows allocation down, so this is
+  opt-in; MEMORY_SAMPLE_SECONDS refreshes the snapshot in the background,
+  otherwise it is taken when /memory is requested.
+
+Reading other sessions relies on Streamlit runtime internals; anything that
+cannot be read is reported as missing rather than failing the endpoint.
+"""
+import inspect
+import io
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+
+from metrics import Gauge
+from ops_server import route
+
+MEMORY_TRACEMALLOC = os.environ.get('MEMORY_TRACEMALLOC') == '1'
+MEMORY_TRACE_FRAMES = int(os.environ.get('MEMORY_TRACE_FRAMES', 30))
+MEMORY_SAMPLE_SECONDS = float(os.environ.get('MEMORY_SAMPLE_SECONDS', 0))
+MEMORY_SESSION_SAMPLE_SECONDS = float(os.environ.get('MEMORY_SESSION_SAMPLE_SECONDS', 60))
+TOP_KEYS = 5
+
+# Never walked into: shared by every session and not session data
+_OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType)
+
+if MEMORY_TRACEMALLOC and not tracemalloc.is_tracing():
+    tracemalloc.start(MEMORY_TRACE_FRAMES)
+
+_latest = {'consumers': None, 'taken_at': None}
+_sampler_lock = threading.Lock()
+_sampler_started = False
+_sessions_sample = {'sessions': [], 'taken_at': None}
+_sessions_lock = threading.Lock()
+
+
+def deep_size(obj):
+    """Bytes reachable from obj, counting each object once.
+
+    Objects shared between sessions, such as cached group lists, are
+    counted in every session that holds them.
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _OPAQUE_TYPES):
+            continue
+        seen.add(id(current))
+        # BytesIO's __sizeof__ includes its buffer
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif isinstance(current, (str, bytes, bytearray, io.BytesIO, int, float)):
+            continue
+        elif hasattr(current, '__dict__'):
+            stack.append(vars(current))
+    return total
+
+
+def _runtime():
+    from streamlit.runtime import Runtime
+    return Runtime.instance() if Runtime.exists() else None
+
+
+def _media_bytes_by_session(runtime):
+    """Bytes of in-memory download/media files held for each session"""
+    sizes = {}
+    try:
+        manager = runtime.media_file_mgr
+        files = manager._storage._files_by_id
+        for session_id, by_coord in manager._files_by_session_and_coord.items():
+            sizes[session_id] = sum(len(files[f].content) for f in by_coord.values() if f in files)
+    except AttributeError:
+        pass
+    return sizes
+
+
+def session_report():
+    """[{session, user_id, bytes, media_bytes, top_keys}] for live sessions, largest first"""
+    runtime = _runtime()
+    if runtime is None:
+        return []
+    media = _media_bytes_by_session(runtime)
+    sessions = []
+    for info in runtime._session_mgr.list_active_sessions():
+        session = info.session
+        try:
+            state = dict(session.session_state.filtered_state)
+            key_sizes = sorted(((key, deep_size(value)) for key, value in state.items()),
+                               key=lambda item: item[1], reverse=True)
+        except (AttributeError, RuntimeError):
+            # State changed under us (the session is mid-run); skip this sample
+            continue
+        sessions.append({
+            'session': session.id,
+            'user_id': state.get('user_id'),
+            'bytes': sum(size for _, size in key_sizes),
+            'media_bytes': media.get(session.id, 0),
+            'top_keys': key_sizes[:TOP_KEYS],
+        })
+    sessions.sort(key=lambda s: s['bytes'] + s['media_bytes'], reverse=True)
+    return sessions
+
+
+def _line_ranges(*functions):
+    ranges = []
+    for func in functions:
+        lines, start = inspect.getsourcelines(inspect.unwrap(func))
+        ranges.append((os.path.abspath(inspect.getsourcefile(inspect.unwrap(func))), start, start + len(lines)))
+    return ranges
+
+
+def _consumer_rules():
+    """(consumer, frame predicate) in priority order"""
+    from tasks import get_user_tasks, get_archived_user_tasks, get_all_user_group_tasks, get_archived_user_group_tasks
+    from groups import get_group_tasks
+    from utils import export_tasks_to_excel, export_report_to_pdf
+
+    task_lists = _line_ranges(get_user_tasks, get_archived_user_tasks, get_all_user_group_tasks,
+                              get_archived_user_group_tasks, get_group_tasks)
+    exports = _line_ranges(export_tasks_to_excel, export_report_to_pdf)
+
+    def within(ranges):
+        files = {path for path, _, _ in ranges}
+
+        def matches(frame):
+            filename = os.path.abspath(frame.filename)
+            return filename in files and any(
+                filename == path and start <= frame.lineno < end for path, start, end in ranges
+            )
+        return matches
+
+    sep = os.sep
+    return [
+        ('exports', within(exports)),
+        ('plotly figures', lambda frame: f"{sep}plotly{sep}" in frame.filename),
+        ('task lists', within(task_lists)),
+        ('session state', lambda frame: f"streamlit{sep}runtime{sep}state" in frame.filename),
+        ('streamlit', lambda frame: f"{sep}streamlit{sep}" in frame.filename),
+    ]
+
+
+def consumer_report():
+    """Traced bytes per consumer from a fresh tracemalloc snapshot"""
+    if not tracemalloc.is_tracing():
+        return None
+    rules = _consumer_rules()
+    totals = {name: 0 for name, _ in rules}
+    totals['other'] = 0
+    snapshot = tracemalloc.take_snapshot()
+    for stat in snapshot.statistics('traceback'):
+        frames = list(stat.traceback)
+        for name, matches in rules:
+            if any(matches(frame) for frame in frames):
+                totals[name] += stat.size
+                break
+        else:
+            totals['other'] += stat.size
+    return totals
+
+
+def recent_session_report():
+    """session_report(), reusing one taken in the last MEMORY_SESSION_SAMPLE_SECONDS"""
+    with _sessions_lock:
+        taken_at = _sessions_sample['taken_at']
+        if taken_at is None or time.monotonic() - taken_at >= MEMORY_SESSION_SAMPLE_SECONDS:
+            _sessions_sample['sessions'] = session_report()
+            _sessions_sample['taken_at'] = time.monotonic()
+        return _sessions_sample['sessions']
+
+
+def _refresh_consumers():
+    _latest['consumers'] = consumer_report()
+    _latest['taken_at'] = time.time()
+
+
+def _run_sampler():
+    while True:
+        _refresh_consumers()
+        time.sleep(MEMORY_SAMPLE_SECONDS)
+
+
+def start_memory_accounting():
+    """Start the background sampler if MEMORY_SAMPLE_SECONDS is set; runs once"""
+    global _sampler_started
+    with _sampler_lock:
+        if _sampler_started or not (MEMORY_TRACEMALLOC and MEMORY_SAMPLE_SECONDS > 0):
+            return
+        _sampler_started = True
+    threading.Thread(target=_run_sampler, name='memory-sampler', daemon=True).start()
+
+
+@route('/memory')
+def memory():
+    if not _sampler_started:
+        _refresh_consumers()
+    report = {
+        'sessions': session_report(),
+        'consumers': _latest['consumers'],
+        'consumers_taken_at': _latest['taken_at'],
+    }
+    return 200, 'application/json', json.dumps(report, default=str)
+
+
+def _session_gauges():
+    sessions = recent_session_report()
+    sizes = [s['bytes'] + s['media_bytes'] for s in sessions]
+    return [
+        (('sum',), sum(sizes)),
+        (('max',), max(sizes, default=0)),
+        (('mean',), sum(sizes) / len(sizes) if sizes else 0),
+    ]
+
+
+def _consumer_gauges():
+    return [((name,), size) for name, size in sorted((_latest['consumers'] or {}).items())]
+
+
+def _active_sessions():
+    runtime = _runtime()
+    return [((), len(runtime._session_mgr.list_active_sessions()) if runtime else 0)]
+
+
+Gauge('app_sessions_active', "Live Streamlit sessions", (), _active_sessions)
+Gauge('app_session_memory_bytes', "Retained memory per session (session_state plus media files)",
+      ('stat',), _session_gauges)
+Gauge('app_traced_memory_bytes', "Traced allocations by consumer at the last memory sample",
+      ('consumer',), _consumer_gauges)
@@ -0,0 +1,181 @@
+"""Prometheus metrics for the app server, served at /metrics on the ops listener.
+
+Counters and histograms are process-wide and updated from the page code;
+gauges for the connection pool and the shared caches are read when the
+endpoint is scraped.
+
+    curl http://127.0.0.1:8502/metrics
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from cache import CACHES
+from db import add_query_hook, pool_stats, replica_stats
+from ops_server import route
+from utils import add_builder_hook
+
+QUERY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Every metric, in exposition order
+REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """A monotonically increasing count per label set"""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label set"""
+
+    def __init__(self, name, help_text, labels=(), buckets=PAGE_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [bucket counts, sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, seconds, *label_values):
+        with self._lock:
+            value = self._values.get(label_values)
+            if value is None:
+                value = self._values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    value[0][i] += 1
+            value[1] += seconds
+            value[2] += 1
+
+    @contextmanager
+    def time(self, *label_values):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(counts), total, count) for k, (counts, total, count) in self._values.items())
+        for label_values, counts, total, count in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_labels(self.labels, label_values, [('le', bound)])} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_labels(self.labels, label_values, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {count}")
+        return lines
+
+
+class Gauge:
+    """A value read at scrape time: fn() returns [(label_values, value)].
+
+    kind='counter' exposes a running total kept elsewhere, such as the hit
+    and miss counts of a TTLCache.
+    """
+
+    def __init__(self, name, help_text, labels, fn, kind='gauge'):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.fn = fn
+        self.kind = kind
+        REGISTRY.append(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for label_values, value in self.fn():
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+def _pool_gauges():
+    stats = pool_stats()
+    return [((state,), stats[state]) for state in ('size', 'idle', 'in_use') if stats[state] is not None]
+
+
+def _pool_waits():
+    return [((), pool_stats()['waits_total'])]
+
+
+def _replica_lags():
+    return [((shard, replica), lag) for shard, replica, lag, _ in replica_stats() if lag is not None]
+
+
+def _replica_health():
+    return [((shard, replica), int(healthy)) for shard, replica, _, healthy in replica_stats()]
+
+
+def _cache_hit_ratios():
+    return [((name,), cache.hit_ratio()) for name, cache in sorted(CACHES.items())]
+
+
+def _cache_lookups():
+    values = []
+    for name, cache in sorted(CACHES.items()):
+        values.append(((name, 'hit'), cache.hits))
+        values.append(((name, 'miss'), cache.misses))
+    return values
+
+
+QUERY_SECONDS = Histogram('app_query_seconds', "Statement latency by SQL fingerprint",
+                          ('fingerprint',), QUERY_BUCKETS)
+PAGE_SECONDS = Histogram('app_page_render_seconds', "Page function render time", ('page',))
+BUILDER_SECONDS = Histogram('app_builder_seconds', "Chart and export builder time", ('builder',))
+RERUNS = Counter('app_reruns_total', "Streamlit script runs")
+LOGINS = Counter('app_logins_total', "Login attempts by result", ('result',))
+REMINDER_SWEEPS = Counter('app_reminder_sweeps_total', "Reminder checks run for a page")
+Gauge('app_db_pool_connections', "Connection pool size, idle and in-use connections", ('state',), _pool_gauges)
+Gauge('app_db_pool_waits_total', "Connection requests that found the pool exhausted and waited", (),
+      _pool_waits, kind='counter')
+Gauge('app_db_replica_lag_seconds', "Replication lag of each read replica", ('shard', 'replica'), _replica_lags)
+Gauge('app_db_replica_healthy', "1 if a read replica is taking reads, 0 if it is skipped",
+      ('shard', 'replica'), _replica_health)
+Gauge('app_cache_hit_ratio', "Hit ratio of each shared read cache", ('cache',), _cache_hit_ratios)
+Gauge('app_cache_lookups_total', "Lookups of each shared read cache by result", ('cache', 'result'),
+      _cache_lookups, kind='counter')
+
+
+add_query_hook(lambda fp, query, seconds: QUERY_SECONDS.observe(seconds, fp))
+add_builder_hook(lambda name, seconds: BUILDER_SECONDS.observe(seconds, name))
+
+
+@route('/metrics')
+def metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return 200, 'text/plain; version=0.0.4', '\n'.join(lines) + '\n'
@@ -0,0 +1,163 @@
+"""Versioned schema migrations.
+
+Migrations live in migrations/ as NNN_description.sql and are applied in
+version order. Applied versions are recorded in the schema_migrations table,
+so running this script again only applies what is new.
+
+    python migrate.py              # apply pending migrations
+    python migrate.py --status     # list applied and pending migrations
+    python migrate.py --baseline 1 # mark 001 as applied on a database
+                                   # built by the old schema.sql/fix_columns.sql
+
+With DB_SHARDS set, every shard gets the same schema and each command runs
+on every shard in turn.
+"""
+import argparse
+import os
+import re
+import sys
+
+import mysql.connector
+from mysql.connector import Error
+
+from db import SHARDS
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+
+def list_migrations():
+    """Return [(version, name, path)] for every migration file, in order"""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(migrations)
+
+
+def split_statements(sql):
+    """Split a migration file into statements, dropping -- comments"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [stmt.strip() for stmt in '\n'.join(lines).split(';') if stmt.strip()]
+
+
+def connect(shard=0):
+    """Connect to a shard's database, creating it if it does not exist yet"""
+    config = dict(SHARDS[shard])
+    database = config.pop('database')
+    conn = mysql.connector.connect(**config)
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database}` DEFAULT CHARSET utf8mb4")
+    cursor.execute(f"USE `{database}`")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    cursor.close()
+    return conn
+
+
+def applied_versions(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT version FROM schema_migrations")
+    versions = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return versions
+
+
+def record_version(conn, version, name):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+    conn.commit()
+    cursor.close()
+
+
+def apply_migration(conn, version, name, path):
+    """Run one migration file and record it.
+
+    MySQL commits DDL implicitly, so a failing migration can leave earlier
+    statements of the same file applied; keep one concern per file.
+    """
+    with open(path, encoding='utf-8') as f:
+        statements = split_statements(f.read())
+
+    cursor = conn.cursor()
+    for statement in statements:
+        cursor.execute(statement)
+    conn.commit()
+    cursor.close()
+    record_version(conn, version, name)
+
+
+def shard_label(shard):
+    return f"[shard {shard}] " if len(SHARDS) > 1 else ""
+
+
+def migrate(target=None):
+    """Apply every pending migration up to and including target, on every shard"""
+    for shard in range(len(SHARDS)):
+        conn = connect(shard)
+        try:
+            done = applied_versions(conn)
+            for version, name, path in list_migrations():
+                if version in done or (target is not None and version > target):
+                    continue
+                print(f"{shard_label(shard)}Applying {version:03d}_{name}...")
+                apply_migration(conn, version, name, path)
+        finally:
+            conn.close()
+
+
+def baseline(version):
+    """Mark migrations up to version as applied without running them, on every shard"""
+    for shard in range(len(SHARDS)):
+        conn = connect(shard)
+        try:
+            done = applied_versions(conn)
+            for v, name, _ in list_migrations():
+                if v <= version and v not in done:
+                    record_version(conn, v, name)
+                    print(f"{shard_label(shard)}Marked {v:03d}_{name} as applied")
+        finally:
+            conn.close()
+
+
+def status():
+    for shard in range(len(SHARDS)):
+        conn = connect(shard)
+        try:
+            done = applied_versions(conn)
+        finally:
+            conn.close()
+        for version, name, _ in list_migrations():
+            state = "applied" if version in done else "pending"
+            print(f"{shard_label(shard)}{version:03d}_{name}: {state}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument('--status', action='store_true', help="show applied and pending migrations")
+    parser.add_argument('--target', type=int, help="stop after this version")
+    parser.add_argument('--baseline', type=int, metavar='VERSION',
+                        help="mark migrations up to VERSION as applied without running them")
+    args = parser.parse_args()
+
+    try:
+        if args.status:
+            status()
+        elif args.baseline is not None:
+            baseline(args.baseline)
+        else:
+            migrate(args.target)
+    except Error as e:
+        print(f"Migration failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,11 @@
-CREATE DATABASE IF NOT EXISTS academic_burnout_db;
-USE academic_burnout_db;
+-- Baseline schema: schema.sql plus the columns previously added by fix_columns.sql
 
 CREATE TABLE IF NOT EXISTS users (
     user_id INT AUTO_INCREMENT PRIMARY KEY,
     username VARCHAR(50) UNIQUE NOT NULL,
     email VARCHAR(100) UNIQUE NOT NULL,
     password_hash VARCHAR(255) NOT NULL,
+    reset_token VARCHAR(255) NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     INDEX idx_username (username),
     INDEX idx_email (email)
@@ -18,6 +18,8 @@ CREATE TABLE IF NOT EXISTS tasks (
     deadline DATE NOT NULL,
     estimated_hours INT NOT NULL,
     priority VARCHAR(20) NOT NULL,
+    task_status VARCHAR(20) DEFAULT 'Pending',
+    reminder_sent BOOLEAN DEFAULT FALSE,
     google_event_id VARCHAR(255) NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
@@ -57,6 +59,7 @@ CREATE TABLE IF NOT EXISTS group_tasks (
     estimated_hours INT NOT NULL,
     priority VARCHAR(20) NOT NULL,
     task_status VARCHAR(20) DEFAULT 'Pending',
+    reminder_sent BOOLEAN DEFAULT FALSE,
     assigned_to INT NULL,
     google_event_id VARCHAR(255) NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -65,4 +68,4 @@ CREATE TABLE IF NOT EXISTS group_tasks (
     INDEX idx_group_deadline (group_id, deadline),
     INDEX idx_assigned (assigned_to),
     INDEX idx_google_event (google_event_id)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
\ No newline at end of file
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
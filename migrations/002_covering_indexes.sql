@@ -0,0 +1,21 @@
+-- Composite indexes for the status and reminder filters in tasks.py and groups.py.
+-- Despite the file name, the task indexes are not covering: those queries
+-- select whole rows, so each match still reads its row. The indexes let a
+-- filter seek straight to one user's or group's rows in the wanted state,
+-- already in deadline order, instead of scanning all of them.
+
+-- get_completed_tasks, bulk status views
+CREATE INDEX idx_user_status_deadline ON tasks (user_id, task_status, deadline);
+
+-- get_tasks_needing_reminder (individual)
+CREATE INDEX idx_user_reminder_deadline ON tasks (user_id, reminder_sent, deadline);
+
+-- get_group_analytics, group status views
+CREATE INDEX idx_group_status_deadline ON group_tasks (group_id, task_status, deadline);
+
+-- get_tasks_needing_reminder (group)
+CREATE INDEX idx_group_reminder_deadline ON group_tasks (group_id, reminder_sent, deadline);
+
+-- Membership lookups by user resolve group_id and role from the index alone
+CREATE INDEX idx_user_group_role ON group_members (user_id, group_id, member_role);
+DROP INDEX idx_user ON group_members;
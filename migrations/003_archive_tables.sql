@@ -0,0 +1,30 @@
+-- Compact archive tier for completed tasks moved out of the hot tables by archive.py
+
+CREATE TABLE tasks_archive (
+    task_id INT PRIMARY KEY,
+    user_id INT NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    deadline DATE NOT NULL,
+    estimated_hours INT NOT NULL,
+    priority VARCHAR(20) NOT NULL,
+    task_status VARCHAR(20) NOT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_user_deadline (user_id, deadline)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 ROW_FORMAT=COMPRESSED;
+
+CREATE TABLE group_tasks_archive (
+    group_task_id INT PRIMARY KEY,
+    group_id INT NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    deadline DATE NOT NULL,
+    estimated_hours INT NOT NULL,
+    priority VARCHAR(20) NOT NULL,
+    task_status VARCHAR(20) NOT NULL,
+    assigned_to INT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_group_deadline (group_id, deadline)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 ROW_FORMAT=COMPRESSED;
+
+-- Lets the archive job find old completed rows without scanning every user
+CREATE INDEX idx_status_deadline ON tasks (task_status, deadline);
+CREATE INDEX idx_status_deadline ON group_tasks (task_status, deadline);
@@ -0,0 +1,36 @@
+-- Range-partition tasks and group_tasks by deadline, one partition per term
+-- (spring: Jan-Jun, fall: Jul-Dec). New terms are added and old terms dropped
+-- with partitions.py.
+--
+-- MySQL does not allow foreign keys on partitioned tables, and every unique
+-- key must include the partitioning column, so the foreign keys are dropped
+-- and deadline joins the primary key. Deleting a user or group no longer
+-- cascades to these tables; archive.py deletes the orphaned rows (and clears
+-- assignees that no longer exist) on its next run.
+
+ALTER TABLE tasks DROP FOREIGN KEY tasks_ibfk_1;
+ALTER TABLE tasks DROP PRIMARY KEY, ADD PRIMARY KEY (task_id, deadline);
+ALTER TABLE tasks PARTITION BY RANGE COLUMNS (deadline) (
+    PARTITION p_before_2025 VALUES LESS THAN ('2025-01-01'),
+    PARTITION p_2025_spring VALUES LESS THAN ('2025-07-01'),
+    PARTITION p_2025_fall VALUES LESS THAN ('2026-01-01'),
+    PARTITION p_2026_spring VALUES LESS THAN ('2026-07-01'),
+    PARTITION p_2026_fall VALUES LESS THAN ('2027-01-01'),
+    PARTITION p_2027_spring VALUES LESS THAN ('2027-07-01'),
+    PARTITION p_2027_fall VALUES LESS THAN ('2028-01-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+ALTER TABLE group_tasks DROP FOREIGN KEY group_tasks_ibfk_1;
+ALTER TABLE group_tasks DROP FOREIGN KEY group_tasks_ibfk_2;
+ALTER TABLE group_tasks DROP PRIMARY KEY, ADD PRIMARY KEY (group_task_id, deadline);
+ALTER TABLE group_tasks PARTITION BY RANGE COLUMNS (deadline) (
+    PARTITION p_before_2025 VALUES LESS THAN ('2025-01-01'),
+    PARTITION p_2025_spring VALUES LESS THAN ('2025-07-01'),
+    PARTITION p_2025_fall VALUES LESS THAN ('2026-01-01'),
+    PARTITION p_2026_spring VALUES LESS THAN ('2026-07-01'),
+    PARTITION p_2026_fall VALUES LESS THAN ('2027-01-01'),
+    PARTITION p_2027_spring VALUES LESS THAN ('2027-07-01'),
+    PARTITION p_2027_fall VALUES LESS THAN ('2028-01-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
@@ -0,0 +1,5 @@
+-- Monotonic per-user and per-group version stamps, bumped by every write in
+-- tasks.py and groups.py so caches can validate with a primary-key lookup
+
+ALTER TABLE users ADD COLUMN workload_version BIGINT UNSIGNED NOT NULL DEFAULT 0;
+ALTER TABLE student_groups ADD COLUMN workload_version BIGINT UNSIGNED NOT NULL DEFAULT 0;
@@ -0,0 +1,12 @@
+-- Login and navigation state of app sessions, shared by every app server so
+-- any replica can serve a browser that reconnects (see session_store.py)
+
+CREATE TABLE app_sessions (
+    session_id CHAR(32) PRIMARY KEY,
+    user_id INT NOT NULL,
+    state TEXT NOT NULL,
+    expires_at DATETIME NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_expires (expires_at),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
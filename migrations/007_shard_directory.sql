@@ -0,0 +1,30 @@
+-- Sharding support, used when DB_SHARDS lists several shards (see db.py).
+-- Both tables are only read on the global shard.
+
+-- Where each user's and group's task rows live
+CREATE TABLE shard_directory (
+    entity ENUM('user', 'group') NOT NULL,
+    entity_id INT NOT NULL,
+    shard SMALLINT UNSIGNED NOT NULL,
+    moved_at TIMESTAMP NULL,
+    PRIMARY KEY (entity, entity_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Next free task ids, handed out in blocks so ids stay unique across shards
+-- and rows keep their ids when reshard.py moves them
+CREATE TABLE id_blocks (
+    table_name VARCHAR(64) PRIMARY KEY,
+    next_id INT UNSIGNED NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO id_blocks (table_name, next_id)
+SELECT 'tasks', GREATEST(
+    COALESCE((SELECT MAX(task_id) FROM tasks), 0),
+    COALESCE((SELECT MAX(task_id) FROM tasks_archive), 0)
+) + 1;
+
+INSERT INTO id_blocks (table_name, next_id)
+SELECT 'group_tasks', GREATEST(
+    COALESCE((SELECT MAX(group_task_id) FROM group_tasks), 0),
+    COALESCE((SELECT MAX(group_task_id) FROM group_tasks_archive), 0)
+) + 1;
@@ -0,0 +1,5 @@
+-- When each user last ran a page or an API request, recorded at most once
+-- per session_store.HEARTBEAT_SECONDS. reshard.py won't move the rows of a
+-- user or group that was active recently.
+
+ALTER TABLE users ADD COLUMN last_seen_at TIMESTAMP NULL;
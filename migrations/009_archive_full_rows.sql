@@ -0,0 +1,12 @@
+-- Keep every column of a task when archive.py moves it, so an archived row
+-- still knows its calendar event and when it was created
+
+ALTER TABLE tasks_archive
+    ADD COLUMN reminder_sent BOOLEAN DEFAULT FALSE,
+    ADD COLUMN google_event_id VARCHAR(255) NULL,
+    ADD COLUMN created_at TIMESTAMP NULL;
+
+ALTER TABLE group_tasks_archive
+    ADD COLUMN reminder_sent BOOLEAN DEFAULT FALSE,
+    ADD COLUMN google_event_id VARCHAR(255) NULL,
+    ADD COLUMN created_at TIMESTAMP NULL;
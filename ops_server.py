@@ -0,0 +1,78 @@
+"""Small HTTP listener for operational endpoints, run beside Streamlit.
+
+Modules register handlers with @route(path); each handler returns
+(status, content_type, body). The listener runs in a daemon thread of the
+app server process, on OPS_PORT (default 8502); OPS_PORT=0 turns it off.
+If the port is taken, e.g. by a second app process on the same host, the
+app runs without it and the failure is logged.
+"""
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OPS_HOST = os.environ.get('OPS_HOST', '127.0.0.1')
+OPS_PORT = int(os.environ.get('OPS_PORT', 8502))
+
+ROUTES = {}
+
+_LOGGER = logging.getLogger(__name__)
+
+_server = None
+_started = False
+_server_lock = threading.Lock()
+
+
+def route(path):
+    """Register a GET handler for path"""
+    def register(handler):
+        ROUTES[path] = handler
+        return handler
+    return register
+
+
+@route('/live')
+def live():
+    return 200, 'text/plain', 'ok\n'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        handler = ROUTES.get(self.path.split('?', 1)[0])
+        if handler is None:
+            status, content_type, body = 404, 'text/plain', 'not found\n'
+        else:
+            status, content_type, body = handler()
+
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Load balancer probes would flood the server log
+        pass
+
+
+def start_ops_server(host=OPS_HOST, port=OPS_PORT):
+    """Start the listener once per process; later calls are no-ops.
+
+    Returns the server, or None if it is turned off or could not bind.
+    """
+    global _server, _started
+    with _server_lock:
+        if _started:
+            return _server
+        _started = True
+        if not port:
+            return None
+        try:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError as e:
+            _LOGGER.warning("Ops listener not started on %s:%s: %s", host, port, e)
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name='ops-server', daemon=True).start()
+    return _server
@@ -0,0 +1,103 @@
+"""Manage the per-term deadline partitions of tasks and group_tasks.
+
+    python partitions.py list
+    python partitions.py add-term p_2028_spring 2028-07-01
+    python partitions.py drop-term p_2025_spring
+
+add-term splits the catch-all p_future partition, so it only works for a
+term that starts after the last named partition. drop-term removes every row
+of that term from both tables in one metadata operation; run archive.py
+first if completed tasks from the term should be kept. Every command runs on
+every shard listed in DB_SHARDS, and exits non-zero at the first shard
+where it fails.
+"""
+import argparse
+import re
+import sys
+
+from db import SHARDS, execute_query
+
+PARTITIONED_TABLES = ['tasks', 'group_tasks']
+PARTITION_NAME = re.compile(r'^p_\w+$')
+
+
+def list_partitions(shard=0):
+    rows = execute_query(
+        """
+            SELECT TABLE_NAME AS table_name, PARTITION_NAME AS partition_name,
+                   PARTITION_DESCRIPTION AS less_than, TABLE_ROWS AS table_rows
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ('tasks', 'group_tasks')
+            ORDER BY TABLE_NAME, PARTITION_ORDINAL_POSITION
+        """,
+        fetch=True,
+        shard=shard
+    )
+    if rows is None:
+        raise RuntimeError(f"could not read the partitions of shard {shard}")
+    return rows
+
+
+def add_term(name, ends_before):
+    """Add a term partition holding deadlines before ends_before (YYYY-MM-DD), on every shard"""
+    for shard in range(len(SHARDS)):
+        for table in PARTITIONED_TABLES:
+            result = execute_query(
+                f"""
+                    ALTER TABLE {table} REORGANIZE PARTITION p_future INTO (
+                        PARTITION {name} VALUES LESS THAN ('{ends_before}'),
+                        PARTITION p_future VALUES LESS THAN (MAXVALUE)
+                    )
+                """,
+                shard=shard
+            )
+            if result is None:
+                raise RuntimeError(f"adding {name} to {table} on shard {shard} failed")
+
+
+def drop_term(name):
+    """Drop a term partition, and its rows, from both task tables on every shard"""
+    for shard in range(len(SHARDS)):
+        for table in PARTITIONED_TABLES:
+            if execute_query(f"ALTER TABLE {table} DROP PARTITION {name}", shard=shard) is None:
+                raise RuntimeError(f"dropping {name} from {table} on shard {shard} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage deadline partitions")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list')
+    add = sub.add_parser('add-term')
+    add.add_argument('name')
+    add.add_argument('ends_before', help="first date not in the term, YYYY-MM-DD")
+    drop = sub.add_parser('drop-term')
+    drop.add_argument('name')
+    args = parser.parse_args()
+
+    if args.command != 'list' and (not PARTITION_NAME.match(args.name) or args.name == 'p_future'):
+        print(f"Invalid partition name: {args.name}", file=sys.stderr)
+        return 1
+
+    if args.command == 'add-term' and not re.match(r'^\d{4}-\d{2}-\d{2}$', args.ends_before):
+        print(f"Invalid date: {args.ends_before}", file=sys.stderr)
+        return 1
+
+    try:
+        if args.command == 'list':
+            for shard in range(len(SHARDS)):
+                if len(SHARDS) > 1:
+                    print(f"shard {shard}:")
+                for row in list_partitions(shard):
+                    print(f"{row['table_name']:12} {row['partition_name']:16} < {row['less_than']:14} ~{row['table_rows']} rows")
+        elif args.command == 'add-term':
+            add_term(args.name, args.ends_before)
+        else:
+            drop_term(args.name)
+    except RuntimeError as e:
+        print(f"{args.command} failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
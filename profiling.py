@@ -0,0 +1,100 @@
+"""Per-page profiling for admins.
+
+Users listed in ADMIN_USERS (comma-separated usernames) get a "Profile
+pages" switch in the sidebar. While it is on, each page render runs under
+cProfile; the page then shows where its time went (database, Streamlit
+element calls, the rest of the Python) and the top functions, and the raw
+profile is saved to PROFILE_DIR for offline viewing, e.g. with
+`snakeviz profiles/reports-20261019-142501.prof` or `flameprof`.
+"""
+import cProfile
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+
+ADMIN_USERS = {name.strip() for name in os.environ.get('ADMIN_USERS', '').split(',') if name.strip()}
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+TOP_FUNCTIONS = 15
+
+STREAMLIT_DIR = os.path.dirname(st.__file__)
+
+
+def is_admin(username):
+    return username in ADMIN_USERS
+
+
+class PageProfile:
+    def __init__(self, name, query_log):
+        self.name = name
+        self.query_log = query_log
+        self.profiler = cProfile.Profile()
+        self.seconds = 0.0
+        self.path = None
+
+    def stats(self):
+        return pstats.Stats(self.profiler)
+
+    def split(self):
+        """Seconds spent in the database, in Streamlit calls and in the rest"""
+        stats = self.stats()
+        rendering = sum(
+            tottime for (filename, _, _), (_, _, tottime, _, _) in stats.stats.items()
+            if filename.startswith(STREAMLIT_DIR)
+        )
+        db = self.query_log.total_seconds
+        return {
+            'Database': db,
+            'Rendering': rendering,
+            'Python': max(0.0, self.seconds - db - rendering),
+        }
+
+    def top_functions(self, limit=TOP_FUNCTIONS):
+        rows = []
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in self.stats().stats.items():
+            rows.append({
+                'function': f"{function} ({os.path.basename(filename)}:{line})",
+                'calls': calls,
+                'own ms': round(tottime * 1000, 2),
+                'cumulative ms': round(cumtime * 1000, 2),
+            })
+        rows.sort(key=lambda row: row['own ms'], reverse=True)
+        return rows[:limit]
+
+    def save(self):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        self.path = os.path.join(PROFILE_DIR, f"{self.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.prof")
+        self.profiler.dump_stats(self.path)
+        return self.path
+
+
+@contextmanager
+def profile_page(name, query_log, enabled):
+    """Profile the block when enabled; yields a PageProfile, or None"""
+    if not enabled:
+        yield None
+        return
+
+    profile = PageProfile(name, query_log)
+    started = time.perf_counter()
+    profile.profiler.enable()
+    try:
+        yield profile
+    finally:
+        profile.profiler.disable()
+        profile.seconds = time.perf_counter() - started
+        profile.save()
+
+
+def show_profile(profile):
+    """Render a profile's time split and hotspots below the page"""
+    with st.expander(f"🧪 Profile: {profile.name} ({profile.seconds * 1000:.0f} ms)", expanded=True):
+        cols = st.columns(3)
+        for col, (part, seconds) in zip(cols, profile.split().items()):
+            share = seconds / profile.seconds * 100 if profile.seconds else 0
+            col.metric(part, f"{seconds * 1000:.0f} ms", f"{share:.0f}%", delta_color="off")
+        st.caption(f"{profile.query_log.count} queries · saved to {profile.path}")
+        st.dataframe(profile.top_functions(), use_container_width=True, hide_index=True)
@@ -0,0 +1,112 @@
+"""Live push of group changes to the sessions that have the group open.
+
+Each open group fragment subscribes to its group's channel. After a write,
+publish(group_id) asks every other subscribed session to rerun just that
+fragment, so members see the head's changes without refreshing the page
+and without a full-page rerun. Sessions that navigated away are dropped on
+their next full run; closed sessions are dropped on the next publish.
+
+Channels live in the app server process, so only sessions on the same
+server are pushed to. Sessions on other servers still see the change on
+their next rerun, via the group's workload_version.
+
+Pushing reruns relies on Streamlit runtime internals; if they are not
+available the push is skipped and members fall back to their next rerun.
+"""
+import logging
+import threading
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from metrics import Gauge
+
+_LOGGER = logging.getLogger(__name__)
+
+# group_id -> {session_id: fragment_id}
+_channels = {}
+_lock = threading.Lock()
+
+
+def subscribe(group_id):
+    """Subscribe the fragment being rendered to changes of group_id"""
+    ctx = get_script_run_ctx()
+    if ctx is None or not ctx.current_fragment_id:
+        return
+    with _lock:
+        _channels.setdefault(group_id, {})[ctx.session_id] = ctx.current_fragment_id
+
+
+def unsubscribe_session():
+    """Drop every subscription of the current session.
+
+    Called at the start of each full run: fragments that are still on the
+    page subscribe again as they render.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    with _lock:
+        for group_id in list(_channels):
+            _channels[group_id].pop(ctx.session_id, None)
+            if not _channels[group_id]:
+                del _channels[group_id]
+
+
+def subscriber_count():
+    with _lock:
+        return sum(len(subscribers) for subscribers in _channels.values())
+
+
+def publish(group_id):
+    """Rerun group_id's fragment in every subscribed session but this one"""
+    ctx = get_script_run_ctx()
+    own_session = ctx.session_id if ctx else None
+    with _lock:
+        targets = [(s, f) for s, f in _channels.get(group_id, {}).items() if s != own_session]
+    if not targets:
+        return
+
+    try:
+        from streamlit.runtime import Runtime
+        runtime = Runtime.instance()
+        eventloop = runtime._get_async_objs().eventloop
+    except (RuntimeError, AttributeError):
+        return
+    # The session manager and AppSession are only safe to use on the event loop
+    eventloop.call_soon_threadsafe(_push, runtime, group_id, targets)
+
+
+def _push(runtime, group_id, targets):
+    from streamlit.runtime.scriptrunner.script_requests import RerunData
+
+    for session_id, fragment_id in targets:
+        info = runtime._session_mgr.get_active_session_info(session_id)
+        if info is None:
+            _drop(group_id, session_id)
+            continue
+        session = info.session
+        try:
+            if not session._fragment_storage.contains(fragment_id):
+                # A full run since subscribing removed the fragment
+                continue
+            rerun_data = RerunData(fragment_id=fragment_id)
+            # Same as AppSession.request_rerun, but widget_states=None keeps
+            # the session's current widget values
+            if session._scriptrunner is None or not session._scriptrunner.request_rerun(rerun_data):
+                session._create_scriptrunner(rerun_data)
+        except AttributeError:
+            _LOGGER.warning("Live group updates are not supported by this Streamlit version")
+            return
+
+
+def _drop(group_id, session_id):
+    with _lock:
+        subscribers = _channels.get(group_id)
+        if subscribers is not None:
+            subscribers.pop(session_id, None)
+            if not subscribers:
+                del _channels[group_id]
+
+
+Gauge('app_live_group_subscriptions', "Open group fragments subscribed to live updates", (),
+      lambda: [((), subscriber_count())])
@@ -0,0 +1,145 @@
+"""Per-page query budget and N+1 check.
+
+Seeds a user with individual tasks and several groups, renders every page
+of app.py headlessly with Streamlit's AppTest, and reads the QueryLog that
+app.render_page leaves in session state. A page fails when it runs more
+statements than its budget, or when one fingerprint repeats more than
+N_PLUS_ONE_THRESHOLD times (typically a query inside a per-row loop)
+within the page itself or within one group fragment.
+
+Run against a disposable database; seeded rows are removed afterwards.
+tests/test_query_budget.py runs the same check under pytest.
+
+    python query_budget.py
+"""
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from streamlit.testing.v1 import AppTest
+
+from db import execute_query, shard_for_group, shard_for_user
+from groups import add_group_task, create_group, join_group
+from tasks import add_task, complete_tasks
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+APP_TIMEOUT = 30
+
+PAGE_QUERY_BUDGETS = {
+    'welcome': 0,
+    'login': 0,
+    'register': 0,
+    'reset_password': 0,
+    'dashboard': 8,
+    'individual_tasks': 7,
+    'group_tasks': 17,
+    'calendar': 4,
+    'reports': 4,
+    'burnout': 5,
+}
+
+N_PLUS_ONE_THRESHOLD = 3
+
+SEED_TASKS = 30
+SEED_GROUPS = 4
+SEED_GROUP_TASKS = 10
+
+
+def seed():
+    """Create a user, a second member, tasks and groups; return their ids"""
+    suffix = uuid.uuid4().hex[:8]
+    user_ids = []
+    for name in (f"budget_{suffix}", f"budget_peer_{suffix}"):
+        user_ids.append(execute_query(
+            "INSERT INTO users (username, email, password_hash) VALUES (%s, %s, %s)",
+            (name, f"{name}@example.com", 'x')
+        ))
+    user_id, peer_id = user_ids
+
+    today = datetime.now().date()
+    task_ids = [
+        add_task(user_id, f"Task {i}", today + timedelta(days=i % 14), 1 + i % 6)
+        for i in range(SEED_TASKS)
+    ]
+    complete_tasks(user_id, task_ids[:SEED_TASKS // 3])
+
+    group_ids = []
+    for g in range(SEED_GROUPS):
+        group_id, _ = create_group(f"Budget group {g}", user_id)
+        join_group(group_id, peer_id)
+        for i in range(SEED_GROUP_TASKS):
+            add_group_task(group_id, f"Group {g} task {i}", today + timedelta(days=i), 2, peer_id)
+        group_ids.append(group_id)
+
+    return {'users': user_ids, 'groups': group_ids}
+
+
+def cleanup(seeded):
+    # tasks and group_tasks are partitioned and have no cascading foreign keys
+    for group_id in seeded['groups']:
+        execute_query("DELETE FROM group_tasks WHERE group_id = %s", (group_id,), shard=shard_for_group(group_id))
+    for user_id in seeded['users']:
+        execute_query("DELETE FROM tasks WHERE user_id = %s", (user_id,), shard=shard_for_user(user_id))
+        execute_query("DELETE FROM users WHERE user_id = %s", (user_id,))
+
+
+def render(page, user_id=None, open_groups=()):
+    """Render one page headlessly and return its QueryLog"""
+    at = AppTest.from_file(APP_SCRIPT, default_timeout=APP_TIMEOUT)
+    at.session_state['page'] = page
+    at.session_state['show_reminders'] = True
+    if user_id is not None:
+        at.session_state['logged_in'] = True
+        at.session_state['user_id'] = user_id
+        at.session_state['username'] = 'budget'
+    for group_id in open_groups:
+        at.session_state[f"group_open_{group_id}"] = True
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"{page} raised: {at.exception[0].message}")
+    return at.session_state['last_query_log']
+
+
+def check(page, log):
+    problems = []
+    budget = PAGE_QUERY_BUDGETS[page]
+    if log.count > budget:
+        problems.append(f"{log.count} queries, budget {budget}")
+    # Each group fragment is its own section: a query run once per open
+    # group is expected, one run per row inside a fragment is not
+    for section in [log, *log.sections]:
+        where = "" if section is log else f" in {section.name}"
+        for fp, count in section.repeated(N_PLUS_ONE_THRESHOLD + 1).items():
+            problems.append(f"N+1{where}: {count}x {fp}")
+    return problems
+
+
+def main():
+    seeded = seed()
+    user_id = seeded['users'][0]
+    failed = False
+    try:
+        for page in PAGE_QUERY_BUDGETS:
+            logged_in = page not in ('welcome', 'login', 'register', 'reset_password')
+            started = time.perf_counter()
+            log = render(
+                page,
+                user_id if logged_in else None,
+                seeded['groups'] if page == 'group_tasks' else ()
+            )
+            elapsed = time.perf_counter() - started
+            problems = check(page, log)
+            status = "FAIL" if problems else "ok"
+            print(f"{status:4} {page:16} {log.count:3} queries  {log.total_seconds * 1000:7.1f} ms in DB  {elapsed * 1000:7.1f} ms total")
+            for problem in problems:
+                print(f"       {problem}")
+            failed = failed or bool(problems)
+    finally:
+        cleanup(seeded)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""Move a user's or a group's task rows to another shard.
+
+    python reshard.py where user 42
+    python reshard.py move user 42 2
+    python reshard.py move group 7 1
+
+A move copies the hot and archived task rows to the target shard, points
+the shard directory at it, waits SHARD_DIRECTORY_TTL seconds so every app
+server has stopped using its cached placement, copies any rows those
+servers inserted on the old shard in the meantime, and deletes the rows
+from the old shard once every one of them is on the target. Any failed
+read or write stops the move; before the directory flips the copy is
+undone, after it the old shard keeps its rows. Task ids are unique
+across shards (see db.next_id), so rows keep their ids.
+
+Edits to existing rows made during the wait, on servers still routing to
+the old shard, would be lost, so a move is refused while the user (or any
+member of the group) was seen in the last ACTIVE_MINUTES minutes. Every
+script run and API request updates users.last_seen_at (see
+session_store.record_activity), so this catches people who are only
+editing tasks, not just ones logging in or changing pages. The check runs
+again after the copy, right before the directory flips, and the copy is
+undone if someone showed up meanwhile. --force skips both checks.
+
+To try it locally, create a second database, list both in DB_SHARDS
+(e.g. '[{}, {"database": "academic_burnout_db_1"}]') and run migrate.py.
+"""
+import argparse
+import sys
+import time
+
+from db import (
+    SHARD_DIRECTORY_TTL, SHARDS, execute_query, execute_query_one, execute_transaction,
+    forget_shard, is_sharded, placeholders, shard_for_group, shard_for_user
+)
+from tasks import group_version_bumps, user_version_bump
+
+ACTIVE_MINUTES = 5
+INSERT_BATCH = 500
+
+# entity -> (owner column, [(table, id column)] of the rows that move with it)
+MOVED_TABLES = {
+    'user': ('user_id', [('tasks', 'task_id'), ('tasks_archive', 'task_id')]),
+    'group': ('group_id', [('group_tasks', 'group_task_id'), ('group_tasks_archive', 'group_task_id')]),
+}
+
+
+def current_shard(entity, entity_id):
+    return shard_for_user(entity_id) if entity == 'user' else shard_for_group(entity_id)
+
+
+def is_active(entity, entity_id):
+    """Whether the user, or a member of the group, used the app recently"""
+    if entity == 'user':
+        users = "SELECT %s"
+    else:
+        users = "SELECT user_id FROM group_members WHERE group_id = %s"
+    row = execute_query_one(
+        f"""
+            SELECT COUNT(*) AS active FROM users
+            WHERE user_id IN ({users}) AND last_seen_at > NOW() - INTERVAL %s MINUTE
+        """,
+        (entity_id, ACTIVE_MINUTES)
+    )
+    if row is None:
+        raise RuntimeError(f"could not check whether {entity} {entity_id} is active")
+    return bool(row['active'])
+
+
+def owned_ids(table, id_column, owner_column, entity_id, shard):
+    """Ids of an owner's rows of table on shard"""
+    rows = execute_query(
+        f"SELECT {id_column} FROM {table} WHERE {owner_column} = %s", (entity_id,), fetch=True, shard=shard
+    )
+    if rows is None:
+        raise RuntimeError(f"could not read {table} on shard {shard}")
+    return {row[id_column] for row in rows}
+
+
+def delete_rows(table, id_column, ids, shard):
+    """Delete rows of table by id on shard, in batches"""
+    ids = sorted(ids)
+    for start in range(0, len(ids), INSERT_BATCH):
+        batch = ids[start:start + INSERT_BATCH]
+        result = execute_transaction(
+            [(f"DELETE FROM {table} WHERE {id_column} IN ({placeholders(batch)})", tuple(batch))], shard=shard
+        )
+        if result is None:
+            raise RuntimeError(f"deleting {table} rows on shard {shard} failed")
+
+
+def copy_rows(table, id_column, owner_column, entity_id, source, target, skip_ids=()):
+    """Copy an owner's rows of table, except skip_ids, from source to target; return their ids"""
+    rows = execute_query(
+        f"SELECT * FROM {table} WHERE {owner_column} = %s",
+        (entity_id,),
+        fetch=True,
+        shard=source
+    )
+    if rows is None:
+        raise RuntimeError(f"could not read {table} rows on shard {source}")
+    rows = [row for row in rows if row[id_column] not in skip_ids]
+    for start in range(0, len(rows), INSERT_BATCH):
+        batch = rows[start:start + INSERT_BATCH]
+        columns = list(batch[0].keys())
+        row_values = f"({placeholders(columns)})"
+        result = execute_transaction([(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([row_values] * len(batch))}",
+            tuple(row[column] for row in batch for column in columns)
+        )], shard=target)
+        if result is None:
+            raise RuntimeError(f"copying {table} rows to shard {target} failed")
+    return [row[id_column] for row in rows]
+
+
+def move(entity, entity_id, target, force=False):
+    owner_column, tables = MOVED_TABLES[entity]
+    source = current_shard(entity, entity_id)
+    if source is None:
+        raise RuntimeError(f"could not read the shard of {entity} {entity_id}")
+    if source == target:
+        print(f"{entity} {entity_id} is already on shard {target}")
+        return
+    if not force and is_active(entity, entity_id):
+        raise RuntimeError(f"{entity} {entity_id} was active in the last {ACTIVE_MINUTES} minutes; retry later or pass --force")
+
+    copied = {}
+    for table, id_column in tables:
+        copied[table] = copy_rows(table, id_column, owner_column, entity_id, source, target)
+        print(f"Copied {len(copied[table])} {table} rows to shard {target}")
+
+    if not force and is_active(entity, entity_id):
+        for table, id_column in tables:
+            delete_rows(table, id_column, copied[table], target)
+        raise RuntimeError(f"{entity} {entity_id} became active during the copy; retry later or pass --force")
+
+    result = execute_transaction([(
+        "UPDATE shard_directory SET shard = %s, moved_at = NOW() WHERE entity = %s AND entity_id = %s",
+        (target, entity, entity_id)
+    )])
+    forget_shard(entity, entity_id)
+    if result is None or current_shard(entity, entity_id) != target:
+        for table, id_column in tables:
+            delete_rows(table, id_column, copied[table], target)
+        raise RuntimeError(f"could not point the directory at shard {target}; the copy was undone")
+    print(f"Directory points {entity} {entity_id} at shard {target}; waiting {SHARD_DIRECTORY_TTL}s for app servers")
+    time.sleep(SHARD_DIRECTORY_TTL)
+
+    for table, id_column in tables:
+        # Rows inserted meanwhile by servers that still routed to the old shard.
+        # Ids come from per-process blocks, so they are not in insertion order.
+        late = copy_rows(table, id_column, owner_column, entity_id, source, target,
+                         skip_ids=set(copied[table]))
+        if late:
+            print(f"Copied {len(late)} late {table} rows")
+        # Only rows now known to be on the target leave the source
+        source_ids = owned_ids(table, id_column, owner_column, entity_id, source)
+        missing = source_ids - owned_ids(table, id_column, owner_column, entity_id, target)
+        if missing:
+            raise RuntimeError(f"{len(missing)} {table} rows are not on shard {target}; kept them on shard {source}")
+        delete_rows(table, id_column, source_ids, source)
+
+    bumps = [user_version_bump(entity_id)] if entity == 'user' else group_version_bumps(entity_id)
+    if execute_transaction(bumps) is None:
+        raise RuntimeError(f"moved the rows but could not bump the workload versions of {entity} {entity_id}")
+    print(f"Moved {entity} {entity_id} from shard {source} to shard {target}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move users and groups between shards")
+    sub = parser.add_subparsers(dest='command', required=True)
+    where = sub.add_parser('where', help="show the shard holding a user's or group's rows")
+    where.add_argument('entity', choices=MOVED_TABLES)
+    where.add_argument('entity_id', type=int)
+    move_parser = sub.add_parser('move', help="move a user's or group's rows to another shard")
+    move_parser.add_argument('entity', choices=MOVED_TABLES)
+    move_parser.add_argument('entity_id', type=int)
+    move_parser.add_argument('shard', type=int)
+    move_parser.add_argument('--force', action='store_true', help="move even if the user is active")
+    args = parser.parse_args()
+
+    if not is_sharded():
+        print("Only one shard is configured; set DB_SHARDS", file=sys.stderr)
+        return 1
+
+    if args.command == 'where':
+        print(current_shard(args.entity, args.entity_id))
+        return 0
+
+    if not 0 <= args.shard < len(SHARDS):
+        print(f"No shard {args.shard}; DB_SHARDS lists {len(SHARDS)}", file=sys.stderr)
+        return 1
+    try:
+        move(args.entity, args.entity_id, args.shard, args.force)
+    except RuntimeError as e:
+        print(f"Move failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
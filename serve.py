@@ -0,0 +1,26 @@
+"""Start the Streamlit app with the warm-start routine.
+
+    python serve.py
+
+Streamlit settings come from .streamlit/config.toml or STREAMLIT_* environment
+variables (e.g. STREAMLIT_SERVER_PORT=8501). Warming starts before Streamlit
+accepts connections; poll http://127.0.0.1:8502/ready (OPS_PORT) before
+routing traffic to this server.
+"""
+import os
+import sys
+
+from streamlit.web import bootstrap
+
+from warmup import warm_start
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+
+def main():
+    warm_start(background=True)
+    bootstrap.run(APP_SCRIPT, False, sys.argv[1:], {})
+
+
+if __name__ == '__main__':
+    main()
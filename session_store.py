@@ -0,0 +1,119 @@
+"""Login and navigation state kept in MySQL instead of one server's memory.
+
+On login a row in app_sessions records the user and the persisted keys of
+st.session_state, and the browser gets a signed token in the `s` query
+parameter. When the browser reconnects, to this app server or any other
+one behind the load balancer, restore_session() reads the token and loads
+the state back, so servers can be restarted or scaled out without sticky
+sessions and without logging anyone out.
+
+Tokens are signed with APP_SECRET (see tokens.py), which must be the same
+on every app server. Logging out deletes the row, which revokes the token
+even before it expires.
+
+record_activity() keeps users.last_seen_at current for reshard.py, which
+won't move the rows of someone who is using the app.
+"""
+import json
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from db import execute_query, execute_query_one
+from tokens import sign, verify
+
+SESSION_TTL_SECONDS = int(os.environ.get('SESSION_TTL_SECONDS', 7 * 24 * 3600))
+TOKEN_PARAM = 's'
+TOKEN_TYPE = 'session'
+
+# The keys that define who is logged in and where they are
+PERSISTED_KEYS = ('logged_in', 'user_id', 'username', 'email', 'page', 'show_reminders')
+
+HEARTBEAT_SECONDS = 30
+_last_heartbeat = {}
+# Off the request thread, and outside any script run so the write doesn't
+# pin the session's reads to the primary (see db.note_write)
+_heartbeat_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='heartbeat')
+
+
+def _persisted_state():
+    return {key: st.session_state[key] for key in PERSISTED_KEYS if key in st.session_state}
+
+
+def restore_session():
+    """Load the state of the session named by the URL token, once per browser session"""
+    if 'session_id' in st.session_state:
+        return
+    st.session_state.session_id = None
+
+    payload = verify(st.query_params.get(TOKEN_PARAM), TOKEN_TYPE)
+    if payload is None:
+        st.query_params.pop(TOKEN_PARAM, None)
+        return
+    row = execute_query_one(
+        "SELECT state FROM app_sessions WHERE session_id = %s AND expires_at > NOW()",
+        (payload['sid'],)
+    )
+    if row is None:
+        st.query_params.pop(TOKEN_PARAM, None)
+        return
+
+    state = json.loads(row['state'])
+    for key, value in state.items():
+        st.session_state[key] = value
+    st.session_state.session_id = payload['sid']
+    st.session_state.saved_session_state = state
+
+
+def start_session():
+    """Persist the state of a user who just logged in and hand the browser its token"""
+    session_id = secrets.token_hex(16)
+    state = _persisted_state()
+    expires_at = datetime.now() + timedelta(seconds=SESSION_TTL_SECONDS)
+    # Cheap with idx_expires, and keeps the table to live sessions
+    execute_query("DELETE FROM app_sessions WHERE expires_at < NOW()")
+    execute_query(
+        "INSERT INTO app_sessions (session_id, user_id, state, expires_at) VALUES (%s, %s, %s, %s)",
+        (session_id, state['user_id'], json.dumps(state), expires_at)
+    )
+    st.session_state.session_id = session_id
+    st.session_state.saved_session_state = state
+    st.query_params[TOKEN_PARAM] = sign({'sid': session_id}, SESSION_TTL_SECONDS, TOKEN_TYPE)
+
+
+def save_session():
+    """Write the persisted keys back if they changed during this run"""
+    session_id = st.session_state.get('session_id')
+    if not session_id:
+        return
+    state = _persisted_state()
+    if state == st.session_state.get('saved_session_state'):
+        return
+    execute_query(
+        "UPDATE app_sessions SET state = %s WHERE session_id = %s",
+        (json.dumps(state), session_id)
+    )
+    st.session_state.saved_session_state = state
+
+
+def record_activity(user_id):
+    """Mark the user as seen now, at most once per HEARTBEAT_SECONDS per process"""
+    now = time.monotonic()
+    if now - _last_heartbeat.get(user_id, -HEARTBEAT_SECONDS) < HEARTBEAT_SECONDS:
+        return
+    _last_heartbeat[user_id] = now
+    _heartbeat_executor.submit(
+        execute_query, "UPDATE users SET last_seen_at = NOW() WHERE user_id = %s", (user_id,)
+    )
+
+
+def end_session():
+    """Delete the stored session, revoking its token"""
+    session_id = st.session_state.get('session_id')
+    if session_id:
+        execute_query("DELETE FROM app_sessions WHERE session_id = %s", (session_id,))
+    st.query_params.pop(TOKEN_PARAM, None)
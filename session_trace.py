@@ -0,0 +1,140 @@
+"""Opt-in recording of anonymized per-session action traces.
+
+With TRACE_SESSIONS=1, each sampled session appends its actions to
+TRACE_DIR/trace-YYYYMMDD.jsonl: button clicks, form submits, group toggles
+and task selections, with the page they happened on and a timestamp.
+benchmarks/replay.py plays the traces back against a test instance.
+
+Traces hold no user ids, names, task titles or typed values. Widgets are
+identified by their static labels from app.py (toggles by position), form
+fields by label and length only (password fields by whether they were
+filled in, not their length), and sessions by a random id.
+
+    TRACE_SESSIONS=1 TRACE_SAMPLE_RATE=0.1 python serve.py
+"""
+import functools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import streamlit as st
+
+TRACE_ENABLED = os.environ.get('TRACE_SESSIONS') == '1'
+TRACE_DIR = os.environ.get('TRACE_DIR', 'traces')
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '1.0'))
+
+_write_lock = threading.Lock()
+_installed = False
+
+
+def _session_trace():
+    """The current session's trace state, or None if it is not recorded"""
+    trace = st.session_state.get('trace')
+    return trace if trace and trace['id'] else None
+
+
+def record(action, **fields):
+    trace = _session_trace()
+    if trace is None:
+        return
+    event = {
+        'session': trace['id'],
+        'ts': round(time.time(), 3),
+        'page': st.session_state.get('page'),
+        'action': action,
+        **fields,
+    }
+    path = os.path.join(TRACE_DIR, f"trace-{datetime.now().strftime('%Y%m%d')}.jsonl")
+    with _write_lock:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event) + '\n')
+
+
+def _on_button(label, value, kwargs):
+    if value:
+        record('click', label=label)
+
+
+def _on_submit(label, value, kwargs):
+    trace = _session_trace()
+    if trace is not None and value:
+        record('submit', label=label, fields=[f for f in trace['fields'] if f['filled']])
+
+
+def _on_text_input(label, value, kwargs):
+    trace = _session_trace()
+    if trace is not None:
+        field = {'label': label, 'secret': kwargs.get('type') == 'password', 'filled': bool(value)}
+        if not field['secret']:
+            field['length'] = len(value or '')
+        trace['fields'].append(field)
+
+
+def _on_toggle(label, value, kwargs):
+    trace = _session_trace()
+    if trace is None:
+        return
+    index = trace['toggle_count']
+    trace['toggle_count'] += 1
+    if trace['toggles'].get(index, False) != value:
+        trace['toggles'][index] = value
+        record('toggle', index=index, value=value)
+
+
+def _on_multiselect(label, value, kwargs):
+    trace = _session_trace()
+    if trace is None:
+        return
+    key = kwargs.get('key', label)
+    if trace['selections'].get(key, 0) != len(value):
+        trace['selections'][key] = len(value)
+        record('select', label=label, count=len(value))
+
+
+def _wrap(name, observer):
+    original = getattr(st, name)
+
+    @functools.wraps(original)
+    def wrapper(label, *args, **kwargs):
+        value = original(label, *args, **kwargs)
+        observer(label, value, kwargs)
+        return value
+
+    setattr(st, name, wrapper)
+
+
+def _install():
+    global _installed
+    if _installed:
+        return
+    _wrap('button', _on_button)
+    _wrap('form_submit_button', _on_submit)
+    _wrap('text_input', _on_text_input)
+    _wrap('toggle', _on_toggle)
+    _wrap('multiselect', _on_multiselect)
+    _installed = True
+
+
+def trace_run():
+    """Call at the start of every script run; a no-op unless TRACE_SESSIONS=1"""
+    if not TRACE_ENABLED:
+        return
+    _install()
+    if 'trace' not in st.session_state:
+        sampled = random.random() < TRACE_SAMPLE_RATE
+        st.session_state.trace = {
+            'id': uuid.uuid4().hex if sampled else None,
+            'fields': [],
+            'toggles': {},
+            'toggle_count': 0,
+            'selections': {},
+        }
+        record('start')
+    trace = st.session_state.trace
+    trace['fields'] = []
+    trace['toggle_count'] = 0
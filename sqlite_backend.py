@@ -0,0 +1,155 @@
+"""Embedded SQLite storage for single-node deployments (DB_BACKEND=sqlite).
+
+The whole database is one file, SQLITE_PATH, created with sqlite_schema.sql
+on first use. It runs in WAL mode, so page reads never wait for a writer
+and a writer never waits for readers; writers queue behind each other for
+up to BUSY_TIMEOUT_SECONDS.
+
+Connections behave like mysql-connector ones as far as db.py is concerned:
+cursor(dictionary=True) returns dict rows, %s placeholders and the few
+MySQL functions the app uses are translated, DATE and TIMESTAMP columns
+come back as date and datetime objects, and close() returns the connection
+to a small per-process pool. Sharding, replicas and the MySQL-only tools
+(migrate.py, partitions.py, explain_check.py, the load test) don't apply.
+"""
+import os
+import queue
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+
+SQLITE_PATH = os.environ.get('SQLITE_PATH', 'academic_burnout.db')
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sqlite_schema.sql')
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+BUSY_TIMEOUT_SECONDS = 5
+
+PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    # Safe with WAL: a power cut can lose the last commits, never corrupt the file
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    # 32 MB page cache per connection; readers also share the OS cache through mmap
+    "PRAGMA cache_size = -32000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+]
+
+Error = sqlite3.Error
+
+_TRANSLATIONS = [
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\bNOW\(\)'), "datetime('now', 'localtime')"),
+    (re.compile(r'\bDATE_ADD\((\w+), INTERVAL \? DAY\)'), r"date(\1, ? || ' days')"),
+    (re.compile(r'\bINSERT IGNORE\b'), 'INSERT OR IGNORE'),
+]
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter('DATETIME', lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode()))
+
+
+@lru_cache(maxsize=1024)
+def translate(query):
+    """Rewrite a MySQL statement from this app into SQLite's dialect"""
+    for pattern, replacement in _TRANSLATIONS:
+        query = pattern.sub(replacement, query)
+    return query
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class _Cursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=()):
+        self._cursor.execute(translate(query), params)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class _Connection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, dictionary=False):
+        cursor = self._conn.cursor()
+        if dictionary:
+            cursor.row_factory = _dict_row
+        return _Cursor(cursor)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        """Return the connection to the pool, discarding any open transaction"""
+        if self._conn.in_transaction:
+            self._conn.rollback()
+        try:
+            _pool.put_nowait(self)
+        except queue.Full:
+            self._conn.close()
+
+
+_pool = queue.LifoQueue(POOL_SIZE)
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def _open():
+    conn = sqlite3.connect(
+        SQLITE_PATH,
+        timeout=BUSY_TIMEOUT_SECONDS,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        # Writes start with BEGIN IMMEDIATE, so they wait on busy_timeout
+        # up front instead of failing when a read turns into a write
+        isolation_level='IMMEDIATE',
+        check_same_thread=False
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    _ensure_schema(conn)
+    return _Connection(conn)
+
+
+def _ensure_schema(conn):
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            with open(SCHEMA_FILE) as f:
+                conn.executescript(f.read())
+            _schema_ready = True
+
+
+def get_connection():
+    """A pooled connection to SQLITE_PATH, opening one if the pool is empty"""
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        return _open()
@@ -0,0 +1,120 @@
+-- SQLite schema for DB_BACKEND=sqlite, equivalent to migrations 001-006,
+-- 008 and 009.
+-- Applied by sqlite_backend.py on first connect, so every statement must be
+-- safe to repeat. Tables are not partitioned and keep their foreign keys;
+-- index names carry the table name because SQLite shares one namespace.
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(50) UNIQUE NOT NULL,
+    email VARCHAR(100) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    reset_token VARCHAR(255) NULL,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    workload_version INTEGER NOT NULL DEFAULT 0,
+    last_seen_at TIMESTAMP NULL
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    title VARCHAR(255) NOT NULL,
+    deadline DATE NOT NULL,
+    estimated_hours INTEGER NOT NULL,
+    priority VARCHAR(20) NOT NULL,
+    task_status VARCHAR(20) DEFAULT 'Pending',
+    reminder_sent BOOLEAN DEFAULT FALSE,
+    google_event_id VARCHAR(255) NULL,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_deadline ON tasks (user_id, deadline);
+CREATE INDEX IF NOT EXISTS idx_tasks_google_event ON tasks (google_event_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_status_deadline ON tasks (user_id, task_status, deadline);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_reminder_deadline ON tasks (user_id, reminder_sent, deadline);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_deadline ON tasks (task_status, deadline);
+
+CREATE TABLE IF NOT EXISTS student_groups (
+    group_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    group_name VARCHAR(100) NOT NULL,
+    created_by INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    invite_code VARCHAR(20) UNIQUE NOT NULL,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    workload_version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_student_groups_created_by ON student_groups (created_by);
+
+CREATE TABLE IF NOT EXISTS group_members (
+    membership_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    group_id INTEGER NOT NULL REFERENCES student_groups(group_id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    member_role VARCHAR(20) DEFAULT 'Member',
+    joined_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    UNIQUE (group_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_group_members_user_group_role ON group_members (user_id, group_id, member_role);
+
+CREATE TABLE IF NOT EXISTS group_tasks (
+    group_task_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    group_id INTEGER NOT NULL REFERENCES student_groups(group_id) ON DELETE CASCADE,
+    title VARCHAR(255) NOT NULL,
+    deadline DATE NOT NULL,
+    estimated_hours INTEGER NOT NULL,
+    priority VARCHAR(20) NOT NULL,
+    task_status VARCHAR(20) DEFAULT 'Pending',
+    reminder_sent BOOLEAN DEFAULT FALSE,
+    assigned_to INTEGER NULL REFERENCES users(user_id) ON DELETE SET NULL,
+    google_event_id VARCHAR(255) NULL,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_group_tasks_group_deadline ON group_tasks (group_id, deadline);
+CREATE INDEX IF NOT EXISTS idx_group_tasks_assigned ON group_tasks (assigned_to);
+CREATE INDEX IF NOT EXISTS idx_group_tasks_google_event ON group_tasks (google_event_id);
+CREATE INDEX IF NOT EXISTS idx_group_tasks_group_status_deadline ON group_tasks (group_id, task_status, deadline);
+CREATE INDEX IF NOT EXISTS idx_group_tasks_group_reminder_deadline ON group_tasks (group_id, reminder_sent, deadline);
+CREATE INDEX IF NOT EXISTS idx_group_tasks_status_deadline ON group_tasks (task_status, deadline);
+
+CREATE TABLE IF NOT EXISTS tasks_archive (
+    task_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    deadline DATE NOT NULL,
+    estimated_hours INTEGER NOT NULL,
+    priority VARCHAR(20) NOT NULL,
+    task_status VARCHAR(20) NOT NULL,
+    archived_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    reminder_sent BOOLEAN DEFAULT FALSE,
+    google_event_id VARCHAR(255) NULL,
+    created_at TIMESTAMP NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_archive_user_deadline ON tasks_archive (user_id, deadline);
+
+CREATE TABLE IF NOT EXISTS group_tasks_archive (
+    group_task_id INTEGER PRIMARY KEY,
+    group_id INTEGER NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    deadline DATE NOT NULL,
+    estimated_hours INTEGER NOT NULL,
+    priority VARCHAR(20) NOT NULL,
+    task_status VARCHAR(20) NOT NULL,
+    assigned_to INTEGER NULL,
+    archived_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    reminder_sent BOOLEAN DEFAULT FALSE,
+    google_event_id VARCHAR(255) NULL,
+    created_at TIMESTAMP NULL
+);
+CREATE INDEX IF NOT EXISTS idx_group_tasks_archive_group_deadline ON group_tasks_archive (group_id, deadline);
+
+CREATE TABLE IF NOT EXISTS app_sessions (
+    session_id CHAR(32) PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    state TEXT NOT NULL,
+    expires_at DATETIME NOT NULL,
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_app_sessions_expires ON app_sessions (expires_at);
+
+-- MySQL's ON UPDATE CURRENT_TIMESTAMP
+CREATE TRIGGER IF NOT EXISTS app_sessions_touch AFTER UPDATE OF state ON app_sessions
+BEGIN
+    UPDATE app_sessions SET updated_at = datetime('now', 'localtime') WHERE session_id = NEW.session_id;
+END;
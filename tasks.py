@@ -1,7 +1,57 @@
 import streamlit as st
-from db import execute_query, execute_query_one
+from db import (
+    GLOBAL_SHARD, execute_query, execute_query_one, execute_transaction, is_sharded, next_id,
+    placeholders, scatter_gather, shard_for_group, shard_for_user
+)
 from datetime import datetime, timedelta
 
+# Workload version stamps. Every write bumps users.workload_version for each
+# affected user (and student_groups.workload_version for group writes), so a
+# cache can validate with one primary-key lookup. The stamps live on the
+# global shard; see write_with_version_bumps.
+
+def user_version_bump(user_id):
+    return ("UPDATE users SET workload_version = workload_version + 1 WHERE user_id = %s", (user_id,))
+
+def users_version_bump(user_ids):
+    return (
+        f"UPDATE users SET workload_version = workload_version + 1 WHERE user_id IN ({placeholders(user_ids)})",
+        tuple(user_ids)
+    )
+
+def group_version_bumps(group_id):
+    """Bump a group's version and the version of each of its members"""
+    return [
+        ("UPDATE student_groups SET workload_version = workload_version + 1 WHERE group_id = %s", (group_id,)),
+        (
+            """
+                UPDATE users SET workload_version = workload_version + 1
+                WHERE user_id IN (SELECT user_id FROM group_members WHERE group_id = %s)
+            """,
+            (group_id,)
+        ),
+    ]
+
+def write_with_version_bumps(shard, writes, version_bumps, return_last_id=False):
+    """Run writes on a task shard and version_bumps on the global shard.
+
+    On the global shard both go in one transaction, as before sharding.
+    Otherwise the bumps run right after the writes commit: a cache may
+    briefly serve the old version, but never keeps stale rows under the
+    new one. Returns what execute_transaction returns for the writes.
+    """
+    if shard == GLOBAL_SHARD:
+        return execute_transaction([*version_bumps, *writes], return_last_id)
+    result = execute_transaction(writes, return_last_id, shard=shard)
+    if result is not None:
+        execute_transaction(version_bumps)
+    return result
+
+def get_workload_version(user_id):
+    """Current workload version of a user, or None if it could not be read"""
+    row = execute_query_one("SELECT workload_version FROM users WHERE user_id = %s", (user_id,))
+    return row['workload_version'] if row else None
+
 def calculate_priority(estimated_hours):
     if estimated_hours <= 2:
         return "Low"
@@ -12,27 +62,63 @@ def calculate_priority(estimated_hours):
 
 def add_task(user_id, title, deadline, estimated_hours):
     priority = calculate_priority(estimated_hours)
-    task_id = execute_query(
-        "INSERT INTO tasks (user_id, title, deadline, estimated_hours, priority) VALUES (%s, %s, %s, %s, %s)",
-        (user_id, title, deadline, estimated_hours, priority)
-    )
+    new_id = next_id('tasks')
+    if new_id is None and is_sharded():
+        return None
+    task_id = write_with_version_bumps(shard_for_user(user_id), [
+        (
+            "INSERT INTO tasks (task_id, user_id, title, deadline, estimated_hours, priority) VALUES (%s, %s, %s, %s, %s, %s)",
+            (new_id, user_id, title, deadline, estimated_hours, priority)
+        ),
+    ], [user_version_bump(user_id)], return_last_id=True)
     return task_id
 
-def get_user_tasks(user_id):
+def get_user_tasks(user_id, include_archived=False):
     tasks = execute_query(
         "SELECT * FROM tasks WHERE user_id = %s ORDER BY deadline ASC",
         (user_id,),
-        fetch=True
+        fetch=True,
+        shard=shard_for_user(user_id)
+    ) or []
+    if include_archived:
+        tasks = sorted(tasks + get_archived_user_tasks(user_id), key=lambda t: t['deadline'])
+    return tasks
+
+def get_archived_user_tasks(user_id):
+    """Get a user's archived tasks (completed tasks moved out by archive.py)"""
+    tasks = execute_query(
+        "SELECT * FROM tasks_archive WHERE user_id = %s ORDER BY deadline ASC",
+        (user_id,),
+        fetch=True,
+        shard=shard_for_user(user_id)
     )
     return tasks or []
 
-def delete_task(task_id):
-    execute_query("DELETE FROM tasks WHERE task_id = %s", (task_id,))
+def write_user_tasks(user_id, query, params):
+    """Run one write on a user's own tasks and bump the user's version.
+
+    query must restrict to the user's rows with "user_id = %s" after the
+    params it is given, so a task id from another user changes nothing.
+    Returns the statement's row counts, or None if the write failed.
+    """
+    return write_with_version_bumps(
+        shard_for_user(user_id),
+        [(query, (*params, user_id))],
+        [user_version_bump(user_id)]
+    )
+
+def delete_task(user_id, task_id):
+    return write_user_tasks(
+        user_id,
+        "DELETE FROM tasks WHERE task_id = %s AND user_id = %s",
+        (task_id,)
+    )
 
-def update_task(task_id, title, deadline, estimated_hours):
+def update_task(user_id, task_id, title, deadline, estimated_hours):
     priority = calculate_priority(estimated_hours)
-    execute_query(
-        "UPDATE tasks SET title = %s, deadline = %s, estimated_hours = %s, priority = %s WHERE task_id = %s",
+    return write_user_tasks(
+        user_id,
+        "UPDATE tasks SET title = %s, deadline = %s, estimated_hours = %s, priority = %s WHERE task_id = %s AND user_id = %s",
         (title, deadline, estimated_hours, priority, task_id)
     )
 
@@ -40,7 +126,10 @@ def detect_deadline_collisions(user_id):
     tasks = get_user_tasks(user_id)
     group_tasks = get_all_user_group_tasks(user_id)
     
-    all_tasks = tasks + group_tasks
+    return find_deadline_collisions(tasks + group_tasks)
+
+def find_deadline_collisions(all_tasks):
+    """Group task rows by deadline, keeping only deadlines shared by several tasks"""
     deadline_dict = {}
     
     for task in all_tasks:
@@ -52,17 +141,52 @@ def detect_deadline_collisions(user_id):
     collisions = {k: v for k, v in deadline_dict.items() if len(v) > 1}
     return collisions
 
-def get_all_user_group_tasks(user_id):
-    query = """
-        SELECT gt.*, sg.group_name 
-        FROM group_tasks gt
-        JOIN group_members gm ON gt.group_id = gm.group_id
-        JOIN student_groups sg ON gt.group_id = sg.group_id
-        WHERE gm.user_id = %s
-        ORDER BY gt.deadline ASC
+def get_user_group_names(user_id):
+    """{group_id: group_name} of every group the user belongs to"""
+    rows = execute_query(
+        """
+            SELECT sg.group_id, sg.group_name
+            FROM group_members gm
+            JOIN student_groups sg ON gm.group_id = sg.group_id
+            WHERE gm.user_id = %s
+        """,
+        (user_id,),
+        fetch=True
+    ) or []
+    return {row['group_id']: row['group_name'] for row in rows}
+
+def gather_group_rows(group_names, query, params=()):
+    """Run query on each shard holding some of the groups, sorted by deadline.
+
+    query filters on "group_id IN ({ids})", followed by params. Each row is
+    tagged with its group_name.
     """
-    tasks = execute_query(query, (user_id,), fetch=True)
-    return tasks or []
+    rows = scatter_gather(
+        list(group_names),
+        shard_for_group,
+        lambda shard, group_ids: execute_query(
+            query.format(ids=placeholders(group_ids)), (*group_ids, *params), fetch=True, shard=shard
+        )
+    )
+    for row in rows:
+        row['group_name'] = group_names[row['group_id']]
+    return sorted(rows, key=lambda t: t['deadline'])
+
+def get_all_user_group_tasks(user_id, include_archived=False):
+    group_names = get_user_group_names(user_id)
+    tasks = gather_group_rows(
+        group_names,
+        "SELECT * FROM group_tasks WHERE group_id IN ({ids})"
+    )
+    if include_archived:
+        tasks = sorted(tasks + get_archived_user_group_tasks(user_id, group_names), key=lambda t: t['deadline'])
+    return tasks
+
+def get_archived_user_group_tasks(user_id, group_names=None):
+    """Get archived group tasks from all of a user's groups"""
+    if group_names is None:
+        group_names = get_user_group_names(user_id)
+    return gather_group_rows(group_names, "SELECT * FROM group_tasks_archive WHERE group_id IN ({ids})")
 
 def get_tasks_needing_reminder(user_id):
     """Get tasks that need reminders (within 3 days and not yet reminded)"""
@@ -78,42 +202,92 @@ def get_tasks_needing_reminder(user_id):
         AND (reminder_sent = FALSE OR reminder_sent IS NULL)
         ORDER BY deadline ASC
     """
-    individual_tasks = execute_query(individual_query, (user_id, today, reminder_date), fetch=True) or []
+    individual_tasks = execute_query(
+        individual_query, (user_id, today, reminder_date), fetch=True, shard=shard_for_user(user_id)
+    ) or []
     
     # Group tasks
     group_query = """
-        SELECT gt.group_task_id as task_id, gt.title, gt.deadline, gt.priority, gt.estimated_hours, sg.group_name
-        FROM group_tasks gt
-        JOIN group_members gm ON gt.group_id = gm.group_id
-        JOIN student_groups sg ON gt.group_id = sg.group_id
-        WHERE gm.user_id = %s 
-        AND gt.deadline BETWEEN %s AND %s
-        AND (gt.reminder_sent = FALSE OR gt.reminder_sent IS NULL)
-        ORDER BY gt.deadline ASC
+        SELECT group_task_id as task_id, group_id, title, deadline, priority, estimated_hours
+        FROM group_tasks
+        WHERE group_id IN ({ids})
+        AND deadline BETWEEN %s AND %s
+        AND (reminder_sent = FALSE OR reminder_sent IS NULL)
     """
-    group_tasks = execute_query(group_query, (user_id, today, reminder_date), fetch=True) or []
+    group_tasks = gather_group_rows(get_user_group_names(user_id), group_query, (today, reminder_date))
     
     return individual_tasks + group_tasks
 
-def mark_reminder_sent(task_id, is_group_task=False):
-    """Mark a task as having reminder sent"""
+def mark_reminder_sent(owner_id, task_id, is_group_task=False):
+    """Mark a task as having reminder sent; owner_id is the group_id of a group task, else the user_id"""
     if is_group_task:
-        execute_query("UPDATE group_tasks SET reminder_sent = TRUE WHERE group_task_id = %s", (task_id,))
+        write_with_version_bumps(shard_for_group(owner_id), [
+            (
+                "UPDATE group_tasks SET reminder_sent = TRUE WHERE group_task_id = %s AND group_id = %s",
+                (task_id, owner_id)
+            ),
+        ], group_version_bumps(owner_id))
     else:
-        execute_query("UPDATE tasks SET reminder_sent = TRUE WHERE task_id = %s", (task_id,))
+        write_user_tasks(
+            owner_id,
+            "UPDATE tasks SET reminder_sent = TRUE WHERE task_id = %s AND user_id = %s",
+            (task_id,)
+        )
 
-def mark_task_completed(task_id):
+def mark_task_completed(user_id, task_id):
     """Mark an individual task as completed"""
-    execute_query(
-        "UPDATE tasks SET task_status = 'Completed' WHERE task_id = %s",
+    write_user_tasks(
+        user_id,
+        "UPDATE tasks SET task_status = 'Completed' WHERE task_id = %s AND user_id = %s",
         (task_id,)
     )
 
+def complete_tasks(user_id, task_ids):
+    """Mark several individual tasks as completed in one statement; None if it failed"""
+    if not task_ids:
+        return []
+    return write_user_tasks(
+        user_id,
+        f"UPDATE tasks SET task_status = 'Completed' WHERE task_id IN ({placeholders(task_ids)}) AND user_id = %s",
+        task_ids
+    )
+
+def reopen_tasks(user_id, task_ids):
+    """Move several individual tasks back to Pending in one statement; None if it failed"""
+    if not task_ids:
+        return []
+    return write_user_tasks(
+        user_id,
+        f"UPDATE tasks SET task_status = 'Pending' WHERE task_id IN ({placeholders(task_ids)}) AND user_id = %s",
+        task_ids
+    )
+
+def delete_tasks(user_id, task_ids):
+    """Delete several individual tasks in one statement"""
+    if not task_ids:
+        return
+    write_user_tasks(
+        user_id,
+        f"DELETE FROM tasks WHERE task_id IN ({placeholders(task_ids)}) AND user_id = %s",
+        task_ids
+    )
+
+def reschedule_tasks(user_id, task_ids, delta_days):
+    """Shift the deadline of several individual tasks by delta_days"""
+    if not task_ids:
+        return
+    write_user_tasks(
+        user_id,
+        f"UPDATE tasks SET deadline = DATE_ADD(deadline, INTERVAL %s DAY), reminder_sent = FALSE WHERE task_id IN ({placeholders(task_ids)}) AND user_id = %s",
+        (delta_days, *task_ids)
+    )
+
 def get_completed_tasks(user_id):
     """Get all completed tasks for a user"""
     tasks = execute_query(
         "SELECT * FROM tasks WHERE user_id = %s AND task_status = 'Completed' ORDER BY deadline DESC",
         (user_id,),
-        fetch=True
+        fetch=True,
+        shard=shard_for_user(user_id)
     )
-    return tasks or []
\ No newline at end of file
+    return tasks or []
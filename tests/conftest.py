@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def database():
+    """The configured database (see db.DB_CONFIG); tests using it skip when it is unreachable"""
+    from db import get_connection
+
+    conn = get_connection()
+    if conn is None:
+        pytest.skip("database not reachable")
+    conn.close()
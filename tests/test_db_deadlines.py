@@ -0,0 +1,81 @@
+"""Time budgets cut reads short but never drop a write."""
+import pytest
+
+import db
+
+
+class FakeCursor:
+    def __init__(self, statements, row):
+        self.statements = statements
+        self.row = row
+        self.rowcount = 1
+        self.lastrowid = 1
+
+    def execute(self, query, params=()):
+        self.statements.append(query)
+
+    def fetchall(self):
+        return [self.row] if self.row else []
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, statements, row):
+        self.statements = statements
+        self.row = row
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self.statements, self.row)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    """Statements sent to the database; every read returns shard 1"""
+    sent = []
+    monkeypatch.setattr(db, 'get_connection', lambda shard=0, read=False: FakeConnection(sent, {'shard': 1}))
+    return sent
+
+
+def test_writes_run_after_the_budget_is_spent(statements):
+    with db.time_budget(0) as budget:
+        assert db.execute_transaction([("UPDATE tasks SET title = %s WHERE task_id = %s", ('x', 1))]) == [1]
+        db.execute_query("DELETE FROM tasks WHERE task_id = %s", (1,))
+    assert len(statements) == 2
+    assert not budget['exceeded']
+
+
+def test_reads_are_skipped_after_the_budget_is_spent(statements):
+    with db.time_budget(0) as budget:
+        assert db.execute_query("SELECT * FROM tasks", fetch=True) is None
+        assert db.execute_query_one("SELECT * FROM tasks") is None
+    assert statements == []
+    assert budget['exceeded']
+
+
+def test_shard_lookup_ignores_the_budget(statements, monkeypatch):
+    monkeypatch.setattr(db, 'SHARDS', [{}, {}])
+    db.forget_shard('user', 7)
+    with db.time_budget(0) as budget:
+        assert db.shard_for_user(7) == 1
+    assert not budget['exceeded']
+    db.forget_shard('user', 7)
+
+
+def test_write_without_a_shard_is_reported(statements, caplog):
+    # Outside a script run errors are logged rather than shown
+    assert db.execute_transaction([("DELETE FROM tasks WHERE task_id = %s", (1,))], shard=None) is None
+    assert "Could not save the change" in caplog.text
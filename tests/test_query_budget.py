@@ -0,0 +1,24 @@
+"""Every page stays within its query budget and runs no N+1 queries."""
+import pytest
+
+from query_budget import PAGE_QUERY_BUDGETS, check, cleanup, render, seed
+
+PUBLIC_PAGES = ('welcome', 'login', 'register', 'reset_password')
+
+
+@pytest.fixture(scope='module')
+def seeded(database):
+    rows = seed()
+    yield rows
+    cleanup(rows)
+
+
+@pytest.mark.parametrize('page', list(PAGE_QUERY_BUDGETS))
+def test_page_query_budget(seeded, page):
+    logged_in = page not in PUBLIC_PAGES
+    log = render(
+        page,
+        seeded['users'][0] if logged_in else None,
+        seeded['groups'] if page == 'group_tasks' else ()
+    )
+    assert check(page, log) == []
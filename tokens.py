@@ -0,0 +1,60 @@
+"""HMAC-signed, expiring tokens.
+
+A token is base64url(JSON payload) + '.' + base64url(HMAC-SHA256 of it),
+signed with APP_SECRET. Every process that shares APP_SECRET can verify
+tokens issued by any other, without a lookup. Without APP_SECRET a random
+per-process secret is used, so tokens stop working when the process
+restarts.
+
+Each kind of token carries a `typ` claim (e.g. 'api', 'session'), and
+verify() given a typ rejects tokens of any other kind, so a token issued
+for one purpose can't be replayed for another.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+
+APP_SECRET = os.environ.get('APP_SECRET', '').encode('utf-8') or secrets.token_bytes(32)
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _signature(body):
+    return _b64encode(hmac.new(APP_SECRET, body.encode('ascii'), hashlib.sha256).digest())
+
+
+def sign(payload, ttl_seconds, typ=None):
+    """Return a token for payload, of kind typ, that expires after ttl_seconds"""
+    claims = {**payload, 'exp': int(time.time()) + ttl_seconds}
+    if typ is not None:
+        claims['typ'] = typ
+    body = _b64encode(json.dumps(claims).encode('utf-8'))
+    return f"{body}.{_signature(body)}"
+
+
+def verify(token, typ=None):
+    """Return the payload of a valid, unexpired token (of kind typ, if given), or None"""
+    if not token or token.count('.') != 1:
+        return None
+    body, signature = token.split('.')
+    if not hmac.compare_digest(signature, _signature(body)):
+        return None
+    try:
+        payload = json.loads(_b64decode(body))
+    except ValueError:
+        return None
+    if not isinstance(payload, dict) or payload.get('exp', 0) < time.time():
+        return None
+    if typ is not None and payload.get('typ') != typ:
+        return None
+    return payload
@@ -0,0 +1,178 @@
+"""Lightweight tracing spans for page renders, queries, charts and exports.
+
+Each page render is a trace; queries and chart/export builders run inside
+it become child spans. Spans are exported in Zipkin v2 JSON, either appended
+to a file or posted to a local collector (Zipkin, or Jaeger's Zipkin
+endpoint), from a background thread so exporting never blocks a page.
+
+Settings come from the environment:
+
+    TRACING=off|file|collector       default off
+    TRACING_FILE=spans.jsonl         file exporter output
+    TRACING_COLLECTOR_URL=http://127.0.0.1:9411/api/v2/spans
+    TRACING_SAMPLE_RATE=0.01         fraction of traces kept
+    TRACING_SLOW_MS=1000             traces slower than this are always kept
+
+Sampling is decided when a trace ends, so slow traces are kept even when
+they were not sampled; a trace that is dropped costs only a few small
+objects.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+TRACING = os.environ.get('TRACING', 'off')
+TRACING_FILE = os.environ.get('TRACING_FILE', 'spans.jsonl')
+TRACING_COLLECTOR_URL = os.environ.get('TRACING_COLLECTOR_URL', 'http://127.0.0.1:9411/api/v2/spans')
+TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', '0.01'))
+TRACING_SLOW_MS = float(os.environ.get('TRACING_SLOW_MS', '1000'))
+
+SERVICE_NAME = 'academic-burnout-app'
+
+EXPORT_BATCH_SIZE = 100
+EXPORT_INTERVAL_SECONDS = 2
+# Spans beyond this are dropped rather than letting the queue grow
+EXPORT_QUEUE_SIZE = 10_000
+
+_LOGGER = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+_export_queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+def _new_id():
+    return '%016x' % random.getrandbits(64)
+
+
+class Span:
+    """One timed operation; children share the trace's finished-span list"""
+
+    def __init__(self, name, parent, tags):
+        self.name = name
+        self.parent = parent
+        self.tags = tags
+        self.span_id = _new_id()
+        self.trace_id = parent.trace_id if parent else _new_id() + _new_id()
+        self.finished = parent.finished if parent else []
+        self.start = time.time()
+        self.duration = None
+
+    def set_tag(self, key, value):
+        self.tags[key] = value
+
+    def to_zipkin(self):
+        span = {
+            'traceId': self.trace_id,
+            'id': self.span_id,
+            'name': self.name,
+            'timestamp': int(self.start * 1_000_000),
+            'duration': max(1, int(self.duration * 1_000_000)),
+            'localEndpoint': {'serviceName': SERVICE_NAME},
+            'tags': {key: str(value) for key, value in self.tags.items()},
+        }
+        if self.parent:
+            span['parentId'] = self.parent.span_id
+        return span
+
+
+def _keep(root):
+    return random.random() < TRACING_SAMPLE_RATE or root.duration * 1000 >= TRACING_SLOW_MS
+
+
+@contextmanager
+def span(name, **tags):
+    """Time the block as a span, a child of the current span if there is one"""
+    if TRACING == 'off':
+        yield None
+        return
+
+    current = Span(name, _current_span.get(), tags)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.set_tag('error', type(e).__name__)
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        _current_span.reset(token)
+        current.finished.append(current)
+        if current.parent is None and _keep(current):
+            _export(current.finished)
+
+
+def traced(func):
+    """Run every call to func in a span named after it"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _export(spans):
+    _start_exporter()
+    for finished in spans:
+        try:
+            _export_queue.put_nowait(finished)
+        except queue.Full:
+            return
+
+
+def _write(batch):
+    payload = [finished.to_zipkin() for finished in batch]
+    if TRACING == 'collector':
+        request = urllib.request.Request(
+            TRACING_COLLECTOR_URL,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        urllib.request.urlopen(request, timeout=5).close()
+    else:
+        with open(TRACING_FILE, 'a', encoding='utf-8') as f:
+            for item in payload:
+                f.write(json.dumps(item) + '\n')
+
+
+def _run_exporter():
+    failing = False
+    while True:
+        batch = [_export_queue.get()]
+        deadline = time.monotonic() + EXPORT_INTERVAL_SECONDS
+        while len(batch) < EXPORT_BATCH_SIZE:
+            try:
+                batch.append(_export_queue.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        try:
+            _write(batch)
+        except Exception as e:
+            # Collector down, disk full or a span that won't serialize: drop
+            # the batch and keep the exporter alive. Warn once per outage.
+            if not failing:
+                _LOGGER.warning("Dropping spans, export failed: %r", e)
+            failing = True
+        else:
+            failing = False
+
+
+def _start_exporter():
+    global _exporter_started
+    if _exporter_started:
+        return
+    with _exporter_lock:
+        if not _exporter_started:
+            threading.Thread(target=_run_exporter, name='span-exporter', daemon=True).start()
+            _exporter_started = True
@@ -1,49 +0,0 @@
-USE academic_burnout_db;
-
--- Drop dependent tables first
-DROP TABLE IF EXISTS group_tasks;
-DROP TABLE IF EXISTS group_members;
-DROP TABLE IF EXISTS student_groups;
-
--- Recreate with new columns
-CREATE TABLE student_groups (
-    group_id INT AUTO_INCREMENT PRIMARY KEY,
-    group_name VARCHAR(100) NOT NULL,
-    created_by INT NOT NULL,
-    invite_code VARCHAR(20) UNIQUE NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (created_by) REFERENCES users(user_id) ON DELETE CASCADE,
-    INDEX idx_created_by (created_by),
-    INDEX idx_invite_code (invite_code)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-
-CREATE TABLE group_members (
-    membership_id INT AUTO_INCREMENT PRIMARY KEY,
-    group_id INT NOT NULL,
-    user_id INT NOT NULL,
-    member_role VARCHAR(20) DEFAULT 'Member',
-    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (group_id) REFERENCES student_groups(group_id) ON DELETE CASCADE,
-    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
-    UNIQUE KEY unique_membership (group_id, user_id),
-    INDEX idx_group (group_id),
-    INDEX idx_user (user_id)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-
-CREATE TABLE group_tasks (
-    group_task_id INT AUTO_INCREMENT PRIMARY KEY,
-    group_id INT NOT NULL,
-    title VARCHAR(255) NOT NULL,
-    deadline DATE NOT NULL,
-    estimated_hours INT NOT NULL,
-    priority VARCHAR(20) NOT NULL,
-    task_status VARCHAR(20) DEFAULT 'Pending',
-    assigned_to INT NULL,
-    google_event_id VARCHAR(255) NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (group_id) REFERENCES student_groups(group_id) ON DELETE CASCADE,
-    FOREIGN KEY (assigned_to) REFERENCES users(user_id) ON DELETE SET NULL,
-    INDEX idx_group_deadline (group_id, deadline),
-    INDEX idx_assigned (assigned_to),
-    INDEX idx_google_event (google_event_id)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
\ No newline at end of file
@@ -1,11 +1,35 @@
 import streamlit as st
 from datetime import datetime, timedelta
-import plotly.graph_objects as go
-import plotly.express as px
-from fpdf import FPDF
 import io
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
+import html as html_lib
+import functools
+import time
+from tracing import traced
+
+# plotly, fpdf and openpyxl are imported inside the chart and export builders
+# so pages that never draw a chart or export a file don't pay for loading them.
+
+# Called with (builder name, seconds) after every chart and export build;
+# metrics.py records them. A hook rather than an import keeps utils free of
+# db and the MySQL driver.
+_builder_hooks = []
+
+def add_builder_hook(hook):
+    """Call hook(name, seconds) after every chart and export builder"""
+    _builder_hooks.append(hook)
+
+def timed_builder(func):
+    """Report the duration of every call to func to the builder hooks"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - started
+            for hook in _builder_hooks:
+                hook(func.__name__, seconds)
+    return wrapper
 
 def apply_custom_css():
     """Apply minimal professional styling"""
@@ -208,11 +232,15 @@ def create_progress_bar(completed, total):
     """
     return html
 
+@traced
+@timed_builder
 def create_task_completion_chart(tasks):
     """Create pie chart for task completion"""
     if not tasks:
         return None
     
+    import plotly.graph_objects as go
+    
     completed = len([t for t in tasks if t.get('task_status') == 'Completed'])
     in_progress = len([t for t in tasks if t.get('task_status') == 'In Progress'])
     pending = len([t for t in tasks if t.get('task_status', 'Pending') == 'Pending'])
@@ -236,11 +264,15 @@ def create_task_completion_chart(tasks):
     
     return fig
 
+@traced
+@timed_builder
 def create_priority_distribution_chart(tasks):
     """Create bar chart for priority distribution"""
     if not tasks:
         return None
     
+    import plotly.graph_objects as go
+    
     priorities = {'Low': 0, 'Medium': 0, 'High': 0}
     for task in tasks:
         priority = task.get('priority', 'Low')
@@ -266,11 +298,15 @@ def create_priority_distribution_chart(tasks):
     
     return fig
 
+@traced
+@timed_builder
 def create_workload_timeline(tasks):
     """Create timeline chart showing workload over time"""
     if not tasks:
         return None
     
+    import plotly.graph_objects as go
+    
     task_dates = {}
     for task in tasks:
         date = task['deadline']
@@ -302,8 +338,13 @@ def create_workload_timeline(tasks):
     
     return fig
 
+@traced
+@timed_builder
 def export_tasks_to_excel(tasks, filename="tasks_export.xlsx"):
     """Export tasks to Excel file"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment, PatternFill
+    
     wb = Workbook()
     ws = wb.active
     ws.title = "Tasks"
@@ -338,8 +379,12 @@ def export_tasks_to_excel(tasks, filename="tasks_export.xlsx"):
     
     return output
 
+@traced
+@timed_builder
 def export_report_to_pdf(username, tasks, group_tasks, burnout_data):
     """Generate PDF report"""
+    from fpdf import FPDF
+    
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Arial", "B", 20)
@@ -395,6 +440,8 @@ def show_notification(message, icon="🔔"):
     </div>
     """, unsafe_allow_html=True)
 
+@traced
+@timed_builder
 def create_calendar_view(tasks, year, month):
     """Create monthly calendar view"""
     import calendar
@@ -443,4 +490,66 @@ def create_calendar_view(tasks, year, month):
     
     html += "</table></div>"
     
-    return html
\ No newline at end of file
+    return html
+
+TASK_LIST_PAGE_SIZE = 25
+
+def paginate(items, page, page_size=TASK_LIST_PAGE_SIZE):
+    """Return (items on page, number of pages) for a 1-based page number"""
+    num_pages = max(1, -(-len(items) // page_size))
+    page = min(max(page, 1), num_pages)
+    start = (page - 1) * page_size
+    return items[start:start + page_size], num_pages
+
+@traced
+def render_task_list(tasks, today=None):
+    """Render a list of tasks as a single HTML block.
+
+    One markdown element for the whole list keeps the number of Streamlit
+    deltas constant regardless of how many tasks are shown.
+    """
+    today = today or datetime.now().date()
+    priority_icons = {"Low": "🟢", "Medium": "🟡", "High": "🔴"}
+    status_colors = {"Pending": "#64748b", "In Progress": "#f59e0b", "Completed": "#10b981"}
+    
+    rows = []
+    for task in tasks:
+        status = task.get('task_status') or 'Pending'
+        days_left = (task['deadline'] - today).days
+        
+        if status == 'Completed':
+            urgency, urgency_color = "✅ Completed", "#10b981"
+        elif days_left < 0:
+            urgency, urgency_color = f"Overdue by {abs(days_left)}d", "#ef4444"
+        elif days_left == 0:
+            urgency, urgency_color = "Due today", "#f59e0b"
+        else:
+            urgency, urgency_color = f"{days_left}d left", "#f59e0b" if days_left <= 3 else "#10b981"
+        
+        details = [
+            f"📅 {task['deadline']}",
+            f"⏱️ {task['estimated_hours']}h",
+            f"{priority_icons.get(task['priority'], '')} {task['priority']}",
+            f"Status: {status}",
+        ]
+        if task.get('group_name'):
+            details.insert(0, f"👥 {html_lib.escape(task['group_name'])}")
+        if 'assigned_name' in task:
+            details.append(f"👤 {html_lib.escape(task['assigned_name'] or 'Unassigned')}")
+        
+        rows.append(f"""
+        <div style='display: flex; justify-content: space-between; align-items: center; padding: 12px 15px; border-bottom: 1px solid #e2e8f0; border-left: 4px solid {status_colors.get(status, '#3b82f6')};'>
+            <div>
+                <div style='font-weight: 600; color: #1e3a8a;'>{html_lib.escape(task['title'])}</div>
+                <div style='font-size: 13px; color: #64748b; margin-top: 4px;'>{' | '.join(details)}</div>
+            </div>
+            <div style='font-weight: 600; color: {urgency_color}; white-space: nowrap; margin-left: 15px;'>{urgency}</div>
+        </div>
+        """.strip())
+    
+    # No blank lines: a blank line would end the markdown HTML block
+    return f"""
+    <div style='background: white; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.05); overflow: hidden; margin: 10px 0;'>
+        {''.join(rows)}
+    </div>
+    """
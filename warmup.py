@@ -0,0 +1,108 @@
+"""Warm-start routine run once per app server process.
+
+Opens the connection pool, imports the heavy chart and export modules and
+primes the shared read caches, so the first requests after a deploy don't
+pay for any of it. /ready on the ops listener returns 503 until it has
+finished, so a load balancer can hold traffic until then.
+"""
+import importlib
+import os
+import threading
+import time
+
+from ops_server import route, start_ops_server
+
+# Connections validated at boot; the pool itself opens DB_POOL_SIZE
+WARM_CONNECTIONS = int(os.environ.get('DB_WARM_CONNECTIONS', 0)) or None
+
+WARM_IMPORTS = [
+    'plotly.graph_objects',
+    'fpdf',
+    'openpyxl',
+    'tasks',
+    'groups',
+    'burnout',
+    'utils',
+]
+
+WARM_RETRY_SECONDS = 5
+
+_state = {'started': False, 'ready': False, 'error': None}
+_state_lock = threading.Lock()
+
+
+def is_ready():
+    return _state['ready']
+
+
+@route('/ready')
+def ready():
+    if _state['ready']:
+        return 200, 'text/plain', 'ready\n'
+    return 503, 'text/plain', f"warming up{': ' + _state['error'] if _state['error'] else ''}\n"
+
+
+def warm_pool():
+    """Create each shard's pool and run a round trip on each warm connection"""
+    from db import DB_BACKEND, DB_POOL_SIZE, SHARDS, execute_query, get_pool
+
+    if DB_BACKEND == 'sqlite':
+        # Opens the database file and creates the schema if it is new
+        execute_query("SELECT 1", fetch=True)
+        return
+    for shard in range(len(SHARDS)):
+        pool = get_pool(shard)
+        conns = []
+        try:
+            for _ in range(min(WARM_CONNECTIONS or DB_POOL_SIZE, DB_POOL_SIZE)):
+                conn = pool.get_connection()
+                conns.append(conn)
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+                cursor.close()
+        finally:
+            for conn in conns:
+                conn.close()
+
+
+def warm_imports():
+    for name in WARM_IMPORTS:
+        importlib.import_module(name)
+
+
+def prime_caches():
+    from groups import warm_all_groups
+
+    # The warm-up thread has no page: db logs the cause instead of st.error
+    if not warm_all_groups():
+        raise RuntimeError("could not load the group list")
+
+
+def _run():
+    while True:
+        try:
+            warm_pool()
+            warm_imports()
+            prime_caches()
+        except Exception as e:
+            _state['error'] = str(e)
+            time.sleep(WARM_RETRY_SECONDS)
+            continue
+        _state['error'] = None
+        _state['ready'] = True
+        return
+
+
+def warm_start(background=True):
+    """Start the ops listener and warm this process; runs only once"""
+    with _state_lock:
+        if _state['started']:
+            return
+        _state['started'] = True
+
+    start_ops_server()
+    if background:
+        threading.Thread(target=_run, name='warm-start', daemon=True).start()
+    else:
+        _run()